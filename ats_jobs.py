@@ -0,0 +1,423 @@
+import os
+import json
+import time
+import uuid
+import random
+import socket
+import sqlite3
+import ipaddress
+import asyncio
+import logging
+import threading
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+from urllib.parse import urlsplit, urlunsplit
+import httpx
+from pydantic import BaseModel
+from app_logging import request_id
+from metrics import current_endpoint
+
+# ATS job queue settings
+ATS_JOBS_DB = os.getenv("ATS_JOBS_DB", "ats_jobs.db")
+ATS_JOB_WORKERS = int(os.getenv("ATS_JOB_WORKERS", "4"))
+ATS_JOB_MAX_ATTEMPTS = int(os.getenv("ATS_JOB_MAX_ATTEMPTS", "3"))
+# A running job whose lease runs out (its worker died) is picked up again by another worker
+ATS_JOB_LEASE = float(os.getenv("ATS_JOB_LEASE", "300"))
+ATS_JOB_POLL_INTERVAL = float(os.getenv("ATS_JOB_POLL_INTERVAL", "1"))
+ATS_JOB_TTL = float(os.getenv("ATS_JOB_TTL", str(7 * 86400)))
+# Seconds shutdown gives running jobs to finish before they are handed back to the queue
+ATS_JOB_DRAIN_TIMEOUT = float(os.getenv("ATS_JOB_DRAIN_TIMEOUT", "20"))
+# Webhook delivery settings; an empty host list allows any host with a public address
+ATS_WEBHOOK_TIMEOUT = float(os.getenv("ATS_WEBHOOK_TIMEOUT", "10"))
+ATS_WEBHOOK_RETRIES = int(os.getenv("ATS_WEBHOOK_RETRIES", "3"))
+ATS_WEBHOOK_ALLOWED_HOSTS = {host.strip().lower() for host in os.getenv("ATS_WEBHOOK_ALLOWED_HOSTS", "").split(",") if host.strip()}
+# Allow webhooks to loopback, private, link-local and reserved addresses (e.g. for local testing)
+ATS_WEBHOOK_ALLOW_PRIVATE = os.getenv("ATS_WEBHOOK_ALLOW_PRIVATE", "false").lower() in ("1", "true", "yes")
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS ats_jobs (
+    id TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    stage TEXT NOT NULL DEFAULT '',
+    inputs TEXT NOT NULL,
+    pdf BLOB,
+    outputs TEXT NOT NULL DEFAULT '{}',
+    error TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    webhook_url TEXT,
+    webhook_status TEXT,
+    claimed_by TEXT,
+    run_after REAL NOT NULL DEFAULT 0,
+    lease_until REAL NOT NULL DEFAULT 0,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ats_jobs_status ON ats_jobs (status, run_after);
+"""
+
+JOB_COLUMNS = "id, status, stage, inputs, pdf, outputs, error, attempts, webhook_url, webhook_status, created_at, updated_at"
+
+
+class ATSJob(BaseModel):
+    job_id: str
+    status: str  # queued, running, done or failed
+    stage: str  # Last finished stage, "" before the first one
+    inputs: Dict[str, Any]
+    pdf: Optional[bytes] = None  # Dropped once the job has finished
+    outputs: Dict[str, Any]  # Outputs of the finished stages
+    error: Optional[str] = None
+    attempts: int
+    webhook_url: Optional[str] = None
+    webhook_status: Optional[str] = None  # pending, delivered or failed
+    created_at: float
+    updated_at: float
+
+    @classmethod
+    def from_row(cls, row: Tuple) -> "ATSJob":
+        (job_id, status, stage, inputs, pdf, outputs, error, attempts,
+         webhook_url, webhook_status, created_at, updated_at) = row
+        return cls(
+            job_id=job_id, status=status, stage=stage, inputs=json.loads(inputs), pdf=pdf,
+            outputs=json.loads(outputs), error=error, attempts=attempts, webhook_url=webhook_url,
+            webhook_status=webhook_status, created_at=created_at, updated_at=updated_at,
+        )
+
+
+def validate_webhook_url(url: str) -> str:
+    """
+    Check the form of a webhook URL; resolve_webhook_address checks where it points.
+
+    Raises:
+        ValueError: If the URL is not http(s) or its host is not in ATS_WEBHOOK_ALLOWED_HOSTS
+    """
+    parts = urlsplit(url)
+    if parts.scheme not in ("http", "https") or not parts.hostname:
+        raise ValueError("webhook_url must be an http or https URL")
+    if ATS_WEBHOOK_ALLOWED_HOSTS and parts.hostname.lower() not in ATS_WEBHOOK_ALLOWED_HOSTS:
+        raise ValueError(f"webhook_url host {parts.hostname} is not allowed")
+    return url
+
+
+async def resolve_webhook_address(url: str) -> str:
+    """
+    Resolve the host of a webhook URL and return the address to deliver to.
+
+    Every address the host resolves to must be public (not loopback, private, link-local,
+    multicast or reserved) unless ATS_WEBHOOK_ALLOW_PRIVATE is set, so a client cannot make
+    the server POST to internal services or cloud metadata endpoints.
+
+    Raises:
+        ValueError: If the URL is invalid, the host does not resolve or an address is not public
+    """
+    parts = urlsplit(validate_webhook_url(url))
+    try:
+        port = parts.port or (443 if parts.scheme == "https" else 80)
+        infos = await asyncio.get_running_loop().getaddrinfo(parts.hostname, port, type=socket.SOCK_STREAM)
+    except (ValueError, OSError):
+        raise ValueError(f"webhook_url host {parts.hostname} could not be resolved") from None
+    addresses = [ipaddress.ip_address(info[4][0].split("%", 1)[0]) for info in infos]
+    if not addresses:
+        raise ValueError(f"webhook_url host {parts.hostname} could not be resolved")
+    if not ATS_WEBHOOK_ALLOW_PRIVATE:
+        for address in addresses:
+            if isinstance(address, ipaddress.IPv6Address) and address.ipv4_mapped is not None:
+                address = address.ipv4_mapped
+            if not address.is_global or address.is_multicast:
+                raise ValueError(f"webhook_url host {parts.hostname} resolves to a non-public address")
+    return str(addresses[0])
+
+
+def pin_webhook_request(url: str, address: str) -> Tuple[str, Dict[str, str], Dict[str, Any]]:
+    """
+    URL, headers and httpx request extensions that send a request for `url` to the
+    already-checked `address`, so the host cannot be re-resolved elsewhere (DNS rebinding).
+    TLS still verifies the certificate for the original host name.
+    """
+    parts = urlsplit(url)
+    host = f"[{address}]" if ":" in address else address
+    netloc = f"{host}:{parts.port}" if parts.port else host
+    host_header = f"{parts.hostname}:{parts.port}" if parts.port else parts.hostname
+    extensions = {"sni_hostname": parts.hostname} if parts.scheme == "https" else {}
+    return urlunsplit(parts._replace(netloc=netloc)), {"Host": host_header}, extensions
+
+
+class ATSJobStore:
+    """
+    SQLite store of ATS jobs and their stage outputs. Jobs are claimed with a lease, so a
+    job whose worker died is picked up again once the lease runs out, from its last finished
+    stage. WAL mode lets several worker processes share the database file.
+    """
+
+    def __init__(self, path: str = ATS_JOBS_DB):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(SCHEMA)
+
+    async def _run(self, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        def locked():
+            with self._lock:
+                return fn(*args, **kwargs)
+        return await asyncio.to_thread(locked)
+
+    def _get(self, job_id: str) -> Optional[ATSJob]:
+        row = self._conn.execute(f"SELECT {JOB_COLUMNS} FROM ats_jobs WHERE id = ?", (job_id,)).fetchone()
+        return ATSJob.from_row(row) if row else None
+
+    def _update(self, job_id: str, **fields: Any) -> Optional[ATSJob]:
+        fields["updated_at"] = time.time()
+        assignments = ", ".join(f"{name} = ?" for name in fields)
+        self._conn.execute(f"UPDATE ats_jobs SET {assignments} WHERE id = ?", (*fields.values(), job_id))
+        return self._get(job_id)
+
+    async def get(self, job_id: str) -> Optional[ATSJob]:
+        return await self._run(self._get, job_id)
+
+    async def create(self, inputs: Dict[str, Any], pdf: bytes, webhook_url: Optional[str] = None) -> ATSJob:
+        def create():
+            job_id = uuid.uuid4().hex
+            now = time.time()
+            self._conn.execute(
+                "INSERT INTO ats_jobs (id, status, inputs, pdf, webhook_url, webhook_status, created_at, updated_at) "
+                "VALUES (?, 'queued', ?, ?, ?, ?, ?, ?)",
+                (job_id, json.dumps(inputs), pdf, webhook_url, "pending" if webhook_url else None, now, now),
+            )
+            return self._get(job_id)
+        return await self._run(create)
+
+    async def claim(self, worker_id: str, lease: float = ATS_JOB_LEASE) -> Optional[ATSJob]:
+        """Claim the oldest runnable job: queued and due, or running with an expired lease."""
+        def claim():
+            now = time.time()
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute(
+                    "SELECT id FROM ats_jobs WHERE (status = 'queued' AND run_after <= ?) "
+                    "OR (status = 'running' AND lease_until < ?) ORDER BY created_at LIMIT 1",
+                    (now, now),
+                ).fetchone()
+                if row is None:
+                    self._conn.execute("COMMIT")
+                    return None
+                self._conn.execute(
+                    "UPDATE ats_jobs SET status = 'running', claimed_by = ?, lease_until = ?, "
+                    "attempts = attempts + 1, updated_at = ? WHERE id = ?",
+                    (worker_id, now + lease, now, row[0]),
+                )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            return self._get(row[0])
+        return await self._run(claim)
+
+    async def finish_stage(self, job: ATSJob, stage: str, outputs: Dict[str, Any],
+                           lease: float = ATS_JOB_LEASE) -> ATSJob:
+        """Persist a stage's outputs and renew the lease for the next stage."""
+        merged = {**job.outputs, **outputs}
+        return await self._run(
+            self._update, job.job_id, stage=stage, outputs=json.dumps(merged), lease_until=time.time() + lease,
+        )
+
+    async def complete(self, job_id: str) -> ATSJob:
+        return await self._run(self._update, job_id, status="done", pdf=None, error=None, claimed_by=None)
+
+    async def fail(self, job_id: str, error: str) -> ATSJob:
+        return await self._run(self._update, job_id, status="failed", pdf=None, error=error, claimed_by=None)
+
+    async def retry_later(self, job_id: str, error: str, delay: float) -> ATSJob:
+        return await self._run(
+            self._update, job_id, status="queued", error=error, claimed_by=None, run_after=time.time() + delay,
+        )
+
+    async def release(self, worker_id: str) -> int:
+        """Put the running jobs of a worker that is shutting down back in the queue."""
+        def release():
+            return self._conn.execute(
+                "UPDATE ats_jobs SET status = 'queued', claimed_by = NULL, attempts = MAX(attempts - 1, 0) "
+                "WHERE status = 'running' AND claimed_by = ?",
+                (worker_id,),
+            ).rowcount
+        return await self._run(release)
+
+    async def set_webhook_status(self, job_id: str, webhook_status: str) -> None:
+        await self._run(self._update, job_id, webhook_status=webhook_status)
+
+    async def pending_webhooks(self) -> List[ATSJob]:
+        """Finished jobs whose webhook has not been delivered yet."""
+        def pending():
+            rows = self._conn.execute(
+                f"SELECT {JOB_COLUMNS} FROM ats_jobs WHERE status IN ('done', 'failed') AND webhook_status = 'pending'"
+            ).fetchall()
+            return [ATSJob.from_row(row) for row in rows]
+        return await self._run(pending)
+
+    def counts(self) -> Dict[str, int]:
+        """Number of jobs per status."""
+        with self._lock:
+            return dict(self._conn.execute("SELECT status, COUNT(*) FROM ats_jobs GROUP BY status").fetchall())
+
+    def evict_expired(self, ttl: float = ATS_JOB_TTL) -> int:
+        """Delete finished jobs older than `ttl` seconds and return how many were deleted."""
+        with self._lock:
+            return self._conn.execute(
+                "DELETE FROM ats_jobs WHERE status IN ('done', 'failed') AND updated_at < ?", (time.time() - ttl,)
+            ).rowcount
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+StageFn = Callable[[ATSJob], Awaitable[Dict[str, Any]]]
+
+
+class ATSJobRunner:
+    """
+    Runs queued ATS jobs in `workers` concurrent tasks. Each job goes through `stages` in
+    order, and every stage's outputs are persisted before the next one starts, so a resumed
+    job continues after its last finished stage. Errors for which `retryable` returns True
+    requeue the job with a backoff, up to `max_attempts` runs; other errors fail it. When a
+    job with a webhook finishes, its status (as built by `render`) is POSTed to the webhook.
+    """
+
+    def __init__(
+        self,
+        stages: List[Tuple[str, StageFn]],
+        render: Callable[[ATSJob], Dict[str, Any]],
+        retryable: Callable[[Exception], bool],
+        endpoint: str = "",
+        db_path: str = ATS_JOBS_DB,
+        workers: int = ATS_JOB_WORKERS,
+        max_attempts: int = ATS_JOB_MAX_ATTEMPTS,
+    ):
+        self.stages = stages
+        self.render = render
+        self.retryable = retryable
+        self.endpoint = endpoint
+        self.db_path = db_path
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self.worker_id = uuid.uuid4().hex
+        self._store: Optional[ATSJobStore] = None
+        self._tasks: List[asyncio.Task] = []
+        self._webhook_tasks: set[asyncio.Task] = set()
+        self._wakeup = asyncio.Event()
+        self._stopping = False
+        self._http: Optional[httpx.AsyncClient] = None
+
+    @property
+    def store(self) -> ATSJobStore:
+        if self._store is None:
+            self._store = ATSJobStore(self.db_path)
+        return self._store
+
+    async def submit(self, inputs: Dict[str, Any], pdf: bytes, webhook_url: Optional[str] = None) -> ATSJob:
+        job = await self.store.create(inputs, pdf, webhook_url)
+        self._wakeup.set()
+        return job
+
+    async def start(self) -> None:
+        """Start the workers and retry webhooks that were not delivered before a restart."""
+        await asyncio.to_thread(self.store.evict_expired)
+        self._http = httpx.AsyncClient(timeout=ATS_WEBHOOK_TIMEOUT)
+        self._stopping = False
+        self._tasks = [asyncio.create_task(self._work()) for _ in range(self.workers)]
+        for job in await self.store.pending_webhooks():
+            self._send_webhook(job)
+
+    async def stop(self, timeout: float = 0) -> None:
+        """
+        Stop claiming jobs, give running jobs up to `timeout` seconds to finish, then cancel
+        them and hand them back to the queue (they resume from their last finished stage).
+        """
+        self._stopping = True
+        self._wakeup.set()
+        if self._tasks and timeout > 0:
+            await asyncio.wait(self._tasks, timeout=timeout)
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        if self._store is not None:
+            released = await self.store.release(self.worker_id)
+            if released:
+                logger.info("Requeued unfinished ATS jobs", extra={"jobs": released})
+        if self._webhook_tasks:
+            await asyncio.wait(self._webhook_tasks, timeout=ATS_WEBHOOK_TIMEOUT)
+        if self._http is not None:
+            await self._http.aclose()
+            self._http = None
+
+    async def _work(self) -> None:
+        current_endpoint.set(self.endpoint)
+        while not self._stopping:
+            try:
+                job = await self.store.claim(self.worker_id)
+            except sqlite3.Error:
+                logger.exception("Failed to claim an ATS job")
+                job = None
+            if job is None:
+                if self._stopping:
+                    return
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), ATS_JOB_POLL_INTERVAL)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            token = request_id.set(job.job_id)
+            try:
+                await self._run_job(job)
+            finally:
+                request_id.reset(token)
+
+    async def _run_job(self, job: ATSJob) -> None:
+        names = [name for name, _ in self.stages]
+        first = names.index(job.stage) + 1 if job.stage in names else 0
+        try:
+            for name, stage_fn in self.stages[first:]:
+                job = await self.store.finish_stage(job, name, await stage_fn(job))
+        except Exception as e:
+            error = str(getattr(e, "detail", None) or e)
+            if self.retryable(e) and job.attempts < self.max_attempts:
+                delay = random.uniform(0, min(60.0, 2.0 ** job.attempts))
+                logger.warning("ATS job stage failed, retrying", extra={"stage": job.stage, "error": error})
+                await self.store.retry_later(job.job_id, error, delay)
+                return
+            logger.error("ATS job failed", extra={"stage": job.stage, "error": error})
+            job = await self.store.fail(job.job_id, error)
+        else:
+            job = await self.store.complete(job.job_id)
+        if job.webhook_url:
+            self._send_webhook(job)
+
+    def _send_webhook(self, job: ATSJob) -> None:
+        task = asyncio.create_task(self._deliver_webhook(job))
+        self._webhook_tasks.add(task)
+        task.add_done_callback(self._webhook_tasks.discard)
+
+    async def _deliver_webhook(self, job: ATSJob) -> None:
+        payload = self.render(job)
+        for attempt in range(ATS_WEBHOOK_RETRIES + 1):
+            try:
+                # Resolved again for every attempt, and the request is pinned to the checked address
+                address = await resolve_webhook_address(job.webhook_url)
+            except ValueError as e:
+                logger.warning("ATS job webhook refused", extra={"job_id": job.job_id, "error": str(e)})
+                await self.store.set_webhook_status(job.job_id, "failed")
+                return
+            url, headers, extensions = pin_webhook_request(job.webhook_url, address)
+            try:
+                response = await self._http.post(url, json=payload, headers=headers, extensions=extensions)
+                if response.status_code < 400:
+                    await self.store.set_webhook_status(job.job_id, "delivered")
+                    return
+            except httpx.HTTPError:
+                pass
+            if attempt < ATS_WEBHOOK_RETRIES:
+                await asyncio.sleep(random.uniform(0, 2.0 ** attempt))
+        logger.warning("ATS job webhook delivery failed", extra={"job_id": job.job_id})
+        await self.store.set_webhook_status(job.job_id, "failed")
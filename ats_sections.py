@@ -0,0 +1,115 @@
+import os
+from typing import Any, Dict, List, Tuple
+
+# Most recommendations returned by a per-section ATS analysis
+ATS_MAX_RECOMMENDATIONS = int(os.getenv("ATS_MAX_RECOMMENDATIONS", "6"))
+
+# CV sections analyzed against the job description, with their weight in the overall score
+SECTION_WEIGHTS: Dict[str, float] = {
+    "personal_info": 0.05,
+    "education": 0.15,
+    "work_experience": 0.40,
+    "skills": 0.25,
+    "projects": 0.08,
+    "certifications": 0.05,
+    "awards": 0.02,
+}
+SECTION_TITLES: Dict[str, str] = {
+    "personal_info": "Personal Info",
+    "education": "Education",
+    "work_experience": "Work Experience",
+    "skills": "Skills",
+    "projects": "Projects",
+    "certifications": "Certifications",
+    "awards": "Awards",
+}
+# Sections that count as a score of 0 when the CV does not have them
+EXPECTED_SECTIONS = ("education", "work_experience", "skills")
+
+# Overall score bands, as in the single-call ATS prompt
+SCORE_BANDS = (
+    (90, "Excellent match, highly qualified"),
+    (75, "Good match, qualified with minor gaps"),
+    (60, "Moderate match, some relevant experience"),
+    (40, "Weak match, significant gaps"),
+    (0, "Poor match, not qualified"),
+)
+
+
+def is_filled(value: Any) -> bool:
+    """Whether a parsed CV value holds any information (not only empty strings, lists and nulls)."""
+    if isinstance(value, dict):
+        return any(is_filled(item) for item in value.values())
+    if isinstance(value, list):
+        return any(is_filled(item) for item in value)
+    if isinstance(value, str):
+        return bool(value.strip())
+    return value is not None
+
+
+def relevant_sections(cv_data: Dict[str, Any]) -> List[Tuple[str, Any]]:
+    """The weighted sections the parsed CV actually has, in SECTION_WEIGHTS order."""
+    return [(section, cv_data[section]) for section in SECTION_WEIGHTS if is_filled(cv_data.get(section))]
+
+
+def clamp_score(value: Any) -> float:
+    try:
+        return min(100.0, max(0.0, float(value)))
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def overall_score(scores: Dict[str, float]) -> float:
+    """
+    Weighted mean of the section scores. Sections the CV does not have are left out,
+    except EXPECTED_SECTIONS, which count as 0.
+    """
+    weighted = {section: scores.get(section, 0.0) for section in SECTION_WEIGHTS
+                if section in scores or section in EXPECTED_SECTIONS}
+    total_weight = sum(SECTION_WEIGHTS[section] for section in weighted)
+    if not total_weight:
+        return 0.0
+    return round(sum(SECTION_WEIGHTS[section] * score for section, score in weighted.items()) / total_weight, 1)
+
+
+def overall_feedback(score: float, scores: Dict[str, float]) -> str:
+    """One-paragraph verdict built from the overall score band and the strongest and weakest sections."""
+    verdict = next(label for threshold, label in SCORE_BANDS if score >= threshold)
+    parts = [f"{verdict} ({score:.0f}/100)."]
+    if scores:
+        strongest = max(scores, key=scores.get)
+        weakest = min(scores, key=scores.get)
+        parts.append(f"Strongest section: {SECTION_TITLES[strongest]} ({scores[strongest]:.0f}/100).")
+        if weakest != strongest:
+            parts.append(f"Weakest section: {SECTION_TITLES[weakest]} ({scores[weakest]:.0f}/100).")
+    missing = [SECTION_TITLES[section] for section in EXPECTED_SECTIONS if section not in scores]
+    if missing:
+        parts.append(f"Missing: {', '.join(missing)}.")
+    return " ".join(parts)
+
+
+def merge_recommendations(
+    recommendations: Dict[str, List[str]],
+    scores: Dict[str, float],
+    limit: int = ATS_MAX_RECOMMENDATIONS,
+) -> List[str]:
+    """
+    Combine the sections' recommendations, taking them in turn from the sections with the
+    largest weighted gap (weight x (100 - score)) first, without duplicates. Missing expected
+    sections come first.
+    """
+    merged = [f"Add a section on your {SECTION_TITLES[section].lower()}" for section in EXPECTED_SECTIONS if section not in scores]
+    order = sorted(recommendations, key=lambda section: SECTION_WEIGHTS[section] * (100 - scores.get(section, 0.0)), reverse=True)
+    queues = [[item.strip() for item in recommendations[section] if isinstance(item, str) and item.strip()] for section in order]
+    seen = {item.lower() for item in merged}
+    while len(merged) < limit and any(queues):
+        for queue in queues:
+            while queue:
+                item = queue.pop(0)
+                if item.lower() not in seen:
+                    seen.add(item.lower())
+                    merged.append(item)
+                    break
+            if len(merged) >= limit:
+                break
+    return merged[:limit]
@@ -0,0 +1,69 @@
+import os
+import json
+from typing import Any, Dict, List, Optional
+from pydantic import BaseModel
+
+# Batch generation settings
+GENERATION_BATCH_MAX_ITEMS = int(os.getenv("GENERATION_BATCH_MAX_ITEMS", "200"))
+GENERATION_BATCH_MAX_PER_CALL = int(os.getenv("GENERATION_BATCH_MAX_PER_CALL", "40"))
+GENERATION_BATCH_CONCURRENCY = int(os.getenv("GENERATION_BATCH_CONCURRENCY", "4"))
+
+# Expected completion tokens of one entry of a batch completion, per task, including its JSON key
+BATCH_ENTRY_TOKENS = {
+    "skills_batch": 40,
+    "job_responsibilities_batch": 140,
+}
+
+
+class BatchItem(BaseModel):
+    """One distinct input of a batch request, and the request positions that asked for it."""
+    key: str  # Generation cache key
+    job_title: str
+    company_industry: Optional[str] = None
+    indexes: List[int]
+    requested_titles: List[str]  # Job title as given at each of the indexes
+
+    def prompt_input(self) -> Any:
+        if self.company_industry is None:
+            return self.job_title
+        return {"job_title": self.job_title, "company_industry": self.company_industry}
+
+
+def pack_items(items: List[BatchItem], entry_tokens: int, max_tokens: int,
+               max_per_call: int = GENERATION_BATCH_MAX_PER_CALL) -> List[List[BatchItem]]:
+    """
+    Split items into packs whose expected output fits the completion budget of one call.
+    Packs are sized evenly, so the last one is not left with a few stragglers.
+    """
+    if not items:
+        return []
+    per_call = max(1, min(max_per_call, max_tokens // max(1, entry_tokens)))
+    calls = -(-len(items) // per_call)
+    size = -(-len(items) // calls)
+    return [items[start:start + size] for start in range(0, len(items), size)]
+
+
+def batch_prompt_items(pack: List[BatchItem]) -> Dict[str, Any]:
+    """The pack's inputs keyed by entry ID ("1", "2", ...), as sent in the batch prompt."""
+    return {str(number): item.prompt_input() for number, item in enumerate(pack, start=1)}
+
+
+def parse_batch_entries(text: str) -> Dict[str, str]:
+    """
+    Read the entries of a batch completion: a JSON object mapping entry IDs to text.
+    Entries given as lists are joined with commas; anything that is not text is left out,
+    so the caller retries it.
+    """
+    try:
+        data = json.loads(text)
+    except ValueError:
+        return {}
+    if not isinstance(data, dict):
+        return {}
+    entries = {}
+    for key, value in data.items():
+        if isinstance(value, list):
+            value = ", ".join(str(part) for part in value if isinstance(part, (str, int, float)))
+        if isinstance(value, str) and value.strip():
+            entries[str(key).strip()] = value
+    return entries
@@ -0,0 +1,87 @@
+"""
+Latency benchmark for per-section ATS analysis.
+
+Starts the recorded-response LLM simulator and sends /generate/ats_score requests with
+ATS_ANALYSIS_MODE "single" (one long completion for the whole CV) and then "sections"
+(one short completion per CV section, run concurrently). The CVs are parsed once before
+the runs, so both modes are served from the CV cache and only the analysis is measured.
+Reports p50/p95/p99 latency and LLM calls per request of each mode.
+
+Run with:
+    python benchmarks/bench_ats_sections.py --requests 60 --concurrency 8 --speed 2
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+import httpx
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(ROOT))
+
+from bench_llm_concurrency import start_server
+from bench_pdf_latency import percentile
+from bench_suite import JOB_DESCRIPTION
+from pdf_fixtures import make_cv_pdf
+
+
+async def run_mode(app, pdfs, total, concurrency, mode):
+    latencies = []
+    queue = asyncio.Queue()
+    for i in range(total):
+        queue.put_nowait(i)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://app", timeout=600) as client:
+        async def worker():
+            while not queue.empty():
+                i = queue.get_nowait()
+                start = time.perf_counter()
+                response = await client.post(
+                    "/generate/ats_score",
+                    files={"cv_file": ("cv.pdf", pdfs[i % len(pdfs)], "application/pdf")},
+                    data={"job_title": f"Data Engineer {mode}-{i}", "job_description": JOB_DESCRIPTION},
+                )
+                response.raise_for_status()
+                latencies.append(time.perf_counter() - start)
+
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latencies
+
+
+async def main(args):
+    os.environ["GROQ_BASE_URL"] = f"http://127.0.0.1:{args.port}"
+    os.environ.setdefault("GROQ_API_KEY", "mock-key")
+    import main as app_module
+    from metrics import MODEL_ROUTING
+
+    pdfs = [make_cv_pdf(args.pages, seed=seed) for seed in range(args.cvs)]
+    # Fill the CV cache, so the runs only measure the analysis
+    await run_mode(app_module.app, pdfs, len(pdfs), 1, "warmup")
+
+    print(f"{'mode':<10}{'p50':>8}{'p95':>8}{'p99':>8}{'calls/req':>11}")
+    for mode in ("single", "sections"):
+        app_module.ATS_ANALYSIS_MODE = mode
+        before = sum(MODEL_ROUTING._values.values())
+        latencies = await run_mode(app_module.app, pdfs, args.requests, args.concurrency, mode)
+        calls = (sum(MODEL_ROUTING._values.values()) - before) / args.requests
+        print(f"{mode:<10}{percentile(latencies, 50):>8.2f}{percentile(latencies, 95):>8.2f}"
+              f"{percentile(latencies, 99):>8.2f}{calls:>11.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=60)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--cvs", type=int, default=4)
+    parser.add_argument("--pages", type=int, default=2)
+    parser.add_argument("--speed", type=float, default=1.0, help="Play recordings back this many times faster")
+    parser.add_argument("--recordings", default=os.path.join(ROOT, "recordings", "groq_sample.jsonl"))
+    parser.add_argument("--port", type=int, default=8791)
+    args = parser.parse_args()
+    server = start_server("llm_simulator.py", args.port, "--recordings", args.recordings, "--speed", str(args.speed))
+    try:
+        asyncio.run(main(args))
+    finally:
+        server.terminate()
+        server.wait()
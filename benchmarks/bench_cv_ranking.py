@@ -0,0 +1,60 @@
+"""
+Benchmark for the CV ranking index.
+
+Indexes synthetic parsed CVs in batches and reports indexing throughput and
+query latency (p50/p99) for each corpus size.
+
+Run with:
+    python benchmarks/bench_cv_ranking.py --sizes 10000 100000 --queries 50
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(ROOT))
+
+from cv_corpus import make_parsed_cv
+from cv_ranking import CVRankingIndex
+
+JOB_DESCRIPTIONS = [
+    "Senior Software Engineer: Python, AWS, Docker and Kubernetes. Build scalable APIs and mentor engineers.",
+    "Data Analyst with SQL, Tableau and statistics experience. Build reporting dashboards for stakeholders.",
+    "DevOps Engineer: Terraform, CI/CD pipelines, Kubernetes, monitoring and incident response.",
+    "Data Scientist: machine learning, Python, Spark and Airflow. M.S. in Data Science preferred.",
+]
+
+
+def main(args):
+    print(f"{'cvs':>8} {'index s':>10} {'cvs/s':>10} {'p50 ms':>10} {'p99 ms':>10}")
+    for size in args.sizes:
+        index = CVRankingIndex()
+        start = time.perf_counter()
+        for batch_start in range(0, size, args.batch):
+            batch = [(f"cv-{i}", make_parsed_cv(i)) for i in range(batch_start, min(size, batch_start + args.batch))]
+            index.add_many(batch)
+        # First query stacks the buffered rows; count it as indexing time
+        index.rank(JOB_DESCRIPTIONS[0], top_k=args.top_k)
+        index_time = time.perf_counter() - start
+
+        latencies = []
+        for q in range(args.queries):
+            start = time.perf_counter()
+            index.rank(JOB_DESCRIPTIONS[q % len(JOB_DESCRIPTIONS)], top_k=args.top_k)
+            latencies.append(time.perf_counter() - start)
+        latencies.sort()
+        p99 = latencies[min(len(latencies) - 1, int(0.99 * len(latencies)))]
+        print(f"{size:>8} {index_time:>10.2f} {size / index_time:>10.0f} "
+              f"{statistics.median(latencies) * 1000:>10.2f} {p99 * 1000:>10.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="CV ranking index benchmark")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000])
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--batch", type=int, default=1000)
+    parser.add_argument("--top-k", type=int, default=10)
+    args = parser.parse_args()
+    main(args)
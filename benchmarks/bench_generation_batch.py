@@ -0,0 +1,107 @@
+"""
+Latency benchmark for batch skills and responsibilities generation.
+
+Starts the mock LLM server with a per-output-token generation time and a share of empty
+entries from the small model, then generates skills for --titles job titles (unique per
+run, so the generation cache is not hit) in two ways: one /generate/skills request per
+title at --concurrency in flight, and one /generate/skills/batch request. The same is
+done for responsibilities. Reports the wall time and LLM calls of each way, and how the
+batch entries were served (batched, retried in a smaller batch, single call, failed).
+
+Run with:
+    python benchmarks/bench_generation_batch.py --titles 20 100 200 --concurrency 8 --small-empty-rate 0.02
+"""
+import argparse
+import asyncio
+import collections
+import os
+import sys
+import time
+import httpx
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(ROOT))
+
+from bench_llm_concurrency import start_mock_server
+from pdf_fixtures import TITLES
+
+
+async def run_singles(client, path, bodies, concurrency):
+    queue = asyncio.Queue()
+    for body in bodies:
+        queue.put_nowait(body)
+
+    async def worker():
+        while not queue.empty():
+            response = await client.post(path, json=queue.get_nowait())
+            response.raise_for_status()
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+
+
+async def run_batch(client, path, body):
+    async with client.stream("POST", path, json=body) as response:
+        response.raise_for_status()
+        lines = [line async for line in response.aiter_lines() if line.strip()]
+    return len(lines)
+
+
+async def main(args):
+    os.environ["GROQ_BASE_URL"] = f"http://127.0.0.1:{args.port}"
+    os.environ.setdefault("GROQ_API_KEY", "mock-key")
+    import main as app_module
+    from metrics import BATCH_GENERATION_ENTRIES, MODEL_ROUTING
+
+    transport = httpx.ASGITransport(app=app_module.app)
+    print(f"{'task':<18}{'titles':>7}{'mode':>8}{'seconds':>9}{'calls':>7}  batch entries")
+    async with httpx.AsyncClient(transport=transport, base_url="http://app", timeout=600) as client:
+        for run_id, count in enumerate(args.titles):
+            titles = [f"{TITLES[i % len(TITLES)]} {run_id}-{i}" for i in range(count)]
+            cases = [
+                ("skills", "/generate/skills", [{"job_title": title} for title in titles],
+                 "/generate/skills/batch", {"job_titles": titles}),
+                ("responsibilities", "/generate/job-responsibilities",
+                 [{"job_title": title, "company_industry": "Retail"} for title in titles],
+                 "/generate/job-responsibilities/batch",
+                 {"jobs": [{"job_title": title, "company_industry": "Healthcare"} for title in titles]}),
+            ]
+            for task, single_path, single_bodies, batch_path, batch_body in cases:
+                before = sum(MODEL_ROUTING._values.values())
+                start = time.perf_counter()
+                await run_singles(client, single_path, single_bodies, args.concurrency)
+                elapsed = time.perf_counter() - start
+                calls = int(sum(MODEL_ROUTING._values.values()) - before)
+                print(f"{task:<18}{count:>7}{'single':>8}{elapsed:>9.2f}{calls:>7}")
+
+                before = sum(MODEL_ROUTING._values.values())
+                entries_before = dict(BATCH_GENERATION_ENTRIES._values)
+                start = time.perf_counter()
+                lines = await run_batch(client, batch_path, batch_body)
+                elapsed = time.perf_counter() - start
+                calls = int(sum(MODEL_ROUTING._values.values()) - before)
+                outcomes = collections.Counter()
+                for (_, outcome), value in BATCH_GENERATION_ENTRIES._values.items():
+                    outcomes[outcome] += int(value - entries_before.get((_, outcome), 0))
+                assert lines == count, f"{lines} of {count} results streamed"
+                print(f"{task:<18}{count:>7}{'batch':>8}{elapsed:>9.2f}{calls:>7}  "
+                      + " ".join(f"{outcome}={n}" for outcome, n in sorted(outcomes.items()) if n))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--titles", type=int, nargs="+", default=[20, 100, 200])
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--latency", type=float, default=0.3, help="Time to first token of every call")
+    parser.add_argument("--output-token-delay", type=float, default=0.002)
+    parser.add_argument("--small-empty-rate", type=float, default=0.02)
+    parser.add_argument("--port", type=int, default=8792)
+    args = parser.parse_args()
+    server = start_mock_server(
+        args.port, args.latency, "--output-token-delay", str(args.output_token_delay),
+        "--model-empty-rate", f"llama-3.1-8b-instant={args.small_empty_rate}",
+    )
+    try:
+        asyncio.run(main(args))
+    finally:
+        server.terminate()
+        server.wait()
@@ -0,0 +1,81 @@
+"""
+Concurrent throughput benchmark for the /generate endpoints.
+
+Starts the mock LLM server in a subprocess, then drives the app in-process
+with N in-flight requests and reports requests per second for each level.
+With a non-blocking LLM path, throughput should grow with concurrency
+instead of staying flat at 1 / latency.
+
+Run with:
+    python benchmarks/bench_llm_concurrency.py --latency 0.5 --levels 1 4 16 64
+"""
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import time
+import httpx
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+def start_server(script: str, port: int, *args: str, timeout: float = 5) -> subprocess.Popen:
+    """Start an LLM mock (a script in benchmarks/) on `port` and wait until it answers."""
+    proc = subprocess.Popen([sys.executable, os.path.join(ROOT, "benchmarks", script), "--port", str(port), *args])
+    deadline = time.time() + 10
+    while time.time() < deadline:
+        try:
+            httpx.post(f"http://127.0.0.1:{port}/openai/v1/chat/completions", json={}, timeout=timeout)
+            return proc
+        except httpx.TransportError:
+            time.sleep(0.1)
+    proc.kill()
+    raise RuntimeError(f"{script} did not start")
+
+
+def start_mock_server(port: int, latency: float, *extra_args: str) -> subprocess.Popen:
+    return start_server("mock_llm_server.py", port, "--latency", str(latency), *extra_args, timeout=latency + 5)
+
+
+async def run_level(app, concurrency: int, requests_per_worker: int) -> float:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://app", timeout=120) as client:
+        async def worker():
+            for _ in range(requests_per_worker):
+                response = await client.post("/generate/skills", json={"job_title": "Data Analyst"})
+                response.raise_for_status()
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+    return concurrency * requests_per_worker / elapsed
+
+
+async def main(args):
+    os.environ["GROQ_BASE_URL"] = f"http://127.0.0.1:{args.port}"
+    os.environ.setdefault("GROQ_API_KEY", "mock-key")
+    import main as app_module
+
+    print(f"mock latency: {args.latency:.2f}s")
+    print(f"{'in-flight':>10} {'req/s':>10} {'ideal':>10}")
+    for level in args.levels:
+        rps = await run_level(app_module.app, level, args.requests)
+        print(f"{level:>10} {rps:>10.2f} {level / args.latency:>10.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="LLM concurrency benchmark")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.5)
+    parser.add_argument("--requests", type=int, default=3, help="Requests per in-flight slot")
+    parser.add_argument("--levels", type=int, nargs="+", default=[1, 4, 16, 64])
+    args = parser.parse_args()
+
+    server = start_mock_server(args.port, args.latency)
+    try:
+        asyncio.run(main(args))
+    finally:
+        server.terminate()
+        server.wait()
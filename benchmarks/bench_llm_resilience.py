@@ -0,0 +1,109 @@
+"""
+Resilience benchmark for the LLM gateway.
+
+Starts the mock LLM server with injected faults (500s, 429s and a slow tail), sends
+/generate/cv_summary requests to the app in-process and reports, for each gateway
+setting, the share of successful requests, the status codes and p50/p99 latency:
+
+    no-retry  one attempt per call (the behaviour without the gateway)
+    gateway   retries with jittered backoff, rate-limit pauses and the circuit breaker
+    hedged    the same, plus a duplicate call once a call is slower than the recent p95
+
+With --error-rate 1 the provider is down: the circuit breaker opens and the remaining
+requests fail fast with a 503 instead of waiting for their own retries.
+
+Run with:
+    python benchmarks/bench_llm_resilience.py --requests 400 --error-rate 0.1 --rate-limit-rate 0.02 --slow-rate 0.05
+"""
+import argparse
+import asyncio
+import collections
+import os
+import sys
+import time
+import httpx
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(ROOT))
+
+from bench_llm_concurrency import start_mock_server
+from bench_pdf_latency import percentile
+
+SUMMARY_REQUEST = {
+    "professional_background": "Data analyst with 5 years of experience in retail analytics",
+    "quantifiable_achievements": "Cut reporting time by 40%",
+    "skills_and_certifications": "SQL, Python, Tableau",
+    "education": "B.S. in Statistics",
+    "target_role_company": "Senior Data Analyst at Acme",
+    "career_goals": "Lead an analytics team",
+    "word_length": 60,
+}
+
+MODES = {
+    "no-retry": {"max_retries": 0, "breaker_failures": 1 << 30, "hedge": False},
+    "gateway": {"hedge": False},
+    "hedged": {"hedge": True},
+}
+
+
+async def run_mode(app, total, concurrency):
+    statuses = collections.Counter()
+    latencies = []
+    queue = asyncio.Queue()
+    for _ in range(total):
+        queue.put_nowait(None)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://app", timeout=300) as client:
+        async def worker():
+            while not queue.empty():
+                queue.get_nowait()
+                start = time.perf_counter()
+                response = await client.post("/generate/cv_summary", json=SUMMARY_REQUEST)
+                latencies.append(time.perf_counter() - start)
+                statuses[response.status_code] += 1
+
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return statuses, latencies
+
+
+async def main(args):
+    os.environ["GROQ_BASE_URL"] = f"http://127.0.0.1:{args.port}"
+    os.environ.setdefault("GROQ_API_KEY", "mock-key")
+    import main as app_module
+    from llm_gateway import configure_gateway
+
+    print(f"{'mode':<10}{'success':>9}{'p50':>8}{'p99':>8}  statuses")
+    for mode, settings in MODES.items():
+        configure_gateway(base_delay=args.base_delay, breaker_reset=args.breaker_reset, **settings)
+        statuses, latencies = await run_mode(app_module.app, args.requests, args.concurrency)
+        success = statuses[200] / args.requests
+        print(f"{mode:<10}{success:>9.1%}{percentile(latencies, 50):>8.2f}{percentile(latencies, 99):>8.2f}  "
+              + " ".join(f"{status}:{count}" for status, count in sorted(statuses.items())))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--latency", type=float, default=0.1)
+    parser.add_argument("--error-rate", type=float, default=0.1)
+    parser.add_argument("--rate-limit-rate", type=float, default=0.02)
+    parser.add_argument("--rate-limit-retry-after", type=float, default=0.2)
+    parser.add_argument("--slow-rate", type=float, default=0.05)
+    parser.add_argument("--slow-latency", type=float, default=2.0)
+    parser.add_argument("--base-delay", type=float, default=0.05)
+    parser.add_argument("--breaker-reset", type=float, default=2.0)
+    parser.add_argument("--port", type=int, default=8797)
+    args = parser.parse_args()
+    server = start_mock_server(
+        args.port, args.latency,
+        "--error-rate", str(args.error_rate),
+        "--rate-limit-rate", str(args.rate_limit_rate),
+        "--rate-limit-retry-after", str(args.rate_limit_retry_after),
+        "--slow-rate", str(args.slow_rate),
+        "--slow-latency", str(args.slow_latency),
+    )
+    try:
+        asyncio.run(main(args))
+    finally:
+        server.terminate()
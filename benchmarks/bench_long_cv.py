@@ -0,0 +1,83 @@
+"""
+Latency benchmark for parsing long CVs.
+
+Parses generated CVs of growing page counts (with a publication list, like academic CVs)
+through main.parse_cv_pdf against the mock LLM server, once in a single completion and once
+in long-document mode (section-aware chunks parsed concurrently), and reports latency and
+whether the parse succeeded. The mock server takes --output-token-delay seconds per output
+token and cuts completions off at max_tokens, so single-pass latency grows with the CV and
+long CVs fail, while chunked latency is bounded by the slowest chunk.
+
+Run with:
+    python benchmarks/bench_long_cv.py --pages 2 8 16 32 --output-token-delay 0.002
+"""
+import argparse
+import asyncio
+import hashlib
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(ROOT))
+
+from bench_llm_concurrency import start_mock_server
+from pdf_fixtures import cv_lines, make_pdf
+
+
+async def parse_once(app_module, pdf_bytes, threshold):
+    """Parse one CV and return the latency and the outcome, including any truncation retries or repairs."""
+    from fastapi import HTTPException
+    from metrics import CV_PARSE_REPAIRS
+    from pdf_ingestion import PDFUpload
+
+    # Single pass is forced by raising the long-document threshold out of reach
+    app_module.LONG_CV_THRESHOLD_TOKENS = threshold
+    upload = PDFUpload(hashlib.sha256(pdf_bytes).digest(), len(pdf_bytes), data=pdf_bytes)
+    repairs_before = dict(CV_PARSE_REPAIRS._values)
+    start = time.perf_counter()
+    try:
+        await app_module.parse_cv_pdf(upload)
+        outcome = "ok"
+    except HTTPException as e:
+        outcome = f"HTTP {e.status_code}"
+    elapsed = time.perf_counter() - start
+    repairs = [
+        f"{key[0]}={int(value - repairs_before.get(key, 0))}"
+        for key, value in sorted(CV_PARSE_REPAIRS._values.items())
+        if value > repairs_before.get(key, 0)
+    ]
+    return elapsed, " ".join([outcome, *repairs])
+
+
+async def main(args):
+    os.environ["GROQ_BASE_URL"] = f"http://127.0.0.1:{args.port}"
+    os.environ.setdefault("GROQ_API_KEY", "mock-key")
+    os.environ.setdefault("PDF_WORKERS", "0")
+    import main as app_module
+    from prompts import estimate_tokens
+
+    chunked_threshold = app_module.LONG_CV_THRESHOLD_TOKENS
+    print(f"{'pages':>6}{'tokens':>8}{'mode':>10}{'seconds':>10}  result")
+    for seed, pages in enumerate(args.pages):
+        lines = cv_lines(pages, seed=seed, publications=pages * 6)
+        tokens = estimate_tokens("\n".join(line for page in lines for line in page))
+        for mode, threshold in (("single", 1 << 30), ("chunked", chunked_threshold)):
+            # Separate PDFs per mode, so neither run is served from the CV cache
+            pdf_bytes = make_pdf(lines, padding=len(mode))
+            elapsed, outcome = await parse_once(app_module, pdf_bytes, threshold)
+            print(f"{pages:>6}{tokens:>8}{mode:>10}{elapsed:>10.2f}  {outcome}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, nargs="+", default=[2, 8, 16, 32])
+    parser.add_argument("--latency", type=float, default=0.2)
+    parser.add_argument("--output-token-delay", type=float, default=0.002)
+    parser.add_argument("--port", type=int, default=8798)
+    args = parser.parse_args()
+    server = start_mock_server(args.port, args.latency, "--output-token-delay", str(args.output_token_delay))
+    try:
+        asyncio.run(main(args))
+    finally:
+        server.terminate()
@@ -0,0 +1,93 @@
+"""
+Latency benchmark for model routing.
+
+Starts the mock LLM server with a fast small model that sometimes returns empty output
+and a slower large model, then sends /generate/skills and /generate/job-responsibilities
+requests (unique job titles, so the generation cache is not hit) with both tasks routed
+to the large model only and then to small>large, and reports p50/p99 latency and how
+many calls each model served, including escalations.
+
+Run with:
+    python benchmarks/bench_model_routing.py --requests 300 --small-latency 0.1 --large-latency 0.5 --small-empty-rate 0.05
+"""
+import argparse
+import asyncio
+import collections
+import os
+import sys
+import time
+import httpx
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(ROOT))
+
+from bench_llm_concurrency import start_mock_server
+from bench_pdf_latency import percentile
+
+TASKS = ("skills", "job_responsibilities")
+
+
+async def run_route(app, total, concurrency, run_id):
+    latencies = []
+    queue = asyncio.Queue()
+    for i in range(total):
+        queue.put_nowait(i)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://app", timeout=120) as client:
+        async def worker():
+            while not queue.empty():
+                i = queue.get_nowait()
+                title = f"Engineer {run_id}-{i}"
+                start = time.perf_counter()
+                if i % 2:
+                    response = await client.post("/generate/skills", json={"job_title": title})
+                else:
+                    response = await client.post("/generate/job-responsibilities",
+                                                 json={"job_title": title, "company_industry": "Retail"})
+                response.raise_for_status()
+                latencies.append(time.perf_counter() - start)
+
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latencies
+
+
+async def main(args):
+    os.environ["GROQ_BASE_URL"] = f"http://127.0.0.1:{args.port}"
+    os.environ.setdefault("GROQ_API_KEY", "mock-key")
+    import main as app_module
+    from metrics import MODEL_ROUTING
+    from model_routing import set_route
+
+    print(f"{'route':<14}{'p50':>8}{'p99':>8}  calls by model and outcome")
+    for run_id, spec in enumerate(("large", "small>large")):
+        for task in TASKS:
+            set_route(task, spec)
+        before = dict(MODEL_ROUTING._values)
+        latencies = await run_route(app_module.app, args.requests, args.concurrency, run_id)
+        calls = collections.Counter()
+        for (task, model, outcome), value in MODEL_ROUTING._values.items():
+            calls[f"{model}:{outcome}"] += int(value - before.get((task, model, outcome), 0))
+        print(f"{spec:<14}{percentile(latencies, 50):>8.2f}{percentile(latencies, 99):>8.2f}  "
+              + " ".join(f"{key}={count}" for key, count in sorted(calls.items()) if count))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=300)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--small-latency", type=float, default=0.1)
+    parser.add_argument("--large-latency", type=float, default=0.5)
+    parser.add_argument("--small-empty-rate", type=float, default=0.05)
+    parser.add_argument("--port", type=int, default=8796)
+    args = parser.parse_args()
+    from model_routing import MODEL_TIERS
+    server = start_mock_server(
+        args.port, args.large_latency,
+        "--model-latency", f"{MODEL_TIERS['small']}={args.small_latency}",
+        "--model-latency", f"{MODEL_TIERS['large']}={args.large_latency}",
+        "--model-empty-rate", f"{MODEL_TIERS['small']}={args.small_empty_rate}",
+    )
+    try:
+        asyncio.run(main(args))
+    finally:
+        server.terminate()
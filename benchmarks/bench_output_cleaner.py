@@ -0,0 +1,162 @@
+"""
+Throughput micro-benchmark for output_cleaner.
+
+Cleans generated-looking text (sentences and comma-separated skills with markdown, stray
+symbols and uneven whitespace) and parsed CV JSON, and reports throughput in MB/s of raw
+input for each form:
+
+    summary, responsibilities, skills   clean_output on one completion at a time
+    stream:<type>                       IncrementalCleaner fed a completion in small deltas
+    batch:<type>                        clean_batch over the entries of a batch generation
+    cv_json                             clean_cv_json on parsed CV JSON, in place
+
+Each case takes the best of --repeat runs. A case slower than its floor in MB/s
+(--min-mbps, default DEFAULT_FLOORS) is reported as a regression and the script exits
+with status 1. The same cases and floors run as pytest-benchmark tests in
+tests/test_output_cleaner_benchmark.py.
+
+Run with:
+    python benchmarks/bench_output_cleaner.py
+    python benchmarks/bench_output_cleaner.py --min-mbps skills=8 --min-mbps cv_json=15
+"""
+import argparse
+import copy
+import json
+import os
+import random
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(ROOT))
+
+from output_cleaner import IncrementalCleaner, clean_batch, clean_cv_json, clean_output
+
+# Throughput floors in MB/s, about a third of what the cleaner does on one laptop core.
+# Streams emit a unit per sentence or skill, so their per-call overhead weighs more.
+DEFAULT_FLOORS = {
+    "summary": 10.0,
+    "responsibilities": 10.0,
+    "skills": 4.0,
+    "stream:summary": 2.0,
+    "stream:skills": 0.7,
+    "batch:skills": 4.0,
+    "batch:responsibilities": 10.0,
+    "cv_json": 8.0,
+}
+
+WORDS = ["managed", "the", "data", "pipeline", "**Python**", "SQL", "team", "of", "5", "engineers", "#KPIs",
+         "reduced", "costs", "by", "20%", "<b>AWS</b>", "and", "Kubernetes", "stakeholders'", "C++/Go", "-"]
+SKILLS = ["Python", "SQL", "**Docker**", "Kubernetes (K8s)", "CI/CD", "scrum master", "data-modeling", "#AWS"]
+
+
+def make_completion(rng, sentences):
+    parts = []
+    for _ in range(sentences):
+        words = [rng.choice(WORDS) for _ in range(rng.randint(6, 18))]
+        parts.append(" ".join(words).capitalize() + rng.choice([". ", ".\n", ".  ", "."]))
+    return "".join(parts)
+
+
+def make_skills(rng, count):
+    return rng.choice([", ", ",", ",\n"]).join(rng.choice(SKILLS) for _ in range(count)) + rng.choice(["", ".", "\n"])
+
+
+def make_cv(rng):
+    return {
+        "personal_info": {"full_name": " Jane   Doe ", "email": ["jane@example.com"], "city": "Springfield"},
+        "work_experience": [{
+            "job_title": "Senior  *Engineer*",
+            "company": "Acme <Corp>",
+            "responsibilities": [make_completion(rng, 1) for _ in range(6)],
+        } for _ in range(8)],
+        "skills": {"technical": [make_skills(rng, 1) for _ in range(20)], "professional": ["Leadership", " Mentoring "]},
+        "projects": [{"name": "ETL  platform", "description": make_completion(rng, 3)} for _ in range(5)],
+        "education": [{"degree": "B.Sc.", "result": ["GPA 3.8/4.0"]}],
+    }
+
+
+def stream(output_type, deltas_list):
+    for deltas in deltas_list:
+        cleaner = IncrementalCleaner(output_type)
+        for delta in deltas:
+            cleaner.feed(delta)
+        cleaner.finish()
+
+
+def clean_cvs(cvs):
+    for cv in cvs:
+        clean_cv_json(cv)
+
+
+def split_deltas(rng, text):
+    deltas, i = [], 0
+    while i < len(text):
+        step = rng.randint(2, 12)
+        deltas.append(text[i:i + step])
+        i += step
+    return deltas
+
+
+def make_cases(rng, items):
+    """
+    Benchmark cases by name, as (function, setup, size): `setup()` returns the input of one
+    run of `function`, and `size` is the raw size of that input in bytes.
+    """
+    completions = [make_completion(rng, rng.randint(3, 6)) for _ in range(items)]
+    skills = [make_skills(rng, rng.randint(5, 10)) for _ in range(items)]
+    cvs = [make_cv(rng) for _ in range(max(1, items // 50))]
+    completion_deltas = [split_deltas(rng, x) for x in completions]
+    skill_deltas = [split_deltas(rng, x) for x in skills]
+
+    def size(texts):
+        return sum(len(text.encode()) for text in texts)
+
+    return {
+        "summary": (lambda xs: [clean_output(x, "summary") for x in xs], lambda: completions, size(completions)),
+        "responsibilities": (lambda xs: [clean_output(x, "responsibilities") for x in xs], lambda: completions, size(completions)),
+        "skills": (lambda xs: [clean_output(x, "skills") for x in xs], lambda: skills, size(skills)),
+        "stream:summary": (lambda xs: stream("summary", xs), lambda: completion_deltas, size(completions)),
+        "stream:skills": (lambda xs: stream("skills", xs), lambda: skill_deltas, size(skills)),
+        "batch:skills": (lambda xs: clean_batch(xs, "skills"), lambda: skills, size(skills)),
+        "batch:responsibilities": (lambda xs: clean_batch(xs, "responsibilities"), lambda: completions, size(completions)),
+        # clean_cv_json works in place, so each run cleans fresh copies; copying is not timed
+        "cv_json": (clean_cvs, lambda: copy.deepcopy(cvs), sum(len(json.dumps(cv).encode()) for cv in cvs)),
+    }
+
+
+def throughput(fn, setup, size, repeat):
+    """Best throughput in MB/s of `fn` over `repeat` runs on inputs from `setup`, whose raw size is `size` bytes."""
+    best = float("inf")
+    for _ in range(repeat):
+        inputs = setup()
+        start = time.perf_counter()
+        fn(inputs)
+        best = min(best, time.perf_counter() - start)
+    return size / best / 2 ** 20
+
+
+def main(args):
+    cases = make_cases(random.Random(args.seed), args.items)
+    floors = {**DEFAULT_FLOORS, **dict((key, float(value)) for key, value in (item.split("=", 1) for item in args.min_mbps))}
+
+    regressions = []
+    print(f"{'case':<24}{'MB/s':>9}{'floor':>8}")
+    for name, (fn, setup, nbytes) in cases.items():
+        mbps = throughput(fn, setup, nbytes, args.repeat)
+        floor = floors.get(name, 0.0)
+        print(f"{name:<24}{mbps:>9.1f}{floor:>8.1f}")
+        if mbps < floor:
+            regressions.append(f"{name}: {mbps:.1f} MB/s is below the floor of {floor:.1f} MB/s")
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--items", type=int, default=2000, help="Completions (and skill lists) per case")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--min-mbps", action="append", default=[], metavar="CASE=MBPS", help="Override a floor")
+    sys.exit(main(parser.parse_args()))
@@ -0,0 +1,145 @@
+"""
+Memory and throughput benchmark for PDF upload ingestion.
+
+Starts a minimal uvicorn server that ingests PDF uploads either the old way (read the whole
+upload, write it to a NamedTemporaryFile, open it from disk) or with
+pdf_ingestion.read_pdf_upload (chunked read and hash, opened from memory), posts concurrent
+multipart uploads to it, and reports throughput, the server's peak RSS growth and the bytes
+it wrote to disk. Peak RSS and disk writes are read from /proc, so this needs Linux.
+
+Run with:
+    python benchmarks/bench_pdf_ingestion.py --uploads 50 --size-mb 5
+"""
+import argparse
+import asyncio
+import hashlib
+import os
+import subprocess
+import sys
+import time
+import httpx
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(ROOT))
+
+
+def make_app(mode: str):
+    from tempfile import NamedTemporaryFile
+    from fastapi import FastAPI, File, UploadFile
+    from starlette.formparsers import MultiPartParser
+    from pdf_extraction import _open
+    from pdf_ingestion import read_pdf_upload, PDF_SPILL_THRESHOLD
+
+    def page_count(source) -> int:
+        with _open(source) as pdf:
+            return len(pdf.pages)
+
+    app = FastAPI()
+
+    if mode == "legacy":
+        @app.post("/upload")
+        async def legacy(file: UploadFile = File(...)):
+            pdf_bytes = await file.read()
+            digest = hashlib.sha256(pdf_bytes).hexdigest()
+            with NamedTemporaryFile(delete=False, suffix=".pdf") as temp_file:
+                temp_file.write(pdf_bytes)
+                temp_file_path = temp_file.name
+            try:
+                pages = await asyncio.to_thread(page_count, temp_file_path)
+            finally:
+                os.unlink(temp_file_path)
+            return {"sha256": digest, "pages": pages}
+    else:
+        # Same setting main.py applies: keep uploads below the spill threshold in memory
+        MultiPartParser.spool_max_size = PDF_SPILL_THRESHOLD
+
+        @app.post("/upload")
+        async def streamed(file: UploadFile = File(...)):
+            with await read_pdf_upload(file, max_bytes=1 << 40) as upload:
+                pages = await asyncio.to_thread(page_count, upload.source)
+                return {"sha256": upload.digest.hex(), "pages": pages}
+
+    return app
+
+
+def proc_stat(pid: int, name: str) -> int:
+    """Read a field from /proc/<pid>/status (kB values are returned in bytes) or /proc/<pid>/io."""
+    path, scale = (f"/proc/{pid}/io", 1) if name == "write_bytes" else (f"/proc/{pid}/status", 1024)
+    with open(path) as stats:
+        for line in stats:
+            if line.startswith(name + ":"):
+                return int(line.split()[1]) * scale
+    return 0
+
+
+def start_server(mode: str, port: int) -> subprocess.Popen:
+    process = subprocess.Popen(
+        [sys.executable, os.path.abspath(__file__), "--serve", mode, "--port", str(port)],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    for _ in range(100):
+        try:
+            httpx.get(f"http://127.0.0.1:{port}/docs", timeout=0.5)
+            return process
+        except httpx.HTTPError:
+            time.sleep(0.1)
+    process.terminate()
+    raise RuntimeError(f"{mode} server did not start")
+
+
+async def post_all(port, pdf_bytes, uploads, concurrency):
+    semaphore = asyncio.Semaphore(concurrency)
+    limits = httpx.Limits(max_connections=concurrency)
+    async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", timeout=300, limits=limits) as client:
+        async def one():
+            async with semaphore:
+                response = await client.post("/upload", files={"file": ("cv.pdf", pdf_bytes, "application/pdf")})
+                response.raise_for_status()
+
+        await asyncio.gather(*(one() for _ in range(uploads)))
+
+
+def run_mode(mode, port, pdf_bytes, uploads, concurrency):
+    process = start_server(mode, port)
+    try:
+        rss_before = proc_stat(process.pid, "VmRSS")
+        written_before = proc_stat(process.pid, "write_bytes")
+        start = time.perf_counter()
+        asyncio.run(post_all(port, pdf_bytes, uploads, concurrency))
+        elapsed = time.perf_counter() - start
+        peak_growth = proc_stat(process.pid, "VmHWM") - rss_before
+        written = proc_stat(process.pid, "write_bytes") - written_before
+    finally:
+        process.terminate()
+        process.wait()
+    return elapsed, peak_growth, written
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--uploads", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--size-mb", type=float, default=5.0)
+    parser.add_argument("--port", type=int, default=8790)
+    parser.add_argument("--serve", choices=["legacy", "streamed"], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        import uvicorn
+        uvicorn.run(make_app(args.serve), host="127.0.0.1", port=args.port, log_level="warning")
+        return
+
+    from pdf_fixtures import make_cv_pdf
+    pdf_bytes = make_cv_pdf(2, size=int(args.size_mb * 1024 * 1024))
+    total_mb = args.uploads * len(pdf_bytes) / 1024 / 1024
+    print(f"{args.uploads} uploads of {len(pdf_bytes) / 1024 / 1024:.1f} MB, concurrency {args.concurrency}")
+    print(f"{'mode':<10}{'seconds':>10}{'MB/s':>10}{'peak RSS +MB':>14}{'disk MB':>10}")
+    for mode in ("legacy", "streamed"):
+        elapsed, peak_growth, written = run_mode(mode, args.port, pdf_bytes, args.uploads, args.concurrency)
+        print(f"{mode:<10}{elapsed:>10.2f}{total_mb / elapsed:>10.1f}"
+              f"{peak_growth / 1024 / 1024:>14.1f}{written / 1024 / 1024:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Latency benchmark for mixed text and PDF traffic.
+
+Sends a mix of /generate/skills and /generate/cv_structure requests to the app
+(against the mock LLM server) once with PDF extraction inline on the event loop
+and once with the process pool, and reports p50/p99 latency per request type.
+
+Run with:
+    python benchmarks/bench_pdf_latency.py --requests 200 --concurrency 16 --pages 8
+"""
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import sys
+import time
+import httpx
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(ROOT))
+
+from bench_llm_concurrency import start_mock_server
+from pdf_fixtures import make_cv_pdf
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+async def run_mix(app, pdf_bytes, total, concurrency, pdf_ratio, seed):
+    rng = random.Random(seed)
+    kinds = ["pdf" if rng.random() < pdf_ratio else "text" for _ in range(total)]
+    latencies = {"text": [], "pdf": []}
+    queue = asyncio.Queue()
+    for kind in kinds:
+        queue.put_nowait(kind)
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://app", timeout=300) as client:
+        async def worker():
+            while not queue.empty():
+                kind = queue.get_nowait()
+                start = time.perf_counter()
+                if kind == "pdf":
+                    response = await client.post(
+                        "/generate/cv_structure",
+                        files={"file": ("cv.pdf", pdf_bytes, "application/pdf")},
+                    )
+                else:
+                    response = await client.post("/generate/skills", json={"job_title": "Data Analyst"})
+                response.raise_for_status()
+                latencies[kind].append(time.perf_counter() - start)
+
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latencies
+
+
+async def main(args):
+    os.environ["GROQ_BASE_URL"] = f"http://127.0.0.1:{args.port}"
+    os.environ.setdefault("GROQ_API_KEY", "mock-key")
+    import main as app_module
+    import pdf_extraction
+
+    pdf_bytes = make_cv_pdf(args.pages)
+    modes = [("inline", 0), ("pool", args.workers)]
+    print(f"{'mode':>8} {'type':>6} {'count':>6} {'p50 ms':>10} {'p99 ms':>10}")
+    for name, workers in modes:
+        pdf_extraction.configure_extractor(workers=workers, queue_size=args.requests)
+        if workers:
+            # Warm up the worker processes so spawn time is not measured
+            await pdf_extraction.extract_pdf_text(pdf_bytes)
+        latencies = await run_mix(app_module.app, pdf_bytes, args.requests, args.concurrency, args.pdf_ratio, args.seed)
+        for kind in ("text", "pdf"):
+            values = latencies[kind]
+            if values:
+                print(f"{name:>8} {kind:>6} {len(values):>6} "
+                      f"{statistics.median(values) * 1000:>10.1f} {percentile(values, 99) * 1000:>10.1f}")
+    pdf_extraction.shutdown_extractor()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Mixed text/PDF latency benchmark")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.3)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--pdf-ratio", type=float, default=0.3)
+    parser.add_argument("--pages", type=int, default=8)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    server = start_mock_server(args.port, args.latency)
+    try:
+        asyncio.run(main(args))
+    finally:
+        server.terminate()
+        server.wait()
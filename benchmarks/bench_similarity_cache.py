@@ -0,0 +1,153 @@
+"""
+Hit rate and lookup latency benchmark for the approximate-match cache (similarity_cache.py).
+
+Draws --requests job titles from --roles distinct roles (each with and without a seniority
+word), written the way people type them: abbreviated ("Sr.", "Mgr", "SWE"), in other cases,
+with hyphens or extra spaces. Reports the hit rate of exact cache keys (normalize_key)
+against that of TitleIndex, how many lookups were merged with a different role, and the
+p50/p99 lookup latency. The same is done for job descriptions: the postings of each role
+with and without varying company boilerplate, through DescriptionIndex.
+
+--filler fills the title index with that many unrelated titles first, to show how lookup
+latency grows with the index.
+
+Run with:
+    python benchmarks/bench_similarity_cache.py --requests 5000 --roles 200
+    python benchmarks/bench_similarity_cache.py --filler 0 1000 4000
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(ROOT))
+
+from generation_cache import normalize_key
+from similarity_cache import DescriptionIndex, TitleIndex
+
+FIELDS = ["Software", "Data", "Backend", "Frontend", "Cloud", "Security", "Marketing", "Sales", "Finance",
+          "Product", "Network", "Mobile", "Game", "Embedded", "Clinical", "Supply Chain", "Quality", "Research",
+          "Payroll", "Content", "Legal", "Retail", "Machine Learning", "Human Resources", "Field Service"]
+ROLES = ["Engineer", "Manager", "Analyst", "Developer", "Designer", "Specialist", "Consultant", "Administrator",
+         "Coordinator", "Architect"]
+LEVELS = ["", "Senior", "Junior", "Lead"]
+# How people shorten title words, applied at random
+SHORT_FORMS = {"Senior": ["Sr.", "Sr", "Snr"], "Junior": ["Jr.", "Jr"], "Engineer": ["Eng", "Engr"],
+               "Manager": ["Mgr"], "Developer": ["Dev"], "Administrator": ["Admin"], "Software Engineer": ["SWE"],
+               "Machine Learning": ["ML"], "Human Resources": ["HR"], "Frontend": ["Front-end", "Front End"],
+               "Backend": ["Back-end", "Back End"], "Quality": ["QA"]}
+BOILERPLATE = [
+    "{company} is an equal opportunity employer.",
+    "About us: {company} is a fast growing company with offices in three countries.",
+    "We offer a competitive salary, health insurance and flexible remote work.",
+    "Apply before the end of the month.",
+]
+COMPANIES = ["Acme", "Globex", "Initech", "Umbrella", "Hooli", "Stark Industries"]
+TOOLS = ["Python", "SQL", "Excel", "Kubernetes", "Salesforce", "Tableau", "AWS", "Figma", "SAP", "Jira", "React",
+         "Go", "Terraform", "HubSpot", "Power BI", "Java", "Linux", "Spark"]
+DUTIES = ["design", "build", "maintain", "report on", "own", "improve", "plan", "review", "support", "automate"]
+OBJECTS = ["internal tools", "customer workflows", "data pipelines", "quarterly forecasts", "release processes",
+           "vendor contracts", "dashboards", "service integrations", "training material", "audit evidence"]
+
+
+def make_roles(rng, count):
+    roles = [f"{field} {role}" for field in FIELDS for role in ROLES]
+    rng.shuffle(roles)
+    return [f"{level} {role}".strip() for role in roles[:max(1, count // len(LEVELS))] for level in LEVELS][:count]
+
+
+def spell(rng, title):
+    """A way of writing the title that an exact cache key would not recognise."""
+    for long_form, short_forms in SHORT_FORMS.items():
+        if long_form in title and rng.random() < 0.5:
+            title = title.replace(long_form, rng.choice(short_forms))
+    title = rng.choice([title, title.lower(), title.upper(), title.title()])
+    return rng.choice([title, f" {title} ", title.replace(" ", "  "), title + rng.choice(["", ",", "."])])
+
+
+def make_posting(rng, role):
+    rng = random.Random(role)
+    sentences = [f"We are hiring a {role} to {rng.choice(DUTIES)} our {rng.choice(OBJECTS)}."]
+    for _ in range(8):
+        tools = ", ".join(rng.sample(TOOLS, 3))
+        sentences.append(f"You will {rng.choice(DUTIES)} {rng.choice(OBJECTS)} using {tools} "
+                         f"and {rng.choice(DUTIES)} {rng.choice(OBJECTS)} with the team.")
+    sentences.append(f"Requirements: {rng.randint(2, 8)}+ years of experience with {', '.join(rng.sample(TOOLS, 4))}.")
+    return " ".join(sentences)
+
+
+def add_boilerplate(rng, posting):
+    company = rng.choice(COMPANIES)
+    parts = [text.format(company=company) for text in rng.sample(BOILERPLATE, rng.randint(0, 2))]
+    split = rng.randint(0, len(parts))
+    return " ".join(parts[:split] + [posting] + parts[split:])
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+def report(name, exact_hits, hits, wrong, latencies, requests):
+    print(f"{name:<14}{100 * exact_hits / requests:>11.1f}%{100 * hits / requests:>11.1f}%{wrong:>7}"
+          f"{1000 * statistics.median(latencies):>10.3f}{1000 * percentile(latencies, 0.99):>10.3f}")
+
+
+def main(args):
+    rng = random.Random(args.seed)
+    roles = make_roles(rng, args.roles)
+    # A few roles are asked for far more often than the rest
+    weights = [1 / (rank + 1) for rank in range(len(roles))]
+    print(f"{'index':<14}{'exact hits':>12}{'index hits':>12}{'wrong':>7}{'p50 ms':>10}{'p99 ms':>10}")
+
+    for filler in args.filler:
+        index = TitleIndex(capacity=max(filler + len(roles), 1))
+        for i in range(filler):
+            index.canonical_key(f"Filler Role {i} {rng.choice(ROLES)}", f"filler-{i}", scope="skills")
+        exact_keys, key_roles = set(), {}
+        exact_hits = hits = wrong = 0
+        latencies = []
+        for _ in range(args.requests):
+            role = rng.choices(roles, weights)[0]
+            title = spell(rng, role)
+            exact_key = normalize_key("skills", title)
+            exact_hits += exact_key in exact_keys
+            exact_keys.add(exact_key)
+            start = time.perf_counter()
+            key = index.canonical_key(title, exact_key, scope="skills")
+            latencies.append(time.perf_counter() - start)
+            if key != exact_key or key in key_roles:
+                hits += 1
+                wrong += key_roles[key] != role
+            key_roles.setdefault(key, role)
+        report(f"titles+{filler}", exact_hits, hits, wrong, latencies, args.requests)
+
+    index = DescriptionIndex()
+    postings = {role: make_posting(rng, role) for role in roles}
+    seen = set()
+    exact_hits = wrong = 0
+    latencies = []
+    for _ in range(args.requests):
+        role = rng.choices(roles, weights)[0]
+        text = add_boilerplate(rng, postings[role])
+        exact_hits += text in seen
+        seen.add(text)
+        start = time.perf_counter()
+        # The cached value is the role of the posting it was computed for
+        value = index.get_or_compute(text, lambda _: role)
+        latencies.append(time.perf_counter() - start)
+        wrong += value != role
+    stats = index.stats()
+    report("descriptions", exact_hits, stats["exact"] + stats["similar"], wrong, latencies, args.requests)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--roles", type=int, default=200, help="Distinct roles, including seniority")
+    parser.add_argument("--filler", type=int, nargs="+", default=[0, 4000], help="Unrelated titles indexed first")
+    parser.add_argument("--seed", type=int, default=0)
+    sys.exit(main(parser.parse_args()))
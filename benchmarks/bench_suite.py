@@ -0,0 +1,259 @@
+"""
+Load-testing and latency benchmark suite for all five endpoints.
+
+Starts the recorded-response LLM simulator (llm_simulator.py), builds a corpus of synthetic
+CV PDFs of different page counts, and drives the app in-process. Each endpoint runs its own
+phase of --requests requests at --concurrency in-flight requests. A final "mixed" phase
+replays all endpoints interleaved. For each phase the suite reports:
+
+    req/s     throughput
+    p50..p99  request latency in seconds
+    lag       event-loop lag (p99 and max, in ms) while the phase runs
+    peak MB   peak Python heap of a separate, smaller pass under tracemalloc (PDF extraction
+              in the worker processes is not included)
+
+Inputs are generated from --seed, and each phase uses its own PDFs and job titles. Runs with
+the same settings therefore do the same work and hit the caches the same way. Save a run
+with --output and compare a later run (e.g. on another commit) with --compare; the suite
+exits with status 1 when p95 latency or throughput of any phase is more than --threshold worse.
+
+Run with:
+    python benchmarks/bench_suite.py --requests 100 --concurrency 16 --speed 4 --output baseline.json
+    python benchmarks/bench_suite.py --requests 100 --concurrency 16 --speed 4 --compare baseline.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+import tracemalloc
+import httpx
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(ROOT))
+
+from bench_llm_concurrency import start_server
+from bench_pdf_latency import percentile
+from pdf_fixtures import make_cv_pdf, TITLES
+
+ENDPOINTS = [
+    "/generate/cv_summary",
+    "/generate/job-responsibilities",
+    "/generate/skills",
+    "/generate/cv_structure",
+    "/generate/ats_score",
+]
+INDUSTRIES = ["Retail", "Healthcare", "Finance", "Logistics", "Education"]
+SENIORITY = ["Junior", "", "Senior", "Lead", "Principal"]
+JOB_DESCRIPTION = (
+    "We are looking for an engineer with Python, SQL and AWS experience who has built data pipelines, "
+    "mentored other developers and worked with Docker and Kubernetes in production."
+)
+
+
+class LoopLagMonitor:
+    """Samples how late the event loop wakes up a task that sleeps `interval` seconds."""
+
+    def __init__(self, interval: float = 0.01):
+        self.interval = interval
+        self.samples = []
+        self._task = None
+
+    async def _sample(self):
+        while True:
+            start = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            self.samples.append(max(0.0, time.perf_counter() - start - self.interval))
+
+    def __enter__(self):
+        self._task = asyncio.get_running_loop().create_task(self._sample())
+        return self
+
+    def __exit__(self, *exc_info):
+        self._task.cancel()
+
+
+class Workload:
+    """Deterministic requests for one phase: the i-th request is the same in every run."""
+
+    def __init__(self, endpoints, seed, pages, corpus_size, titles):
+        self.endpoints = endpoints
+        self.rng = random.Random(seed)
+        self.titles = [f"{level} {title} {seed}-{i}".strip() for i, (level, title) in enumerate(
+            (self.rng.choice(SENIORITY), self.rng.choice(TITLES)) for _ in range(titles))]
+        self.corpus = [make_cv_pdf(page_count, seed=seed + i) for page_count in pages for i in range(corpus_size)]
+        self.rng.shuffle(self.corpus)
+
+    def request(self, i):
+        endpoint = self.endpoints[i % len(self.endpoints)]
+        title = self.titles[i % len(self.titles)]
+        pdf = self.corpus[i % len(self.corpus)]
+        if endpoint == "/generate/cv_summary":
+            return endpoint, {"json": {
+                "professional_background": f"{title} with {2 + i % 10} years of experience",
+                "quantifiable_achievements": f"Cut costs by {5 + i % 40}%",
+                "skills_and_certifications": "Python, SQL, AWS",
+                "education": "B.S. in Computer Science",
+                "target_role_company": f"{title} at Acme",
+                "career_goals": "Lead a team",
+                "word_length": 60,
+            }}
+        if endpoint == "/generate/job-responsibilities":
+            return endpoint, {"json": {"job_title": title, "company_industry": INDUSTRIES[i % len(INDUSTRIES)]}}
+        if endpoint == "/generate/skills":
+            return endpoint, {"json": {"job_title": title}}
+        if endpoint == "/generate/cv_structure":
+            return endpoint, {"files": {"file": ("cv.pdf", pdf, "application/pdf")}}
+        return endpoint, {
+            "files": {"cv_file": ("cv.pdf", pdf, "application/pdf")},
+            "data": {"job_title": title, "job_description": JOB_DESCRIPTION},
+        }
+
+
+async def run_requests(app, workload, indexes, concurrency):
+    """Send the workload's requests with `concurrency` in flight; return (endpoint, latency, status) per request."""
+    results = []
+    queue = asyncio.Queue()
+    for i in indexes:
+        queue.put_nowait(i)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://app", timeout=600) as client:
+        async def worker():
+            while not queue.empty():
+                endpoint, kwargs = workload.request(queue.get_nowait())
+                start = time.perf_counter()
+                response = await client.post(endpoint, **kwargs)
+                results.append((endpoint, time.perf_counter() - start, response.status_code))
+
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return results
+
+
+async def run_phase(app, workload, memory_workload, args):
+    with LoopLagMonitor() as lag:
+        start = time.perf_counter()
+        results = await run_requests(app, workload, range(args.requests), args.concurrency)
+        elapsed = time.perf_counter() - start
+
+    # The memory pass has its own inputs, so it is not served from the caches the phase filled
+    tracemalloc.start()
+    await run_requests(app, memory_workload, range(args.memory_requests), args.concurrency)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    latencies = [latency for _, latency, _ in results]
+    return {
+        "requests": len(results),
+        "errors": sum(1 for _, _, status in results if status >= 400),
+        "throughput": len(results) / elapsed,
+        "p50": percentile(latencies, 50),
+        "p95": percentile(latencies, 95),
+        "p99": percentile(latencies, 99),
+        "loop_lag_p99_ms": percentile(lag.samples, 99) * 1000 if lag.samples else 0.0,
+        "loop_lag_max_ms": max(lag.samples) * 1000 if lag.samples else 0.0,
+        "peak_mb": peak / 2 ** 20,
+    }
+
+
+def git_commit():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=ROOT,
+                               capture_output=True, text=True).stdout.strip()
+        return f"{commit}{'-dirty' if dirty else ''}" or "unknown"
+    except OSError:
+        return "unknown"
+
+
+def print_results(results):
+    print(f"{'phase':<32}{'req/s':>8}{'p50':>8}{'p95':>8}{'p99':>8}{'lag p99':>9}{'lag max':>9}{'peak MB':>9}{'errors':>8}")
+    for phase, r in results.items():
+        print(f"{phase:<32}{r['throughput']:>8.2f}{r['p50']:>8.3f}{r['p95']:>8.3f}{r['p99']:>8.3f}"
+              f"{r['loop_lag_p99_ms']:>9.1f}{r['loop_lag_max_ms']:>9.1f}{r['peak_mb']:>9.1f}{r['errors']:>8}")
+
+
+def compare(baseline, current, threshold):
+    """Print the change of each phase against a saved run and return the regressions."""
+    if baseline["settings"] != current["settings"]:
+        print("warning: the baseline was run with different settings, so the numbers are not comparable")
+    regressions = []
+    print(f"\ncompared with {baseline['commit']}:")
+    print(f"{'phase':<32}{'req/s':>10}{'p50':>10}{'p95':>10}{'p99':>10}")
+    for phase, r in current["results"].items():
+        base = baseline["results"].get(phase)
+        if base is None:
+            continue
+        changes = {metric: (r[metric] - base[metric]) / base[metric] if base[metric] else 0.0
+                   for metric in ("throughput", "p50", "p95", "p99")}
+        print(f"{phase:<32}" + "".join(f"{changes[m]:>+10.1%}" for m in ("throughput", "p50", "p95", "p99")))
+        if changes["p95"] > threshold:
+            regressions.append(f"{phase}: p95 {base['p95']:.3f}s -> {r['p95']:.3f}s")
+        if changes["throughput"] < -threshold:
+            regressions.append(f"{phase}: throughput {base['throughput']:.2f} -> {r['throughput']:.2f} req/s")
+    return regressions
+
+
+async def main(args):
+    os.environ["GROQ_BASE_URL"] = f"http://127.0.0.1:{args.port}"
+    os.environ.setdefault("GROQ_API_KEY", "mock-key")
+    import main as app_module
+
+    phases = [(endpoint, [endpoint]) for endpoint in ENDPOINTS] + [("mixed", ENDPOINTS)]
+    results = {}
+    for index, (phase, endpoints) in enumerate(phases):
+        seed = args.seed + 1000 * index
+        workload = Workload(endpoints, seed, args.pages, args.corpus_size, args.titles)
+        memory_workload = Workload(endpoints, seed + 500, args.pages, args.corpus_size, args.titles)
+        results[phase] = await run_phase(app_module.app, workload, memory_workload, args)
+        print(f"finished {phase}", file=sys.stderr)
+
+    run = {
+        "commit": git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "settings": {key: value for key, value in vars(args).items() if key not in ("output", "compare", "threshold", "port")},
+        "results": results,
+    }
+    print(f"commit {run['commit']}")
+    print_results(results)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(run, f, indent=2)
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            regressions = compare(json.load(f), run, args.threshold)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=100, help="Requests per phase")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--memory-requests", type=int, default=20, help="Requests of the tracemalloc pass per phase")
+    parser.add_argument("--pages", type=int, nargs="+", default=[1, 2, 4, 8], help="Page counts of the PDF corpus")
+    parser.add_argument("--corpus-size", type=int, default=4, help="PDFs per page count")
+    parser.add_argument("--titles", type=int, default=40, help="Distinct job titles per phase")
+    parser.add_argument("--speed", type=float, default=1.0, help="Play recordings back this many times faster")
+    parser.add_argument("--jitter", type=float, default=0.25)
+    parser.add_argument("--recordings", default=os.path.join(ROOT, "recordings", "groq_sample.jsonl"))
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="", help="Save the run as JSON")
+    parser.add_argument("--compare", default="", help="Compare with a run saved with --output")
+    parser.add_argument("--threshold", type=float, default=0.1, help="Relative change counted as a regression")
+    parser.add_argument("--port", type=int, default=8790)
+    args = parser.parse_args()
+    server = start_server(
+        "llm_simulator.py", args.port, "--recordings", args.recordings, "--speed", str(args.speed),
+        "--jitter", str(args.jitter), "--seed", str(args.seed),
+    )
+    try:
+        status = asyncio.run(main(args))
+    finally:
+        server.terminate()
+        server.wait()
+    sys.exit(status)
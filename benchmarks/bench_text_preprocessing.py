@@ -0,0 +1,55 @@
+"""
+Token reduction benchmark for CV text preprocessing.
+
+Builds synthetic CV PDFs of several page counts, plain and with layout noise (running
+headers, footers with page numbers, words hyphenated across lines), extracts their text with
+pdfplumber as the app does, and runs cv_preprocessing.prepare_cv_text on it. Reports, per
+page count, the estimated prompt tokens of the raw and the prepared text, the reduction,
+the repeated lines removed and the preprocessing time. With --budget the prepared text is
+also fit to that token budget, which cuts the lowest-priority sections of long CVs.
+
+Run with:
+    python benchmarks/bench_text_preprocessing.py --pages 1 2 4 8 16 --cvs 5
+    python benchmarks/bench_text_preprocessing.py --pages 8 16 32 --budget 6000
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(ROOT))
+
+from pdf_fixtures import make_cv_pdf
+from pdf_extraction import PAGE_BREAK, _extract_range
+from cv_preprocessing import prepare_cv_text
+
+
+def main(args):
+    print(f"{'pages':>6} {'layout':>8} {'raw tok':>9} {'prep tok':>9} {'saved':>7} {'lines':>6} {'ms':>7}  truncated")
+    for pages in args.pages:
+        for noise in (False, True):
+            raw_tokens, prepared_tokens, removed, timings, truncated = [], [], [], [], set()
+            for seed in range(args.cvs):
+                raw_text = PAGE_BREAK.join(_extract_range(make_cv_pdf(pages, seed=seed, layout_noise=noise), 0, None))
+                start = time.perf_counter()
+                prepared = prepare_cv_text(raw_text, budget=args.budget)
+                timings.append(time.perf_counter() - start)
+                raw_tokens.append(prepared.tokens_before)
+                prepared_tokens.append(prepared.tokens_after)
+                removed.append(prepared.repeated_lines_removed)
+                truncated.update(prepared.truncated_sections)
+            raw_mean = statistics.mean(raw_tokens)
+            prepared_mean = statistics.mean(prepared_tokens)
+            print(f"{pages:>6} {'noisy' if noise else 'plain':>8} {raw_mean:>9.0f} {prepared_mean:>9.0f} "
+                  f"{1 - prepared_mean / raw_mean:>7.1%} {statistics.mean(removed):>6.1f} "
+                  f"{statistics.mean(timings) * 1000:>7.2f}  {', '.join(sorted(truncated)) or '-'}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, nargs="+", default=[1, 2, 4, 8, 16])
+    parser.add_argument("--cvs", type=int, default=5, help="CVs per page count")
+    parser.add_argument("--budget", type=int, default=0, help="Token budget (0 = no truncation)")
+    main(parser.parse_args())
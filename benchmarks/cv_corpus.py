@@ -0,0 +1,58 @@
+"""
+Synthetic parsed CVs (CV_STRUCTURE_SCHEMA dicts) for benchmarks.
+"""
+import random
+from typing import Any, Dict
+from pdf_fixtures import FIRST_NAMES, LAST_NAMES, TITLES, COMPANIES, SKILLS, BULLETS, THINGS
+
+DEGREES = ["B.S. in Computer Science", "M.S. in Data Science", "B.A. in Economics", "MBA", "B.Eng. in Electrical Engineering"]
+INSTITUTIONS = ["State University", "Institute of Technology", "City College", "National University"]
+PROFESSIONAL_SKILLS = ["Leadership", "Communication", "Mentoring", "Stakeholder Management", "Agile Methodologies"]
+
+
+def make_parsed_cv(seed: int) -> Dict[str, Any]:
+    rng = random.Random(seed)
+    name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+    jobs = []
+    for _ in range(rng.randint(1, 4)):
+        jobs.append({
+            "job_title": rng.choice(TITLES),
+            "company": rng.choice(COMPANIES),
+            "dates": f"{rng.randint(2010, 2018)} - {rng.randint(2019, 2024)}",
+            "responsibilities": [
+                rng.choice(BULLETS).format(n=rng.randint(2, 60), thing=rng.choice(THINGS))
+                for _ in range(rng.randint(2, 4))
+            ],
+            "achievements": [
+                rng.choice(BULLETS).format(n=rng.randint(2, 60), thing=rng.choice(THINGS))
+            ],
+        })
+    return {
+        "personal_info": {
+            "full_name": name,
+            "email": [f"{name.lower().replace(' ', '.')}{seed}@example.com"],
+            "phone": [f"+1-555-{rng.randint(1000, 9999)}"],
+            "linkedin": None,
+            "address": "",
+            "city": "Springfield",
+            "country": "USA",
+        },
+        "education": [{
+            "degree": rng.choice(DEGREES),
+            "institution": rng.choice(INSTITUTIONS),
+            "start_date": "2010",
+            "end_date": "2014",
+            "result": [],
+        }],
+        "work_experience": jobs,
+        "skills": {
+            "technical": rng.sample(SKILLS, rng.randint(4, 10)),
+            "professional": rng.sample(PROFESSIONAL_SKILLS, 2),
+        },
+        "projects": [],
+        "publications": [],
+        "certifications": [],
+        "awards": [],
+        "references": [],
+        "hobbies": [],
+    }
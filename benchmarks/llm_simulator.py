@@ -0,0 +1,204 @@
+"""
+Recorded-response LLM simulator for benchmarks.
+
+Plays back recorded Groq chat completions with the latency profile they were recorded
+with: each request gets a recording of the same task (prompt) and, if there is one, the
+same model. It waits the recorded time to first token and then generates the recorded
+completion at the recorded token rate. Both are scaled by log-normal noise (--jitter),
+so repeated requests follow a latency distribution instead of a fixed delay. Streams emit
+one word at a time at that rate. Completions longer than max_tokens are cut off with
+finish_reason "length", as the real API does.
+
+Play back (the default recordings are hand-made samples shaped like real completions):
+    python benchmarks/llm_simulator.py --port 8790 --recordings benchmarks/recordings/groq_sample.jsonl
+
+Record real completions by proxying the app's calls to Groq (the app's API key is passed through):
+    python benchmarks/llm_simulator.py --port 8790 --record benchmarks/recordings/mine.jsonl
+
+then point the app at it with GROQ_BASE_URL=http://127.0.0.1:8790.
+
+Each recording is one JSON line:
+    {"task": "skills", "model": "llama-3.1-8b-instant", "content": "...", "prompt_tokens": 190,
+     "completion_tokens": 21, "ttft": 0.18, "tokens_per_second": 740.0}
+"""
+import argparse
+import asyncio
+import collections
+import json
+import os
+import random
+import time
+import uuid
+import httpx
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+from mock_llm_server import chunk_body
+
+DEFAULT_RECORDINGS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "recordings", "groq_sample.jsonl")
+
+# Phrases of each prompt's system message (prompts.py) that tell the tasks apart, most specific first
+TASK_MARKERS = [
+    ("cv_section_parse", "one part of a longer CV"),
+    ("cv_parse", "CV parsing assistant"),
+    ("ats_section_analysis", "one section of a candidate's CV"),
+    ("ats_analysis", "Applicant Tracking System"),
+    ("cv_summary", "resume summary writer"),
+    ("job_responsibilities", "job responsibilities writer"),
+    ("skills", "job skills writer"),
+]
+
+app = FastAPI()
+
+# Playback settings, overridable from the command line
+RECORDINGS = collections.defaultdict(list)
+SPEED = 1.0
+JITTER = 0.25
+RNG = random.Random(0)
+# Recording settings
+RECORD_PATH = ""
+UPSTREAM = "https://api.groq.com"
+
+
+def detect_task(payload: dict) -> str:
+    messages = payload.get("messages") or []
+    system = next((str(m.get("content", "")) for m in messages if m.get("role") == "system"), "")
+    for task, marker in TASK_MARKERS:
+        if marker in system:
+            return task
+    return "unknown"
+
+
+def load_recordings(path: str) -> None:
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                recording = json.loads(line)
+                RECORDINGS[recording["task"]].append(recording)
+
+
+def pick_recording(task: str, model: str) -> dict:
+    candidates = RECORDINGS.get(task) or [r for recordings in RECORDINGS.values() for r in recordings]
+    same_model = [r for r in candidates if r.get("model") == model]
+    return RNG.choice(same_model or candidates)
+
+
+def noise(sigma: float) -> float:
+    return RNG.lognormvariate(0.0, sigma) if sigma > 0 else 1.0
+
+
+def playback_timing(recording: dict, completion_tokens: int) -> tuple:
+    """Time to first token and total generation time of one playback, in seconds."""
+    ttft = recording["ttft"] * noise(JITTER) / SPEED
+    rate = recording["tokens_per_second"] * noise(JITTER / 2) * SPEED
+    return ttft, completion_tokens / rate
+
+
+def completion_body(model: str, content: str, finish_reason: str, prompt_tokens: int, completion_tokens: int) -> dict:
+    return {
+        "id": f"chatcmpl-{uuid.uuid4().hex}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": finish_reason}],
+        "usage": {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+        },
+    }
+
+
+def truncate(recording: dict, max_tokens: int) -> tuple:
+    """The recorded content cut to `max_tokens`, its token count and the finish reason."""
+    tokens = recording["completion_tokens"]
+    if not max_tokens or tokens <= max_tokens:
+        return recording["content"], tokens, "stop"
+    content = recording["content"]
+    return content[:len(content) * max_tokens // tokens], max_tokens, "length"
+
+
+async def stream_playback(model: str, content: str, ttft: float, generation: float, finish_reason: str):
+    completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+    await asyncio.sleep(ttft)
+    yield chunk_body(completion_id, model, {"role": "assistant", "content": ""})
+    words = content.split(" ")
+    delay = generation / max(1, len(words))
+    for i, word in enumerate(words):
+        yield chunk_body(completion_id, model, {"content": word if i == 0 else " " + word})
+        await asyncio.sleep(delay)
+    yield chunk_body(completion_id, model, {}, finish_reason=finish_reason)
+    yield "data: [DONE]\n\n"
+
+
+async def record(request: Request, payload: dict):
+    """Forward a call to the real API without streaming, append it to RECORD_PATH and answer with it."""
+    upstream_payload = {**payload, "stream": False}
+    headers = {"authorization": request.headers.get("authorization", "")}
+    start = time.perf_counter()
+    async with httpx.AsyncClient(timeout=300) as client:
+        response = await client.post(f"{UPSTREAM}/openai/v1/chat/completions", json=upstream_payload, headers=headers)
+    elapsed = time.perf_counter() - start
+    if response.status_code != 200:
+        return JSONResponse(response.json(), status_code=response.status_code)
+    body = response.json()
+    usage = body.get("usage") or {}
+    completion_tokens = usage.get("completion_tokens", 0)
+    # Groq reports the generation time; the rest of the round trip is time to first token
+    completion_time = usage.get("completion_time") or 0.0
+    recording = {
+        "task": detect_task(payload),
+        "model": payload.get("model", ""),
+        "content": body["choices"][0]["message"]["content"] or "",
+        "prompt_tokens": usage.get("prompt_tokens", 0),
+        "completion_tokens": completion_tokens,
+        "ttft": max(0.0, elapsed - completion_time),
+        "tokens_per_second": completion_tokens / completion_time if completion_time else 1e6,
+    }
+    with open(RECORD_PATH, "a", encoding="utf-8") as f:
+        f.write(json.dumps(recording) + "\n")
+    if payload.get("stream"):
+        return StreamingResponse(
+            stream_playback(recording["model"], recording["content"], 0.0, 0.0, body["choices"][0]["finish_reason"]),
+            media_type="text/event-stream",
+        )
+    return body
+
+
+@app.post("/openai/v1/chat/completions")
+async def chat_completions(request: Request):
+    payload = await request.json()
+    if RECORD_PATH:
+        return await record(request, payload)
+    model = payload.get("model", "mock")
+    recording = pick_recording(detect_task(payload), model)
+    content, completion_tokens, finish_reason = truncate(recording, payload.get("max_tokens") or 0)
+    ttft, generation = playback_timing(recording, completion_tokens)
+    if payload.get("stream"):
+        return StreamingResponse(
+            stream_playback(model, content, ttft, generation, finish_reason), media_type="text/event-stream"
+        )
+    await asyncio.sleep(ttft + generation)
+    return completion_body(model, content, finish_reason, recording["prompt_tokens"], completion_tokens)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8790)
+    parser.add_argument("--recordings", default=DEFAULT_RECORDINGS)
+    parser.add_argument("--speed", type=float, default=SPEED, help="Play back this many times faster than recorded")
+    parser.add_argument("--jitter", type=float, default=JITTER, help="Sigma of the log-normal latency noise")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--record", default="", metavar="PATH", help="Record real completions to PATH instead")
+    parser.add_argument("--upstream", default=UPSTREAM)
+    args = parser.parse_args()
+    SPEED = args.speed
+    JITTER = args.jitter
+    RNG = random.Random(args.seed)
+    RECORD_PATH = args.record
+    UPSTREAM = args.upstream.rstrip("/")
+    if not RECORD_PATH:
+        load_recordings(args.recordings)
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
@@ -0,0 +1,228 @@
+"""
+Local mock of the Groq chat completions API for benchmarks.
+
+Run with:
+    python benchmarks/mock_llm_server.py --port 8765 --latency 0.5
+
+then point the app at it with GROQ_BASE_URL=http://127.0.0.1:8765.
+Streaming requests get the first token after --latency seconds and one
+word every --token-delay seconds after that. With --output-token-delay, JSON
+requests also take that long per output token, assuming the output is about as
+long as the prompt, and are cut off with finish_reason "length" at max_tokens.
+Batch generation requests (prompts listing entries "by ID") get one text per entry,
+also taking --output-token-delay per output token.
+
+Faults can be injected to exercise the LLM gateway: --error-rate answers that share of
+requests with a 500, --rate-limit-rate with a 429 and a Retry-After header, and
+--slow-rate adds --slow-latency seconds to that share of requests (a slow tail).
+
+Models can be given their own latency (--model-latency llama-3.1-8b-instant=0.1) and a
+share of empty text completions (--model-empty-rate llama-3.1-8b-instant=0.1), to
+exercise model routing and escalation.
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+import uuid
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+app = FastAPI()
+
+# Simulated round-trip latency in seconds, overridable from the command line
+LATENCY = 0.5
+# Delay between streamed tokens in seconds
+TOKEN_DELAY = 0.01
+# Generation time per output token of JSON completions in seconds (0 = fixed latency)
+OUTPUT_TOKEN_DELAY = 0.0
+# Injected faults: share of requests answered with a 500 or a 429, and the slow tail
+ERROR_RATE = 0.0
+RATE_LIMIT_RATE = 0.0
+RATE_LIMIT_RETRY_AFTER = 1.0
+SLOW_RATE = 0.0
+SLOW_LATENCY = 5.0
+# Per-model latency and share of empty text completions
+MODEL_LATENCY = {}
+MODEL_EMPTY_RATE = {}
+
+TEXT_COMPLETION = (
+    "Python, SQL, Data Visualization, Machine Learning, Statistics, Communication"
+)
+
+JSON_COMPLETION = {
+    "personal_info": {
+        "full_name": "Jane Doe",
+        "email": ["jane.doe@example.com"],
+        "phone": ["+1-555-0100"],
+        "linkedin": None,
+        "address": "",
+        "city": "Springfield",
+        "country": "USA"
+    },
+    "education": [],
+    "work_experience": [],
+    "skills": {"technical": ["Python"], "professional": ["Communication"]},
+    "projects": [],
+    "publications": [],
+    "certifications": [],
+    "awards": [],
+    "references": [],
+    "hobbies": [],
+    "score": 70.0,
+    "feedback": "Mock section analysis",
+    "strengths": [],
+    "improvements": [],
+    "overall_score": 70.0,
+    "overall_feedback": "Mock analysis",
+    "section_feedbacks": [],
+    "keyword_match_percentage": 50.0,
+    "recommendations": []
+}
+
+
+def completion_body(model: str, content: str, finish_reason: str = "stop") -> dict:
+    return {
+        "id": f"chatcmpl-{uuid.uuid4().hex}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [
+            {
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": finish_reason,
+            }
+        ],
+        "usage": {
+            "prompt_tokens": 100,
+            "completion_tokens": len(content.split()),
+            "total_tokens": 100 + len(content.split()),
+        },
+    }
+
+
+def chunk_body(completion_id: str, model: str, delta: dict, finish_reason=None) -> str:
+    chunk = {
+        "id": completion_id,
+        "object": "chat.completion.chunk",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+    }
+    return f"data: {json.dumps(chunk)}\n\n"
+
+
+def request_latency(model: str = "") -> float:
+    return MODEL_LATENCY.get(model, LATENCY) + (SLOW_LATENCY if random.random() < SLOW_RATE else 0.0)
+
+
+def injected_fault():
+    """An error response for the configured share of requests, or None."""
+    roll = random.random()
+    if roll < ERROR_RATE:
+        return JSONResponse({"error": {"message": "Injected server error", "type": "internal_server_error"}}, status_code=500)
+    if roll < ERROR_RATE + RATE_LIMIT_RATE:
+        return JSONResponse(
+            {"error": {"message": "Injected rate limit", "type": "rate_limit_exceeded"}},
+            status_code=429,
+            headers={"retry-after": str(RATE_LIMIT_RETRY_AFTER), "x-ratelimit-remaining-requests": "0",
+                     "x-ratelimit-reset-requests": f"{RATE_LIMIT_RETRY_AFTER}s"},
+        )
+    return None
+
+
+def batch_entries(payload: dict):
+    """The entry IDs of a batch generation prompt (the JSON object after "by ID:"), or None."""
+    for message in payload.get("messages", []):
+        content = str(message.get("content", ""))
+        if message.get("role") == "user" and "by ID:\n" in content:
+            try:
+                return json.loads(content.split("by ID:\n", 1)[1].split("\n", 1)[0])
+            except ValueError:
+                return None
+    return None
+
+
+async def stream_words(model: str, content: str):
+    completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+    await asyncio.sleep(request_latency(model))
+    yield chunk_body(completion_id, model, {"role": "assistant", "content": ""})
+    words = content.split(" ")
+    for i, word in enumerate(words):
+        yield chunk_body(completion_id, model, {"content": word if i == 0 else " " + word})
+        await asyncio.sleep(TOKEN_DELAY)
+    yield chunk_body(completion_id, model, {}, finish_reason="stop")
+    yield "data: [DONE]\n\n"
+
+
+@app.post("/openai/v1/chat/completions")
+async def chat_completions(request: Request):
+    payload = await request.json()
+    fault = injected_fault()
+    if fault is not None:
+        await asyncio.sleep(LATENCY)
+        return fault
+    if payload.get("stream"):
+        return StreamingResponse(
+            stream_words(payload.get("model", "mock"), TEXT_COMPLETION),
+            media_type="text/event-stream",
+        )
+    model = payload.get("model", "mock")
+    entries = batch_entries(payload)
+    if entries is not None:
+        # Batch generation: one text per entry ID, empty for the model's share of empty completions
+        content = json.dumps({
+            entry_id: "" if random.random() < MODEL_EMPTY_RATE.get(model, 0.0) else TEXT_COMPLETION
+            for entry_id in entries
+        })
+        output_tokens = int(len(content.split()) * 1.3)
+        await asyncio.sleep(request_latency(model) + OUTPUT_TOKEN_DELAY * output_tokens)
+        return completion_body(model, content)
+    if (payload.get("response_format") or {}).get("type") == "json_object":
+        content = json.dumps(JSON_COMPLETION)
+        if OUTPUT_TOKEN_DELAY > 0:
+            # Structured output restates the prompt's document, so its length follows the prompt's
+            prompt_words = sum(len(str(message.get("content", "")).split()) for message in payload.get("messages", []))
+            output_tokens = int(prompt_words * 1.3)
+            max_tokens = payload.get("max_tokens") or output_tokens
+            await asyncio.sleep(request_latency(payload.get("model", "")) + OUTPUT_TOKEN_DELAY * min(output_tokens, max_tokens))
+            if output_tokens > max_tokens:
+                return completion_body(payload.get("model", "mock"), content[:len(content) // 2], "length")
+            return completion_body(payload.get("model", "mock"), content)
+    else:
+        content = TEXT_COMPLETION
+        if random.random() < MODEL_EMPTY_RATE.get(payload.get("model", ""), 0.0):
+            content = ""
+    await asyncio.sleep(request_latency(payload.get("model", "")))
+    return completion_body(payload.get("model", "mock"), content)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Mock Groq chat completions server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=LATENCY)
+    parser.add_argument("--token-delay", type=float, default=TOKEN_DELAY)
+    parser.add_argument("--output-token-delay", type=float, default=OUTPUT_TOKEN_DELAY)
+    parser.add_argument("--error-rate", type=float, default=ERROR_RATE)
+    parser.add_argument("--rate-limit-rate", type=float, default=RATE_LIMIT_RATE)
+    parser.add_argument("--rate-limit-retry-after", type=float, default=RATE_LIMIT_RETRY_AFTER)
+    parser.add_argument("--slow-rate", type=float, default=SLOW_RATE)
+    parser.add_argument("--slow-latency", type=float, default=SLOW_LATENCY)
+    parser.add_argument("--model-latency", action="append", default=[], metavar="MODEL=SECONDS")
+    parser.add_argument("--model-empty-rate", action="append", default=[], metavar="MODEL=RATE")
+    args = parser.parse_args()
+    LATENCY = args.latency
+    TOKEN_DELAY = args.token_delay
+    OUTPUT_TOKEN_DELAY = args.output_token_delay
+    ERROR_RATE = args.error_rate
+    RATE_LIMIT_RATE = args.rate_limit_rate
+    RATE_LIMIT_RETRY_AFTER = args.rate_limit_retry_after
+    SLOW_RATE = args.slow_rate
+    SLOW_LATENCY = args.slow_latency
+    MODEL_LATENCY = {name: float(value) for name, value in (item.split("=", 1) for item in args.model_latency)}
+    MODEL_EMPTY_RATE = {name: float(value) for name, value in (item.split("=", 1) for item in args.model_empty_rate)}
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
@@ -0,0 +1,157 @@
+"""
+Synthetic CV PDFs for benchmarks.
+
+Writes minimal text-only PDFs by hand so no PDF authoring library is needed.
+"""
+import random
+from typing import List
+
+FIRST_NAMES = ["Jane", "John", "Amina", "Wei", "Carlos", "Priya", "Olga", "Kwame"]
+LAST_NAMES = ["Doe", "Smith", "Rahman", "Chen", "Garcia", "Patel", "Ivanova", "Mensah"]
+TITLES = ["Software Engineer", "Data Analyst", "Product Manager", "DevOps Engineer", "Data Scientist"]
+COMPANIES = ["TechCorp", "Initech", "Globex", "Umbrella Analytics", "Hooli", "Stark Industries"]
+SKILLS = [
+    "Python", "SQL", "AWS", "Docker", "Kubernetes", "React", "Machine Learning", "Tableau",
+    "Scrum", "Terraform", "Java", "Go", "Spark", "Airflow", "PostgreSQL", "Leadership",
+]
+BULLETS = [
+    "Led a team of {n} engineers delivering {thing} on schedule.",
+    "Reduced {thing} latency by {n}% through profiling and caching.",
+    "Built {thing} used by {n} thousand customers every month.",
+    "Automated {thing} with CI/CD pipelines, saving {n} hours per week.",
+    "Mentored {n} junior developers and ran weekly code reviews.",
+]
+PAPER_TOPICS = ["Sparse Retrieval", "Graph Neural Networks", "Causal Inference", "Federated Learning", "Query Optimization"]
+VENUES = ["NeurIPS", "ICML", "VLDB", "SIGMOD", "ACL", "Journal of Machine Learning Research"]
+THINGS = ["the billing platform", "data pipelines", "the search service", "reporting dashboards", "the mobile API"]
+
+
+def add_layout_noise(pages_text: List[List[str]], seed: int = 0) -> List[List[str]]:
+    """
+    Add what word-processor CVs carry on every page: a running header, a footer with the
+    page number, bullets hyphenated across lines, and skills laid out as a padded table.
+    """
+    rng = random.Random(seed)
+    name = pages_text[0][0]
+    noisy = []
+    for number, lines in enumerate(pages_text, start=1):
+        page = [f"{name}  |  Curriculum Vitae", ""]
+        for line in lines:
+            if line.startswith("- ") and len(line) > 40 and rng.random() < 0.3:
+                # Break the bullet inside a word, as justified text does
+                cut = line.index(" ", 30)
+                word_end = line.find(" ", cut + 1)
+                word = line[cut + 1:word_end if word_end > 0 else len(line)]
+                if len(word) > 5 and word.isalpha() and word.islower():
+                    split = len(word) // 2
+                    page.append(line[:cut + 1] + word[:split] + "-")
+                    page.append("  " + word[split:] + (line[word_end:] if word_end > 0 else ""))
+                    continue
+            if ", " in line and line.count(",") >= 5:
+                # Skills table: fixed-width columns padded with spaces
+                cells = line.split(", ")
+                for i in range(0, len(cells), 3):
+                    page.append("".join(cell.ljust(24) for cell in cells[i:i + 3]))
+                continue
+            page.append(line)
+        page += ["", f"Confidential - {name}", f"Page {number} of {len(pages_text)}"]
+        noisy.append(page)
+    return noisy
+
+
+def _escape(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def cv_lines(pages: int, seed: int = 0, lines_per_page: int = 45, publications: int = 0) -> List[List[str]]:
+    """Generate CV-like text lines grouped by page, optionally with an academic publication list."""
+    rng = random.Random(seed)
+    name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+    lines = [
+        name,
+        f"{name.lower().replace(' ', '.')}@example.com | +1-555-{rng.randint(1000, 9999)} | linkedin.com/in/{name.lower().replace(' ', '')}",
+        "Springfield, USA",
+        "",
+        "Skills",
+        ", ".join(rng.sample(SKILLS, 8)),
+        "",
+        "Education",
+        "B.S. in Computer Science, State University, 2012 - 2016, GPA 3.7/4.0",
+        "",
+        "Experience",
+    ]
+    if publications:
+        papers = [
+            f"[{i + 1}] {name} et al. {rng.choice(PAPER_TOPICS)} at Scale. {rng.choice(VENUES)}, {rng.randint(2012, 2024)}."
+            for i in range(publications)
+        ]
+        lines[-1:-1] = ["Publications", *papers, ""]
+    while len(lines) < pages * lines_per_page:
+        lines.append(f"{rng.choice(TITLES)}, {rng.choice(COMPANIES)}, {rng.randint(2010, 2020)} - {rng.randint(2021, 2024)}")
+        for _ in range(rng.randint(3, 5)):
+            lines.append("- " + rng.choice(BULLETS).format(n=rng.randint(2, 60), thing=rng.choice(THINGS)))
+        lines.append("")
+    return [lines[i:i + lines_per_page] for i in range(0, pages * lines_per_page, lines_per_page)]
+
+
+def make_pdf(pages_text: List[List[str]], padding: int = 0) -> bytes:
+    """
+    Build a PDF with one page per list of lines, using the built-in Helvetica font.
+    `padding` bytes of random data are added as an unreferenced stream, standing in for
+    embedded images, to produce large files that are still cheap to extract.
+    """
+    objects = []
+    page_ids = []
+    font_id = 3
+    next_id = 4
+    page_objects = []
+    for lines in pages_text:
+        content = ["BT", "/F1 10 Tf", "12 TL", "50 790 Td"]
+        for line in lines:
+            content.append(f"({_escape(line)}) Tj T*")
+        content.append("ET")
+        stream = "\n".join(content).encode("latin-1", "replace")
+        page_id, content_id = next_id, next_id + 1
+        next_id += 2
+        page_ids.append(page_id)
+        page_objects.append((page_id, (
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 842] "
+            f"/Resources << /Font << /F1 {font_id} 0 R >> >> /Contents {content_id} 0 R >>"
+        ).encode()))
+        page_objects.append((content_id, b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream"))
+
+    objects.append((1, b"<< /Type /Catalog /Pages 2 0 R >>"))
+    kids = " ".join(f"{pid} 0 R" for pid in page_ids)
+    objects.append((2, f"<< /Type /Pages /Kids [{kids}] /Count {len(page_ids)} >>".encode()))
+    objects.append((3, b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"))
+    objects.extend(page_objects)
+    if padding > 0:
+        blob = random.Random(padding).randbytes(padding)
+        objects.append((next_id, b"<< /Length %d >>\nstream\n" % len(blob) + blob + b"\nendstream"))
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = {}
+    for obj_id, body in objects:
+        offsets[obj_id] = len(out)
+        out += b"%d 0 obj\n" % obj_id + body + b"\nendobj\n"
+    xref_at = len(out)
+    out += b"xref\n0 %d\n" % (len(objects) + 1)
+    out += b"0000000000 65535 f \n"
+    for obj_id in range(1, len(objects) + 1):
+        out += b"%010d 00000 n \n" % offsets[obj_id]
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref_at)
+    return bytes(out)
+
+
+def make_cv_pdf(pages: int, seed: int = 0, size: int = 0, layout_noise: bool = False) -> bytes:
+    """
+    Generate a synthetic CV PDF with the given number of pages, padded to about `size` bytes,
+    optionally with running headers, footers and other layout noise (add_layout_noise).
+    """
+    pages_text = cv_lines(pages, seed)
+    if layout_noise:
+        pages_text = add_layout_noise(pages_text, seed)
+    pdf = make_pdf(pages_text)
+    if size > len(pdf):
+        pdf = make_pdf(pages_text, padding=size - len(pdf) - 64)
+    return pdf
@@ -0,0 +1,168 @@
+import os
+import json
+import time
+import asyncio
+import hashlib
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+from shared_store import SharedStore, shared_store
+
+# Parsed CV cache settings
+CV_CACHE_SIZE = int(os.getenv("CV_CACHE_SIZE", "256"))
+CV_CACHE_DIR = os.getenv("CV_CACHE_DIR", "")  # Disk tier is disabled when empty
+CV_CACHE_TTL = float(os.getenv("CV_CACHE_TTL", "86400"))
+
+
+def make_cv_key(pdf_digest: bytes, schema: Dict[str, Any], model: str) -> str:
+    """
+    Build a content-addressed cache key from the PDF's SHA-256 digest, the parsing schema
+    and the model, so a schema or model change never serves stale parses.
+    """
+    digest = hashlib.sha256()
+    digest.update(pdf_digest)
+    digest.update(json.dumps(schema, sort_keys=True, separators=(",", ":")).encode())
+    digest.update(model.encode())
+    return digest.hexdigest()
+
+
+class ParsedCVCache:
+    """
+    Two-tier cache of extracted CV text and parsed CV JSON.
+
+    The memory tier is an LRU of at most `max_entries` entries. The optional disk tier stores
+    one JSON file per key under `cache_dir` and expires entries older than `ttl` seconds.
+    With a `shared` store (shared_store.py), entries are also written to it, so a CV parsed
+    by one worker process is a hit in every other one.
+    Each entry is a dict that may hold "text" and/or "parsed_cv".
+    """
+
+    def __init__(self, max_entries: int = CV_CACHE_SIZE, cache_dir: str = CV_CACHE_DIR, ttl: float = CV_CACHE_TTL,
+                 shared: Optional[SharedStore] = None):
+        self.max_entries = max_entries
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+        self.shared = shared
+        self._memory: "OrderedDict[str, tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.disk_hits = 0
+        self.shared_hits = 0
+        self.shared_errors = 0
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def _read_disk(self, key: str) -> Optional[Dict[str, Any]]:
+        path = self._path(key)
+        try:
+            if time.time() - os.path.getmtime(path) > self.ttl:
+                os.unlink(path)
+                return None
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _write_disk(self, key: str, entry: Dict[str, Any]) -> None:
+        path = self._path(key)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(entry, f)
+            os.replace(tmp_path, path)
+        except OSError:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+
+    def _remember(self, key: str, entry: Dict[str, Any]) -> None:
+        self._memory[key] = (time.time(), entry)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return the cached entry for `key`, checking memory first, then the shared store, then disk."""
+        cached = self._memory.get(key)
+        if cached is not None:
+            stored_at, entry = cached
+            if time.time() - stored_at <= self.ttl:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return entry
+            del self._memory[key]
+
+        if self.shared is not None:
+            try:
+                entry = await self.shared.get(f"cv:{key}")
+            except Exception:
+                self.shared_errors += 1
+                entry = None
+            if entry is not None:
+                self._remember(key, entry)
+                self.hits += 1
+                self.shared_hits += 1
+                return entry
+
+        if self.cache_dir:
+            entry = await asyncio.to_thread(self._read_disk, key)
+            if entry is not None:
+                self._remember(key, entry)
+                self.hits += 1
+                self.disk_hits += 1
+                return entry
+
+        self.misses += 1
+        return None
+
+    async def update(self, key: str, **fields: Any) -> Dict[str, Any]:
+        """Merge `fields` into the entry for `key` and write it through to the shared store and disk."""
+        cached = self._memory.get(key)
+        entry = dict(cached[1]) if cached is not None else {}
+        entry.update(fields)
+        self._remember(key, entry)
+        if self.shared is not None:
+            try:
+                await self.shared.set(f"cv:{key}", entry, self.ttl)
+            except Exception:
+                self.shared_errors += 1
+        if self.cache_dir:
+            await asyncio.to_thread(self._write_disk, key, entry)
+        return entry
+
+    def evict_expired(self) -> int:
+        """Remove expired disk entries and return how many were removed."""
+        if not self.cache_dir:
+            return 0
+        removed = 0
+        now = time.time()
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith(".json"):
+                continue
+            path = os.path.join(self.cache_dir, name)
+            try:
+                if now - os.path.getmtime(path) > self.ttl:
+                    os.unlink(path)
+                    removed += 1
+            except OSError:
+                continue
+        return removed
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._memory),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "disk_hits": self.disk_hits,
+            "shared_hits": self.shared_hits,
+            "shared_errors": self.shared_errors,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "disk_enabled": bool(self.cache_dir),
+            "shared_enabled": self.shared is not None,
+        }
+
+
+cv_cache = ParsedCVCache(shared=shared_store)
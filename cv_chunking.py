@@ -0,0 +1,186 @@
+import os
+import re
+import json
+from typing import Any, Dict, List, Tuple
+from pydantic import BaseModel
+from cv_model import CVStructure
+from prompts import estimate_tokens
+
+# Long-document mode settings
+LONG_CV_THRESHOLD_TOKENS = int(os.getenv("LONG_CV_THRESHOLD_TOKENS", "3000"))
+LONG_CV_CHUNK_TOKENS = int(os.getenv("LONG_CV_CHUNK_TOKENS", "1500"))
+
+# Heading lines (lower-cased, without a trailing colon) that start each schema section
+SECTION_HEADINGS: Dict[str, Tuple[str, ...]] = {
+    "personal_info": (
+        "contact", "contact details", "contact information", "personal details", "personal information",
+        "personal data",
+    ),
+    "education": (
+        "education", "academic background", "academic qualifications", "qualifications",
+        "education and training", "academic history",
+    ),
+    "work_experience": (
+        "experience", "work experience", "professional experience", "employment", "employment history",
+        "work history", "career history", "research experience", "teaching experience", "appointments",
+        "academic appointments",
+    ),
+    "skills": (
+        "skills", "technical skills", "key skills", "core competencies", "competencies",
+        "skills and competencies", "technical expertise", "soft skills", "professional skills",
+        "interpersonal skills",
+    ),
+    "projects": ("projects", "selected projects", "key projects", "research projects"),
+    "publications": (
+        "publications", "selected publications", "peer-reviewed publications", "journal articles",
+        "conference papers", "conference proceedings", "papers", "books", "book chapters",
+        "working papers", "preprints",
+    ),
+    "certifications": (
+        "certifications", "certificates", "licenses", "licenses and certifications",
+        "certifications and licenses", "courses", "training",
+    ),
+    "awards": (
+        "awards", "honors", "honours", "awards and honors", "awards and honours", "grants",
+        "fellowships", "scholarships", "grants and awards", "honors and awards",
+    ),
+    "references": ("references", "referees"),
+    "hobbies": ("hobbies", "interests", "hobbies and interests", "personal interests"),
+}
+HEADING_SECTIONS = {heading: section for section, headings in SECTION_HEADINGS.items() for heading in headings}
+MAX_HEADING_WORDS = max(len(heading.split()) for heading in HEADING_SECTIONS)
+
+ALL_SECTIONS = tuple(CVStructure.model_fields)
+
+
+class CVChunk(BaseModel):
+    sections: Tuple[str, ...]  # Schema sections this chunk is parsed into
+    text: str
+
+
+def _heading_section(line: str) -> str:
+    """Return the section a heading line starts, or "" if the line is not a heading."""
+    words = line.strip().rstrip(":").replace("&", "and").lower().split()
+    if not words or len(words) > MAX_HEADING_WORDS:
+        return ""
+    return HEADING_SECTIONS.get(" ".join(words), "")
+
+
+def split_sections(text: str) -> List[Tuple[str, str]]:
+    """
+    Split CV text at section headings into (section, text) pairs in document order.
+    Text before the first heading is treated as personal_info. Headings are kept in the text.
+    """
+    sections: List[Tuple[str, List[str]]] = [("personal_info", [])]
+    for line in text.splitlines():
+        section = _heading_section(line)
+        if section:
+            sections.append((section, [line]))
+        else:
+            sections[-1][1].append(line)
+    return [(section, "\n".join(lines).strip()) for section, lines in sections if "\n".join(lines).strip()]
+
+
+def _split_entries(text: str, budget: int) -> List[str]:
+    """Split section text into pieces within the token budget, at blank lines where possible."""
+    pieces: List[str] = []
+    current: List[str] = []
+    current_tokens = 0
+    entries = [entry for entry in re.split(r"\n\s*\n", text) if entry.strip()]
+    # Entries larger than the budget are split further line by line
+    units = []
+    for entry in entries:
+        units.extend([entry] if estimate_tokens(entry) <= budget else entry.splitlines())
+    for unit in units:
+        tokens = estimate_tokens(unit)
+        if current and current_tokens + tokens > budget:
+            pieces.append("\n\n".join(current))
+            current, current_tokens = [], 0
+        current.append(unit)
+        current_tokens += tokens
+    if current:
+        pieces.append("\n\n".join(current))
+    return pieces
+
+
+def chunk_cv_text(text: str, budget: int = LONG_CV_CHUNK_TOKENS) -> List[CVChunk]:
+    """
+    Split CV text into section-aware chunks of at most about `budget` tokens.
+
+    Each chunk is parsed against the schemas of the sections it contains. Small neighbouring
+    sections share a chunk; large sections are split into several chunks at entry boundaries,
+    each repeating the section heading. Without any detected headings the text is split by
+    size and every chunk is parsed against the full schema.
+    """
+    sections = split_sections(text)
+    if len(sections) <= 1:
+        return [CVChunk(sections=ALL_SECTIONS, text=piece) for piece in _split_entries(text, budget)]
+
+    chunks: List[CVChunk] = []
+    pending_sections: List[str] = []
+    pending_text: List[str] = []
+    pending_tokens = 0
+
+    def flush() -> None:
+        nonlocal pending_sections, pending_text, pending_tokens
+        if pending_text:
+            chunks.append(CVChunk(sections=tuple(dict.fromkeys(pending_sections)), text="\n\n".join(pending_text)))
+        pending_sections, pending_text, pending_tokens = [], [], 0
+
+    for section, section_text in sections:
+        tokens = estimate_tokens(section_text)
+        if tokens > budget:
+            flush()
+            heading, _, body = section_text.partition("\n")
+            if section == "personal_info":
+                heading, body = "", section_text
+            for piece in _split_entries(body, budget):
+                chunks.append(CVChunk(sections=(section,), text=f"{heading}\n{piece}".strip()))
+            continue
+        if pending_tokens + tokens > budget:
+            flush()
+        pending_sections.append(section)
+        pending_text.append(section_text)
+        pending_tokens += tokens
+    flush()
+    return chunks
+
+
+def _dedupe_key(value: Any) -> str:
+    if isinstance(value, str):
+        return value.strip().casefold()
+    return json.dumps(value, sort_keys=True)
+
+
+def _is_empty(value: Any) -> bool:
+    return value is None or value == "" or value == [] or value == {}
+
+
+def _merge(base: Any, update: Any) -> Any:
+    if isinstance(base, dict) and isinstance(update, dict):
+        merged = dict(base)
+        for key, value in update.items():
+            merged[key] = _merge(merged[key], value) if key in merged else value
+        return merged
+    if isinstance(base, list) and isinstance(update, list):
+        seen = {_dedupe_key(item) for item in base}
+        merged = list(base)
+        for item in update:
+            key = _dedupe_key(item)
+            if key not in seen:
+                seen.add(key)
+                merged.append(item)
+        return merged
+    return update if _is_empty(base) else base
+
+
+def merge_cv_parts(parts: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Merge parsed chunks, given in document order, into one CV.
+    Lists are concatenated without duplicates and for single values the first non-empty
+    one wins, so the result only depends on the order of the chunks.
+    """
+    merged: Dict[str, Any] = {}
+    for part in parts:
+        merged = _merge(merged, part)
+    return CVStructure.model_validate(merged).model_dump()
@@ -0,0 +1,202 @@
+import re
+import json
+from typing import Annotated, Any, Dict, List, Optional
+from pydantic import BaseModel, BeforeValidator, ConfigDict, ValidationError, field_validator, model_validator
+from metrics import CV_PARSE_REPAIRS
+from output_cleaner import clean_cv_json, clean_cv_text
+
+def clean_text(value: Any) -> Any:
+    if value is None:
+        return ""
+    if isinstance(value, str):
+        return clean_cv_text(value)
+    # Numbers where the schema expects text, such as a phone number written without quotes
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return str(value)
+    return value
+
+
+def as_list(value: Any) -> Any:
+    """Accept a single value or null where the schema expects an array."""
+    if value is None:
+        return []
+    if isinstance(value, (str, dict)):
+        return [value] if value else []
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return [value]
+    return value
+
+
+def as_objects(value: Any) -> Any:
+    """Accept names where the schema expects objects: "AWS Certified" becomes {"name": "AWS Certified"}."""
+    value = as_list(value)
+    if not isinstance(value, list):
+        return value
+    return [{"name": str(item)} if isinstance(item, (str, int, float)) else item for item in value if item is not None]
+
+
+def as_skills(value: Any) -> Any:
+    """Accept a flat list (or string) of skills as the technical skills."""
+    if value is None:
+        return {}
+    if isinstance(value, (str, list)):
+        return {"technical": value}
+    return value
+
+
+# Strings are cleaned while they are validated, so parsing, validation and cleanup are one pass
+CleanStr = Annotated[str, BeforeValidator(clean_text)]
+StrList = Annotated[List[CleanStr], BeforeValidator(as_list)]
+ObjectList = Annotated[List[Dict[str, Any]], BeforeValidator(as_objects)]
+
+
+class _CVModel(BaseModel):
+    # Keep fields the schema does not list rather than silently dropping model output
+    model_config = ConfigDict(extra="allow")
+
+    @model_validator(mode="after")
+    def _clean_extra(self):
+        for key, value in (self.__pydantic_extra__ or {}).items():
+            self.__pydantic_extra__[key] = clean_cv_json(value)
+        return self
+
+
+class PersonalInfo(_CVModel):
+    full_name: CleanStr = ""
+    email: StrList = []
+    phone: StrList = []
+    linkedin: Optional[CleanStr] = None
+    address: CleanStr = ""
+    city: CleanStr = ""
+    country: CleanStr = ""
+
+
+class Education(_CVModel):
+    degree: CleanStr = ""
+    institution: CleanStr = ""
+    start_date: CleanStr = ""
+    end_date: CleanStr = ""
+    result: StrList = []
+
+
+class WorkExperience(_CVModel):
+    job_title: CleanStr = ""
+    company: CleanStr = ""
+    dates: CleanStr = ""
+    responsibilities: StrList = []
+    achievements: StrList = []
+
+
+class Skills(_CVModel):
+    technical: StrList = []
+    professional: StrList = []
+
+
+class CVStructure(_CVModel):
+    """Typed form of CV_STRUCTURE_SCHEMA. Missing fields get empty defaults."""
+    personal_info: PersonalInfo = PersonalInfo()
+    education: Annotated[List[Education], BeforeValidator(as_list)] = []
+    work_experience: Annotated[List[WorkExperience], BeforeValidator(as_list)] = []
+    skills: Annotated[Skills, BeforeValidator(as_skills)] = Skills()
+    projects: ObjectList = []
+    publications: ObjectList = []
+    certifications: ObjectList = []
+    awards: ObjectList = []
+    references: ObjectList = []
+    hobbies: StrList = []
+
+    @field_validator("projects", "publications", "certifications", "awards", "references")
+    @classmethod
+    def _clean_objects(cls, value: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        return clean_cv_json(value)
+
+
+class CVParseError(ValueError):
+    """Raised when model output cannot be parsed into a CVStructure, even after repair."""
+
+
+def repair_json(text: str) -> str:
+    """
+    Best-effort repair of a JSON object as LLMs tend to break it: prose or code fences
+    around the object, and output cut off mid-way (closes the open string, drops a
+    dangling key or comma and closes every open bracket).
+    """
+    start = text.find("{")
+    if start < 0:
+        return text
+    text = text[start:]
+
+    stack: List[str] = []
+    in_string = escaped = False
+    end = None
+    for i, char in enumerate(text):
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char in "{[":
+            stack.append("}" if char == "{" else "]")
+        elif char in "}]":
+            if stack:
+                stack.pop()
+            if not stack:
+                end = i + 1
+                break
+    if end is not None:
+        # Complete object followed by trailing prose
+        return text[:end]
+
+    repaired = text
+    if in_string:
+        repaired = repaired[:-1] if escaped else repaired
+        repaired += '"'
+    repaired = repaired.rstrip()
+    closers = "".join(reversed(stack))
+    # Try the cut-off text as-is, then without a dangling comma or colon, then without a
+    # dangling object key, and keep the first candidate that parses
+    without_separator = re.sub(r"[,:]\s*$", "", repaired)
+    without_key = re.sub(r',?\s*"(?:[^"\\]|\\.)*"$', "", without_separator)
+    for candidate in (repaired, without_separator, without_key):
+        try:
+            json.loads(candidate + closers)
+            return candidate + closers
+        except json.JSONDecodeError:
+            continue
+    return repaired + closers
+
+
+def _error_summary(error: ValidationError, limit: int = 5) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in item['loc']) or 'document'}: {item['msg']}"
+        for item in error.errors()[:limit]
+    )
+
+
+def parse_cv_json(text: str, repair: bool = True) -> Dict[str, Any]:
+    """
+    Parse, validate and clean model output in one pass with pydantic-core's JSON parser.
+    Unless `repair` is False, invalid or truncated JSON gets one local repair attempt.
+
+    Raises:
+        CVParseError: If the output cannot be turned into a valid CVStructure
+    """
+    try:
+        return CVStructure.model_validate_json(text).model_dump()
+    except ValidationError as e:
+        error = e
+    if not any(item["type"] == "json_invalid" for item in error.errors()):
+        raise CVParseError(f"CV does not match the schema: {_error_summary(error)}")
+    if not repair:
+        raise CVParseError(f"Invalid CV JSON: {_error_summary(error)}")
+
+    try:
+        parsed = CVStructure.model_validate_json(repair_json(text)).model_dump()
+    except ValidationError as e:
+        raise CVParseError(f"Invalid CV JSON: {_error_summary(e)}")
+    CV_PARSE_REPAIRS.inc(outcome="local")
+    return parsed
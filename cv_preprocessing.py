@@ -0,0 +1,155 @@
+import os
+import re
+import math
+from collections import Counter
+from typing import List, Tuple
+from pydantic import BaseModel
+from cv_chunking import split_sections
+from pdf_extraction import PAGE_BREAK
+from prompts import estimate_tokens
+
+# CV text preprocessing settings
+CV_TEXT_TOKEN_BUDGET = int(os.getenv("CV_TEXT_TOKEN_BUDGET", "12000"))  # 0 disables truncation
+# Lines at the top and bottom of each page checked for repeated headers and footers
+HEADER_FOOTER_LINES = int(os.getenv("HEADER_FOOTER_LINES", "3"))
+
+# Sections kept first when a CV is over the token budget, most important first
+SECTION_PRIORITY = (
+    "personal_info", "work_experience", "skills", "education", "projects", "certifications",
+    "awards", "publications", "references", "hobbies",
+)
+
+PAGE_NUMBER_PATTERN = re.compile(r"^(?:page\s*)?\d{1,3}(?:\s*(?:/|of)\s*\d{1,3})?$", re.IGNORECASE)
+DIGITS_PATTERN = re.compile(r"\d+")
+# Header/footer lines up to this many words may differ in their numbers from page to page
+MAX_NUMBERED_EDGE_WORDS = 6
+# A word broken at a line end: a letter, a hyphen, then a lower-case continuation
+HYPHEN_BREAK_PATTERN = re.compile(r"([A-Za-z])-\n[ \t]*([a-z])")
+LAYOUT_SPACE_PATTERN = re.compile(r"[ \t\u00a0]+")
+BLANK_LINES_PATTERN = re.compile(r"\n{3,}")
+
+
+class PreparedCVText(BaseModel):
+    text: str
+    tokens_before: int
+    tokens_after: int
+    repeated_lines_removed: int
+    truncated_sections: List[str]  # Sections cut short or left out to fit the token budget
+
+
+def _edge_key(line: str) -> str:
+    """
+    Compare header/footer lines ignoring case and spacing, and numbers in short lines
+    ("Page 2 of 5" matches "Page 3 of 5"; longer lines are content and must match exactly).
+    """
+    words = line.split()
+    key = " ".join(words).lower()
+    return DIGITS_PATTERN.sub("#", key) if len(words) <= MAX_NUMBERED_EDGE_WORDS else key
+
+
+def remove_repeated_lines(pages: List[List[str]]) -> Tuple[List[List[str]], int]:
+    """
+    Drop page numbers, and header/footer lines that repeat at the same place (n-th line from
+    the top or bottom) on at least half of the pages (at least two). Only the top and bottom
+    HEADER_FOOTER_LINES lines of each page are looked at. The first copy of a repeated line
+    is kept, so a name in the header is not lost.
+
+    Returns:
+        The pages without the removed lines, and how many lines were removed
+    """
+    def edges(lines: List[str]) -> List[Tuple[int, int]]:
+        """(line index, position) of the edge lines; positions count from 0 at the top and -1 at the bottom."""
+        filled = [index for index, line in enumerate(lines) if line.strip()]
+        top = [(index, position) for position, index in enumerate(filled[:HEADER_FOOTER_LINES])]
+        bottom = [(index, -1 - position) for position, index in enumerate(reversed(filled[-HEADER_FOOTER_LINES:]))]
+        return top + bottom
+
+    page_edges = [edges(lines) for lines in pages]
+    counts = Counter(
+        key for lines, page in zip(pages, page_edges) for key in {(position, _edge_key(lines[index])) for index, position in page}
+    )
+    min_pages = max(2, math.ceil(len(pages) / 2))
+    repeated = {key for key, count in counts.items() if count >= min_pages}
+
+    seen = set()
+    removed = 0
+    cleaned = []
+    for lines, page in zip(pages, page_edges):
+        drop = set()
+        for index, position in page:
+            line = lines[index].strip()
+            key = (position, _edge_key(line))
+            if PAGE_NUMBER_PATTERN.match(line) or (key in repeated and key in seen):
+                drop.add(index)
+            seen.add(key)
+        removed += len(drop)
+        cleaned.append([line for index, line in enumerate(lines) if index not in drop])
+    return cleaned, removed
+
+
+def compact_layout(text: str) -> str:
+    """Rejoin words hyphenated across lines and collapse table padding, trailing spaces and blank runs."""
+    text = HYPHEN_BREAK_PATTERN.sub(r"\1\2", text)
+    lines = [LAYOUT_SPACE_PATTERN.sub(" ", line).strip() for line in text.split("\n")]
+    return BLANK_LINES_PATTERN.sub("\n\n", "\n".join(lines)).strip()
+
+
+def fit_token_budget(text: str, budget: int = CV_TEXT_TOKEN_BUDGET) -> Tuple[str, List[str]]:
+    """
+    Cut CV text down to about `budget` tokens. Going through the sections in SECTION_PRIORITY
+    order, every section that still fits is kept whole; the sections that did not fit then
+    fill what is left of the budget, in the same order, cut at a line boundary. The kept
+    text stays in document order.
+
+    Returns:
+        The text and the sections that were cut or left out
+    """
+    if budget <= 0 or estimate_tokens(text) <= budget:
+        return text, []
+    sections = split_sections(text)
+    rank = {section: index for index, section in enumerate(SECTION_PRIORITY)}
+    order = sorted(range(len(sections)), key=lambda index: rank.get(sections[index][0], len(rank)))
+
+    kept = {}
+    # Sections are joined with a blank line, which costs a token
+    remaining = budget
+    for index in order:
+        tokens = estimate_tokens(sections[index][1]) + 1
+        if tokens <= remaining:
+            kept[index] = sections[index][1]
+            remaining -= tokens
+
+    truncated = []
+    for index in order:
+        if index in kept:
+            continue
+        lines = []
+        for line in sections[index][1].split("\n"):
+            line_tokens = estimate_tokens(line) + 1
+            if line_tokens > remaining:
+                break
+            lines.append(line)
+            remaining -= line_tokens
+        if lines:
+            kept[index] = "\n".join(lines)
+        truncated.append(sections[index][0])
+    return "\n\n".join(kept[index] for index in sorted(kept)), truncated
+
+
+def prepare_cv_text(raw_text: str, budget: int = CV_TEXT_TOKEN_BUDGET) -> PreparedCVText:
+    """
+    Turn raw extracted PDF text (pages separated by PAGE_BREAK) into lean prompt input:
+    repeated headers, footers and page numbers are removed, words broken across lines are
+    rejoined, layout whitespace is collapsed and the text is fit to the token budget.
+    """
+    pages = [page.split("\n") for page in raw_text.split(PAGE_BREAK)]
+    pages, removed = remove_repeated_lines(pages)
+    text = compact_layout("\n".join(line for lines in pages for line in lines))
+    text, truncated = fit_token_budget(text, budget)
+    return PreparedCVText(
+        text=text,
+        tokens_before=estimate_tokens(raw_text.replace(PAGE_BREAK, "\n")),
+        tokens_after=estimate_tokens(text),
+        repeated_lines_removed=removed,
+        truncated_sections=truncated,
+    )
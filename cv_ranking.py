@@ -0,0 +1,236 @@
+import os
+import zlib
+import numpy as np
+import scipy.sparse as sp
+from typing import Any, Dict, List, Optional, Tuple
+from pydantic import BaseModel
+from keyword_matcher import tokenize, stem, STOP_WORDS
+
+# Ranking index settings
+RANKING_FEATURES = int(os.getenv("RANKING_FEATURES", str(2 ** 18)))
+RANKING_SECTION_WEIGHTS = {
+    "skills": float(os.getenv("RANKING_WEIGHT_SKILLS", "0.5")),
+    "work_experience": float(os.getenv("RANKING_WEIGHT_WORK_EXPERIENCE", "0.35")),
+    "education": float(os.getenv("RANKING_WEIGHT_EDUCATION", "0.15")),
+}
+
+
+class RankedCV(BaseModel):
+    cv_id: str
+    score: float  # 0-100
+    section_scores: Dict[str, float]
+
+
+def section_texts(parsed_cv: Dict[str, Any]) -> Dict[str, str]:
+    """Pull the text of the ranked sections out of a parsed CV."""
+    skills = parsed_cv.get("skills") or {}
+    if isinstance(skills, dict):
+        skill_items = list(skills.get("technical") or []) + list(skills.get("professional") or [])
+    else:
+        skill_items = list(skills)
+
+    work_parts = []
+    for job in parsed_cv.get("work_experience") or []:
+        if isinstance(job, dict):
+            work_parts.append(job.get("job_title") or "")
+            work_parts.extend(job.get("responsibilities") or [])
+            work_parts.extend(job.get("achievements") or [])
+
+    education_parts = []
+    for degree in parsed_cv.get("education") or []:
+        if isinstance(degree, dict):
+            education_parts.append(degree.get("degree") or "")
+            education_parts.append(degree.get("institution") or "")
+
+    return {
+        "skills": "\n".join(str(item) for item in skill_items),
+        "work_experience": "\n".join(str(part) for part in work_parts),
+        "education": "\n".join(str(part) for part in education_parts),
+    }
+
+
+def hashed_features(text: str, n_features: int = RANKING_FEATURES) -> Dict[int, float]:
+    """
+    Map text to hashed stemmed unigram and bigram counts.
+    crc32 is used instead of hash() so feature ids are stable across processes.
+    """
+    stems = [stem(token) for token in tokenize(text) if token not in STOP_WORDS]
+    counts: Dict[int, float] = {}
+    for i, term in enumerate(stems):
+        index = zlib.crc32(term.encode()) % n_features
+        counts[index] = counts.get(index, 0.0) + 1.0
+        if i + 1 < len(stems):
+            index = zlib.crc32(f"{term} {stems[i + 1]}".encode()) % n_features
+            counts[index] = counts.get(index, 0.0) + 1.0
+    return counts
+
+
+class CVRankingIndex:
+    """
+    Incremental TF-IDF index of parsed CVs for ranking against a job description.
+
+    Each section is a sparse CSR matrix of sublinear term frequencies over hashed features,
+    so adding CVs never needs a vocabulary rebuild. Document frequencies are kept per section;
+    before the next query after a change, the sections are re-weighted by IDF, L2-normalized and
+    stacked side by side into one matrix, so a query is a single sparse matrix-vector product
+    whose result is the weighted sum of per-section cosine similarities.
+    """
+
+    def __init__(self, n_features: int = RANKING_FEATURES, section_weights: Optional[Dict[str, float]] = None):
+        self.n_features = n_features
+        self.section_weights = dict(section_weights or RANKING_SECTION_WEIGHTS)
+        self.sections = list(self.section_weights)
+        self.ids: List[str] = []
+        self._positions: Dict[str, int] = {}
+        self._active = np.zeros(0, dtype=bool)
+        self._matrices = {name: sp.csr_matrix((0, n_features), dtype=np.float32) for name in self.sections}
+        self._pending: Dict[str, List[Dict[int, float]]] = {name: [] for name in self.sections}
+        self._doc_freq = {name: np.zeros(n_features, dtype=np.float32) for name in self.sections}
+        self._weighted: Optional[sp.csr_matrix] = None
+        self._idf: Dict[str, np.ndarray] = {}
+
+    def __len__(self) -> int:
+        return int(self._active.sum())
+
+    def add(self, cv_id: str, parsed_cv: Dict[str, Any]) -> None:
+        """Add a parsed CV, replacing any earlier CV with the same id."""
+        self.add_many([(cv_id, parsed_cv)])
+
+    def add_many(self, cvs: List[Tuple[str, Dict[str, Any]]]) -> None:
+        """Add parsed CVs, replacing earlier CVs with the same ids; of repeated ids the last one wins."""
+        cvs = list(dict(cvs).items())
+        for cv_id, _ in cvs:
+            self.remove(cv_id, compact=False)
+        texts = [section_texts(parsed_cv) for _, parsed_cv in cvs]
+        for name in self.sections:
+            rows = [hashed_features(text[name], self.n_features) for text in texts]
+            for row in rows:
+                if row:
+                    self._doc_freq[name][list(row)] += 1.0
+            self._pending[name].extend(rows)
+        start = len(self.ids)
+        for offset, (cv_id, _) in enumerate(cvs):
+            self.ids.append(cv_id)
+            self._positions[cv_id] = start + offset
+        self._active = np.concatenate([self._active, np.ones(len(cvs), dtype=bool)])
+        self._weighted = None
+        self._maybe_compact()
+
+    def remove(self, cv_id: str, compact: bool = True) -> bool:
+        """
+        Drop a CV from future rankings. Its row is masked out, and dropped rows are removed
+        from the matrices once they outnumber the active ones.
+        """
+        position = self._positions.pop(cv_id, None)
+        if position is None:
+            return False
+        self._active[position] = False
+        for name in self.sections:
+            self._flush(name)
+            row = self._matrices[name][position]
+            if row.nnz:
+                self._doc_freq[name][row.indices] -= 1.0
+        self._weighted = None
+        if compact:
+            self._maybe_compact()
+        return True
+
+    def _maybe_compact(self) -> None:
+        """Rebuild the matrices without dropped rows once those are more than half of all rows."""
+        if 2 * len(self) >= len(self._active):
+            return
+        keep = np.flatnonzero(self._active)
+        for name in self.sections:
+            self._flush(name)
+            self._matrices[name] = self._matrices[name][keep]
+        self.ids = [self.ids[i] for i in keep]
+        self._positions = {cv_id: position for position, cv_id in enumerate(self.ids)}
+        self._active = np.ones(len(self.ids), dtype=bool)
+        self._weighted = None
+
+    def _flush(self, name: str) -> None:
+        rows = self._pending[name]
+        if not rows:
+            return
+        indptr = np.zeros(len(rows) + 1, dtype=np.int64)
+        indptr[1:] = np.cumsum([len(row) for row in rows])
+        indices = np.fromiter((i for row in rows for i in row), dtype=np.int32, count=int(indptr[-1]))
+        counts = np.fromiter((c for row in rows for c in row.values()), dtype=np.float32, count=int(indptr[-1]))
+        # Sublinear term frequency keeps long CVs from dominating
+        block = sp.csr_matrix((1.0 + np.log(counts), indices, indptr), shape=(len(rows), self.n_features))
+        self._matrices[name] = sp.vstack([self._matrices[name], block], format="csr")
+        self._pending[name] = []
+
+    def _prepare(self) -> sp.csr_matrix:
+        """Build the IDF-weighted, row-normalized matrix of all sections side by side."""
+        if self._weighted is not None:
+            return self._weighted
+        total_docs = float(len(self))
+        blocks = []
+        for name in self.sections:
+            self._flush(name)
+            idf = (np.log((1.0 + total_docs) / (1.0 + np.maximum(self._doc_freq[name], 0.0))) + 1.0).astype(np.float32)
+            weighted = self._matrices[name] @ sp.diags(idf)
+            norms = np.sqrt(np.asarray(weighted.multiply(weighted).sum(axis=1)).ravel())
+            inverse = np.divide(1.0, norms, out=np.zeros_like(norms), where=norms > 0)
+            blocks.append(sp.diags(inverse.astype(np.float32)) @ weighted)
+            self._idf[name] = idf
+        self._weighted = sp.hstack(blocks, format="csr")
+        return self._weighted
+
+    def _query_vectors(self, job_description: str) -> Dict[str, Tuple[np.ndarray, np.ndarray]]:
+        """Return the normalized IDF-weighted query (column indices, values) for each section."""
+        query = hashed_features(job_description, self.n_features)
+        if not query:
+            return {}
+        indices = np.fromiter(query.keys(), dtype=np.int64)
+        tf = 1.0 + np.log(np.fromiter(query.values(), dtype=np.float32))
+        vectors = {}
+        for offset, name in enumerate(self.sections):
+            values = tf * self._idf[name][indices]
+            norm = float(np.sqrt(np.sum(values * values))) or 1.0
+            vectors[name] = (indices + offset * self.n_features, values / norm)
+        return vectors
+
+    def rank(self, job_description: str, top_k: int = 10) -> List[RankedCV]:
+        """
+        Score every active CV against a job description in one sparse matrix-vector
+        product and return the top_k CVs by weighted cosine similarity.
+        """
+        if not len(self):
+            return []
+        matrix = self._prepare()
+        vectors = self._query_vectors(job_description)
+        if not vectors:
+            return []
+
+        weight_sum = sum(self.section_weights.values()) or 1.0
+        query = np.zeros(matrix.shape[1], dtype=np.float32)
+        for name, (indices, values) in vectors.items():
+            query[indices] = values * (self.section_weights[name] / weight_sum)
+        total = matrix @ query
+        total[~self._active] = -1.0
+
+        k = min(top_k, len(self))
+        top = np.argpartition(-total, k - 1)[:k]
+        top = top[np.lexsort((top, -total[top]))]
+
+        # Per-section scores only for the returned rows
+        top_rows = matrix[top]
+        section_scores = {}
+        for name, (indices, values) in vectors.items():
+            section_query = np.zeros(matrix.shape[1], dtype=np.float32)
+            section_query[indices] = values
+            section_scores[name] = top_rows @ section_query
+
+        return [
+            RankedCV(
+                cv_id=self.ids[i],
+                score=round(float(total[i]) * 100.0, 2),
+                section_scores={name: round(float(scores[row]) * 100.0, 2) for name, scores in section_scores.items()},
+            )
+            for row, i in enumerate(top)
+        ]
+
+
+ranking_index = CVRankingIndex()
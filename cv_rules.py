@@ -0,0 +1,127 @@
+import re
+from typing import Any, Dict, List, Tuple
+from pydantic import BaseModel
+from cv_model import CVStructure
+from cv_chunking import split_sections
+
+# Contact patterns, compiled once
+EMAIL_PATTERN = re.compile(r"[\w.+-]+@[\w-]+(?:\.[\w-]+)*\.[A-Za-z]{2,}")
+LINKEDIN_PATTERN = re.compile(r"(?:https?://)?(?:[a-z]{2,3}\.)?linkedin\.com/(?:in|pub)/[\w%-]+/?", re.IGNORECASE)
+PHONE_PATTERN = re.compile(r"(?<![\w/.])\+?\(?\d[\d \t().-]{5,}\d(?![\w/])")
+# Phone numbers have 7 to 15 digits (E.164); other digit runs are dates or IDs
+PHONE_DIGITS = (7, 15)
+# A name line is two to four capitalized words
+NAME_PATTERN = re.compile(r"[A-Z][\w'.-]*(?:[ \t]+[A-Z][\w'.-]*){1,3}")
+NAME_SEARCH_LINES = 3
+
+# Skill lists are split at these separators; a "Label:" prefix on a line is dropped
+SKILL_SEPARATORS = re.compile(r"[,;|•·▪●]| / ")
+SKILL_LABEL = re.compile(r"^[^,:]{1,30}:\s*")
+BULLET = re.compile(r"^\s*(?:[-*–•·▪●]|\d+[.)])\s+")
+# Longer items are prose rather than a skill list, which is left to the LLM
+MAX_SKILL_WORDS = 5
+PROFESSIONAL_SKILL_HEADINGS = frozenset({
+    "soft skills", "professional skills", "interpersonal skills", "core competencies", "competencies",
+})
+
+
+class RuleExtraction(BaseModel):
+    fields: Dict[str, Any]  # Partial CV in CV_STRUCTURE_SCHEMA form
+    complete_sections: Tuple[str, ...]  # Sections fully extracted, which the LLM can skip
+    remaining_text: str  # CV text without the complete sections
+
+    def merge_into(self, parsed_cv: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Return `parsed_cv` (the model's parse of the rest of the CV) with the extracted fields
+        filled in. Extracted fields replace the model's, and complete sections replace them whole.
+        """
+        merged = dict(parsed_cv)
+        for section, value in self.fields.items():
+            if section in self.complete_sections:
+                merged[section] = value
+            else:
+                merged[section] = {**(merged.get(section) or {}), **value}
+        return CVStructure.model_validate(merged).model_dump()
+
+
+def _phones(text: str) -> List[str]:
+    phones = []
+    for match in PHONE_PATTERN.finditer(text):
+        phone = match.group().strip(" \t.-")
+        if PHONE_DIGITS[0] <= sum(char.isdigit() for char in phone) <= PHONE_DIGITS[1]:
+            phones.append(phone)
+    return phones
+
+
+def _full_name(text: str) -> str:
+    """The first of the leading lines of the CV that is nothing but a name."""
+    lines = [line.strip() for line in text.splitlines() if line.strip()]
+    for line in lines[:NAME_SEARCH_LINES]:
+        if NAME_PATTERN.fullmatch(line):
+            return line
+    return ""
+
+
+def _skill_items(section_text: str) -> List[str]:
+    """Split the body of a skills section into items, or return [] if it reads like prose."""
+    items = []
+    for line in section_text.splitlines()[1:]:
+        line = SKILL_LABEL.sub("", BULLET.sub("", line)).strip()
+        for item in SKILL_SEPARATORS.split(line):
+            item = item.strip(" \t.")
+            if not item:
+                continue
+            if len(item.split()) > MAX_SKILL_WORDS:
+                return []
+            items.append(item)
+    return items
+
+
+def extract_cv_fields(text: str) -> RuleExtraction:
+    """
+    Extract the parts of a CV that need no inference with compiled patterns: the name, emails,
+    phone numbers and LinkedIn URL of personal_info, and the skills under skills headings.
+
+    Contact details are only searched in personal_info text (before the first heading or under
+    a contact heading), where digit runs are not dates. Skills are complete when every skills
+    section is a plain list; the rest of personal_info (address, city, country) still needs the LLM.
+    """
+    sections = split_sections(text)
+    personal_text = "\n".join(section_text for section, section_text in sections if section == "personal_info")
+
+    personal_info: Dict[str, Any] = {}
+    full_name = _full_name(sections[0][1]) if sections and sections[0][0] == "personal_info" else ""
+    if full_name:
+        personal_info["full_name"] = full_name
+    emails = list(dict.fromkeys(EMAIL_PATTERN.findall(personal_text)))
+    if emails:
+        personal_info["email"] = emails
+    phones = list(dict.fromkeys(_phones(EMAIL_PATTERN.sub(" ", LINKEDIN_PATTERN.sub(" ", personal_text)))))
+    if phones:
+        personal_info["phone"] = phones
+    linkedin = LINKEDIN_PATTERN.search(text)
+    if linkedin:
+        personal_info["linkedin"] = linkedin.group()
+
+    fields: Dict[str, Any] = {}
+    if personal_info:
+        fields["personal_info"] = personal_info
+
+    skills_sections = [section_text for section, section_text in sections if section == "skills"]
+    skills: Dict[str, List[str]] = {"technical": [], "professional": []}
+    for section_text in skills_sections:
+        items = _skill_items(section_text)
+        if not items:
+            skills_sections = []
+            break
+        heading = section_text.splitlines()[0].strip().rstrip(":").lower()
+        kind = "professional" if heading in PROFESSIONAL_SKILL_HEADINGS else "technical"
+        skills[kind].extend(item for item in items if item not in skills[kind])
+
+    complete_sections: Tuple[str, ...] = ()
+    remaining_text = text
+    if skills_sections:
+        fields["skills"] = skills
+        complete_sections = ("skills",)
+        remaining_text = "\n\n".join(section_text for section, section_text in sections if section != "skills")
+    return RuleExtraction(fields=fields, complete_sections=complete_sections, remaining_text=remaining_text)
@@ -0,0 +1,200 @@
+import os
+import time
+import random
+import asyncio
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+from pydantic import BaseModel
+from shared_store import SharedStore, shared_store
+
+# Generation cache settings
+GENERATION_CACHE_SIZE = int(os.getenv("GENERATION_CACHE_SIZE", "1024"))
+GENERATION_CACHE_VARIANTS = int(os.getenv("GENERATION_CACHE_VARIANTS", "3"))
+GENERATION_CACHE_TTL = float(os.getenv("GENERATION_CACHE_TTL", "86400"))
+
+
+def normalize_key(kind: str, *parts: str) -> str:
+    """Build a cache key that ignores case and whitespace differences in the inputs."""
+    return "\x1f".join([kind] + [" ".join(part.split()).casefold() for part in parts])
+
+
+class GenerationCache:
+    """
+    Cache of generated results keyed by normalized inputs.
+
+    Each key holds a pool of up to `variants` results, so repeated requests still get
+    varied output: until the pool is full every miss generates a new variant, and once it
+    is full a random variant is served. Concurrent misses on the same key share a single
+    in-flight generation (stampede protection). At most `max_keys` keys are kept (LRU)
+    and variants expire after `ttl` seconds.
+
+    With a `shared` store (shared_store.py), variant pools are also written to it and a key
+    whose local pool is not full pulls in the variants other worker processes generated.
+    Values go to the shared store as JSON (pydantic models via model_dump).
+    """
+
+    def __init__(self, max_keys: int = GENERATION_CACHE_SIZE, variants: int = GENERATION_CACHE_VARIANTS,
+                 ttl: float = GENERATION_CACHE_TTL, shared: Optional[SharedStore] = None):
+        self.max_keys = max_keys
+        self.variants = max(1, variants)
+        self.ttl = ttl
+        self.shared = shared
+        self._entries: "OrderedDict[str, List[Tuple[float, Any]]]" = OrderedDict()
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.shared_loads = 0
+        self.shared_errors = 0
+
+    def _fresh(self, key: str) -> List[Tuple[float, Any]]:
+        variants = self._entries.get(key)
+        if not variants:
+            return []
+        now = time.time()
+        fresh = [(stored_at, value) for stored_at, value in variants if now - stored_at <= self.ttl]
+        if len(fresh) != len(variants):
+            self.expirations += len(variants) - len(fresh)
+            if fresh:
+                self._entries[key] = fresh
+            else:
+                del self._entries[key]
+        return fresh
+
+    def _put(self, key: str, variants: List[Tuple[float, Any]]) -> None:
+        self._entries[key] = variants[-self.variants:]
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_keys:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def _store(self, key: str, value: Any) -> None:
+        self._put(key, self._entries.get(key, []) + [(time.time(), value)])
+
+    async def _load_shared(self, key: str, fresh: List[Tuple[float, Any]],
+                           decode: Optional[Callable[[Any], Any]]) -> List[Tuple[float, Any]]:
+        """Merge the variants other processes stored for `key` into its local pool."""
+        try:
+            stored = await self.shared.get(f"gen:{key}") or []
+        except Exception:
+            self.shared_errors += 1
+            return fresh
+        now = time.time()
+        known = {stored_at for stored_at, _ in fresh}
+        loaded = [
+            (stored_at, decode(value) if decode is not None else value)
+            for stored_at, value in stored
+            if stored_at not in known and now - stored_at <= self.ttl
+        ]
+        if not loaded:
+            return fresh
+        self.shared_loads += len(loaded)
+        self._put(key, sorted(fresh + loaded, key=lambda variant: variant[0]))
+        return self._entries.get(key, [])
+
+    async def _save_shared(self, key: str) -> None:
+        variants = [
+            [stored_at, value.model_dump() if isinstance(value, BaseModel) else value]
+            for stored_at, value in self._entries.get(key, [])
+        ]
+        if variants:
+            try:
+                await self.shared.set(f"gen:{key}", variants, self.ttl)
+            except Exception:
+                self.shared_errors += 1
+
+    def _serve(self, key: str, fresh: List[Tuple[float, Any]]) -> Any:
+        self.hits += 1
+        self._entries.move_to_end(key)
+        return random.choice(fresh)[1]
+
+    async def lookup(self, key: str, decode: Optional[Callable[[Any], Any]] = None) -> Optional[Any]:
+        """
+        Return a cached variant when the key's variant pool is full, else None (a miss).
+        For callers that generate many keys together and `add` the results themselves.
+        """
+        fresh = self._fresh(key)
+        if len(fresh) < self.variants and self.shared is not None:
+            fresh = await self._load_shared(key, fresh, decode)
+        if len(fresh) >= self.variants:
+            return self._serve(key, fresh)
+        self.misses += 1
+        return None
+
+    async def add(self, key: str, value: Any) -> None:
+        """Store a variant generated outside get_or_generate."""
+        self._store(key, value)
+        if self.shared is not None:
+            await self._save_shared(key)
+
+    async def get_or_generate(
+        self,
+        key: str,
+        generate: Callable[[], Awaitable[Any]],
+        should_cache: Optional[Callable[[Any], bool]] = None,
+        decode: Optional[Callable[[Any], Any]] = None,
+    ) -> Tuple[Any, bool]:
+        """
+        Return (value, cached). `generate` is only called when the key's variant pool is not
+        full and no generation for the key is already in flight. Values rejected by
+        `should_cache` are returned but not stored. `decode` rebuilds a value read from the
+        shared store (e.g. APIResponse.model_validate).
+        """
+        fresh = self._fresh(key)
+        if len(fresh) < self.variants and self.shared is not None and key not in self._inflight:
+            fresh = await self._load_shared(key, fresh, decode)
+        if len(fresh) >= self.variants:
+            return self._serve(key, fresh), True
+
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            if fresh:
+                return self._serve(key, fresh), True
+            self.coalesced += 1
+            return await asyncio.shield(inflight), True
+
+        self.misses += 1
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            value = await generate()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Nobody may be waiting; retrieve the exception so it is not reported as unhandled
+            future.exception()
+            raise
+        else:
+            stored = should_cache is None or should_cache(value)
+            if stored:
+                self._store(key, value)
+            future.set_result(value)
+        finally:
+            self._inflight.pop(key, None)
+        if stored and self.shared is not None:
+            await self._save_shared(key)
+        return value, False
+
+    def stats(self) -> Dict[str, Any]:
+        served = self.hits + self.coalesced
+        lookups = served + self.misses
+        return {
+            "keys": len(self._entries),
+            "max_keys": self.max_keys,
+            "variants_per_key": self.variants,
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "shared_loads": self.shared_loads,
+            "shared_errors": self.shared_errors,
+            "hit_rate": served / lookups if lookups else 0.0,
+        }
+
+
+generation_cache = GenerationCache(shared=shared_store)
@@ -0,0 +1,246 @@
+import re
+import math
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+from pydantic import BaseModel
+
+# Tokens keep tech spellings such as c++, c#, node.js and ci/cd intact
+TOKEN_PATTERN = re.compile(r"[a-z0-9][a-z0-9+#./-]*[a-z0-9+#]|[a-z0-9]")
+CASED_WORD_PATTERN = re.compile(TOKEN_PATTERN.pattern, re.IGNORECASE)
+SENTENCE_PATTERN = re.compile(r"[.!?;:]+(?:\s+|$)|\n+|\s[-•*]\s")
+# Phrases never span list separators or brackets
+CHUNK_PATTERN = re.compile(r"[,()\[\]{}|&]+")
+# "AWS/Azure" lists alternatives, while short pairs such as "CI/CD" stay one term
+ALTERNATIVES_PATTERN = re.compile(r"(?<=[a-z0-9+#]{3})/(?=[a-z0-9]{3})")
+
+STOP_WORDS = frozenset("""
+a about above across after again against all also am an and any are as at be because been before being
+below between both but by can could did do does doing down during each either etc few for from further
+had has have having he her here hers him his how i if in into is it its itself just may me might more
+most must my no nor not now of off on once only or other our ours out over own per same shall she
+should so some such than that the their theirs them then there these they this those through to too
+under until up upon very via was we well were what when where which while who whom why will with
+within without would you your yours
+""".split())
+
+# Job-posting boilerplate that says little about the role
+GENERIC_TERMS = frozenset("""
+ability able candidate candidates class company description dynamic deliver ensure environment excellent
+exciting experience familiarity fast field good great growing ideal including innovative join knowledge leading
+looking millions mission new nice opportunity passionate plus position preferred proven record related required
+requirement requirements responsibilities responsibility role seeking skill skills strong team teams track
+understanding work working world world-class year years
+""".split())
+
+# Words that mark a sentence about benefits or hiring policy rather than the role; such
+# sentences are left out of keyword extraction, however distinctive their phrases are
+BENEFIT_TERMS = frozenset("""
+401k allowance benefit benefits bonus bonuses compensation dental diversity employer holiday holidays
+inclusion inclusive insurance parental pension perks pto reimbursement salaries salary vacation wellbeing
+wellness
+""".split())
+
+# Suffix rules applied longest first; the replacement keeps stems readable
+SUFFIX_RULES: Tuple[Tuple[str, str], ...] = (
+    ("ational", "ate"), ("ization", "ize"), ("iveness", "ive"), ("fulness", "ful"),
+    ("ousness", "ous"), ("ements", ""), ("ement", ""), ("ments", ""), ("ment", ""),
+    ("ities", "ity"), ("ings", ""), ("ing", ""), ("edly", ""), ("ies", "y"),
+    ("ied", "y"), ("ers", "er"), ("sses", "ss"), ("ches", "ch"), ("shes", "sh"), ("xes", "x"),
+    ("ed", ""), ("ly", ""), ("s", ""),
+)
+
+MAX_PHRASE_LENGTH = 3
+
+
+def stem(token: str) -> str:
+    """Light suffix-stripping stemmer; tokens with symbols (c++, node.js) are kept as-is."""
+    if not token.isalpha() or len(token) <= 3:
+        return token
+    for suffix, replacement in SUFFIX_RULES:
+        if token.endswith(suffix) and len(token) - len(suffix) >= 3:
+            if suffix == "s" and token.endswith(("ss", "us", "sis")):
+                return token
+            return token[: -len(suffix)] + replacement
+    return token
+
+
+def _normalize(text: str) -> str:
+    return ALTERNATIVES_PATTERN.sub(", ", text.lower())
+
+
+def tokenize(text: str) -> List[str]:
+    return TOKEN_PATTERN.findall(_normalize(text))
+
+
+def _is_content(token: str) -> bool:
+    return token not in STOP_WORDS and len(token) > 1 and not token[0].isdigit()
+
+
+def _phrases(text: str) -> Iterable[Tuple[str, ...]]:
+    """
+    Yield candidate terms: single content words, plus 2..MAX_PHRASE_LENGTH word phrases
+    made only of content words that are not job-posting boilerplate.
+    """
+    for chunk in CHUNK_PATTERN.split(_normalize(text)):
+        tokens = tokenize(chunk)
+        for i, token in enumerate(tokens):
+            if not _is_content(token):
+                continue
+            if token not in GENERIC_TERMS:
+                yield (token,)
+            for size in range(2, MAX_PHRASE_LENGTH + 1):
+                gram = tokens[i:i + size]
+                if len(gram) < size or not all(_is_content(t) and t not in GENERIC_TERMS for t in gram):
+                    break
+                yield tuple(gram)
+
+
+def _names(sentences: List[str]) -> Set[str]:
+    """
+    Stems of the words written as names, which are usually tools and technologies: words in
+    capitals (AWS), with symbols (C++, Node.js), or capitalized after the start of a sentence
+    (Tableau). Sentences in title case, such as headings and job titles, are skipped.
+    """
+    names: Set[str] = set()
+    for sentence in sentences:
+        words = CASED_WORD_PATTERN.findall(sentence)
+        if all(word[0].isupper() or word.lower() in STOP_WORDS for word in words):
+            continue
+        for i, word in enumerate(words):
+            if (len(word) > 1 and word.isupper()) or any(char in "+#." for char in word) or (i > 0 and word[0].isupper()):
+                names.update(stem(token) for token in tokenize(word))
+    return names
+
+
+def _stemmed(gram: Tuple[str, ...]) -> str:
+    return " ".join(stem(token) for token in gram)
+
+
+class Keyword(BaseModel):
+    term: str
+    weight: float
+
+
+class KeywordMatch(BaseModel):
+    keyword_match_percentage: float  # 0-100
+    matched_keywords: list[str]
+    missing_keywords: list[str]
+
+
+def extract_keywords(job_description: str, limit: int = 50) -> List[Keyword]:
+    """
+    Rank the keywords and skill phrases of a job description by TF-IDF weight.
+
+    Each sentence of the description is treated as a document, so terms repeated in
+    every sentence (boilerplate) score lower than focused terms. Sentences about benefits
+    and hiring policy (BENEFIT_TERMS) are skipped, since their one-off phrases would
+    otherwise rank as high as the skills. Multi-word phrases get a boost and absorb the
+    shorter terms they contain, except names such as tools and technologies (see _names),
+    which stay keywords of their own. Ties are broken alphabetically, so the ranking is
+    deterministic.
+    """
+    sentences = [s for s in SENTENCE_PATTERN.split(job_description) if s.strip()] or [job_description]
+    sentences = [s for s in sentences if BENEFIT_TERMS.isdisjoint(tokenize(s))] or sentences
+    term_freq: Counter = Counter()
+    doc_freq: Counter = Counter()
+    surface: Dict[str, str] = {}
+    for sentence in sentences:
+        seen: Set[str] = set()
+        for gram in _phrases(sentence):
+            key = _stemmed(gram)
+            term_freq[key] += 1
+            seen.add(key)
+            surface.setdefault(key, " ".join(gram))
+        doc_freq.update(seen)
+
+    names = _names(sentences)
+    total_docs = len(sentences)
+    scored = []
+    for key, tf in term_freq.items():
+        size = key.count(" ") + 1
+        idf = math.log((1 + total_docs) / (1 + doc_freq[key])) + 1.0
+        scored.append((tf * idf * (1.0 + 0.25 * (size - 1)), key))
+    scored.sort(key=lambda item: (-item[0], item[1]))
+
+    keywords: List[Keyword] = []
+    covered: Set[str] = set()
+    for weight, key in scored:
+        if key in covered:
+            continue
+        keywords.append(Keyword(term=surface[key], weight=round(weight, 4)))
+        # A selected phrase makes its shorter sub-phrases redundant, but not the names in it,
+        # which are usually the skills themselves ("tableau" in "building tableau dashboards")
+        parts = key.split()
+        covered.update(
+            " ".join(parts[i:j]) for i in range(len(parts)) for j in range(i + 1, len(parts) + 1)
+            if j - i > 1 or parts[i] not in names
+        )
+        if len(keywords) >= limit:
+            break
+    return keywords
+
+
+def extract_keywords_from_job(job_description: str) -> list[str]:
+    """Extract the top 50 keywords from a job description, most important first."""
+    return [keyword.term for keyword in extract_keywords(job_description)]
+
+
+def flatten_text(data: Any) -> str:
+    """Join every string value of a parsed CV (or any nested JSON) into one text."""
+    if isinstance(data, str):
+        return data
+    if isinstance(data, dict):
+        return "\n".join(flatten_text(value) for value in data.values())
+    if isinstance(data, list):
+        return "\n".join(flatten_text(item) for item in data)
+    return ""
+
+
+def _cv_grams(cv_text: str) -> Set[str]:
+    tokens = tokenize(cv_text)
+    grams: Set[str] = set()
+    for size in range(1, MAX_PHRASE_LENGTH + 1):
+        for i in range(len(tokens) - size + 1):
+            grams.add(" ".join(stem(token) for token in tokens[i:i + size]))
+    return grams
+
+
+def keyword_coverage(cv: Any, job_description: str, limit: int = 50,
+                     keywords: Optional[List[Keyword]] = None) -> KeywordMatch:
+    """
+    Compute the weighted share of job keywords found in a CV.
+    Phrases whose words all occur in the CV, but not as one phrase, earn half their weight.
+
+    Args:
+        cv: Parsed CV dict or raw CV text
+        job_description: Job description text
+        limit: Number of top keywords to match
+        keywords: Keywords already extracted from the job description (e.g. cached)
+
+    Returns:
+        KeywordMatch with the coverage percentage and matched/missing keywords
+    """
+    if keywords is None:
+        keywords = extract_keywords(job_description, limit=limit)
+    if not keywords:
+        return KeywordMatch(keyword_match_percentage=0.0, matched_keywords=[], missing_keywords=[])
+
+    cv_grams = _cv_grams(cv if isinstance(cv, str) else flatten_text(cv))
+    matched, missing = [], []
+    matched_weight = 0.0
+    for keyword in keywords:
+        tokens = tokenize(keyword.term)
+        if _stemmed(tuple(tokens)) in cv_grams:
+            matched.append(keyword.term)
+            matched_weight += keyword.weight
+        else:
+            missing.append(keyword.term)
+            # Half credit for a phrase whose words all appear, just not together
+            if len(tokens) > 1 and all(stem(token) in cv_grams for token in tokens):
+                matched_weight += 0.5 * keyword.weight
+    total_weight = sum(keyword.weight for keyword in keywords)
+    return KeywordMatch(
+        keyword_match_percentage=round(100.0 * matched_weight / total_weight, 2),
+        matched_keywords=matched,
+        missing_keywords=missing,
+    )
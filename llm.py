@@ -0,0 +1,173 @@
+import os
+import time
+import asyncio
+import httpx
+from contextlib import contextmanager
+from groq import AsyncGroq
+from metrics import LLM_DURATION, LLM_ERRORS, current_endpoint, record_usage, stage
+from llm_gateway import get_gateway
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional
+
+# Connection pool and timeout settings for the shared LLM client
+LLM_MAX_CONNECTIONS = int(os.getenv("LLM_MAX_CONNECTIONS", "100"))
+LLM_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("LLM_MAX_KEEPALIVE_CONNECTIONS", "20"))
+LLM_CONNECT_TIMEOUT = float(os.getenv("LLM_CONNECT_TIMEOUT", "5"))
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "60"))
+# Seconds shutdown waits for in-flight LLM calls before the client is closed
+LLM_DRAIN_TIMEOUT = float(os.getenv("LLM_DRAIN_TIMEOUT", "30"))
+
+_client: Optional[AsyncGroq] = None
+_in_flight = 0
+
+
+def get_client() -> AsyncGroq:
+    """
+    Return the process-wide async Groq client, creating it on first use.
+    The client owns a pooled httpx.AsyncClient so connections are reused across requests.
+    GROQ_BASE_URL (read by the SDK) can point it at a local mock server. The SDK's own
+    retries are off; retries are done by the gateway (llm_gateway.py).
+    """
+    global _client
+    if _client is None:
+        http_client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=LLM_MAX_CONNECTIONS,
+                max_keepalive_connections=LLM_MAX_KEEPALIVE_CONNECTIONS,
+            ),
+            timeout=httpx.Timeout(LLM_TIMEOUT, connect=LLM_CONNECT_TIMEOUT),
+        )
+        _client = AsyncGroq(api_key=os.getenv("GROQ_API_KEY"), http_client=http_client, max_retries=0)
+    return _client
+
+
+@contextmanager
+def track_call() -> Iterator[None]:
+    """Count an LLM call (including the consumption of a stream) as in flight."""
+    global _in_flight
+    _in_flight += 1
+    try:
+        yield
+    finally:
+        _in_flight -= 1
+
+
+def in_flight_calls() -> int:
+    return _in_flight
+
+
+async def drain_calls(timeout: float = LLM_DRAIN_TIMEOUT) -> int:
+    """Wait up to `timeout` seconds for in-flight LLM calls to finish and return how many are left."""
+    deadline = time.monotonic() + timeout
+    while _in_flight and time.monotonic() < deadline:
+        await asyncio.sleep(0.05)
+    return _in_flight
+
+
+async def close_client() -> None:
+    """Close the shared client and its connection pool."""
+    global _client
+    if _client is not None:
+        await _client.close()
+        _client = None
+
+
+async def create_completion(
+    messages: List[Dict[str, str]],
+    model: str,
+    max_tokens: int,
+    temperature: float,
+    response_format: Optional[Dict[str, str]] = None,
+    timeout: Optional[float] = None,
+) -> Any:
+    """
+    Run a chat completion without blocking the event loop, through the gateway's
+    rate limiting, circuit breaker, retries and hedging.
+
+    Args:
+        messages: Chat messages in OpenAI format
+        model: Model name
+        max_tokens: Completion token limit
+        temperature: Sampling temperature
+        response_format: Optional response format, e.g. {"type": "json_object"}
+        timeout: Per-call timeout in seconds (defaults to LLM_TIMEOUT)
+
+    Returns:
+        The completion response object
+
+    Raises:
+        LLMUnavailableError: If the provider is down, rate limited or keeps failing
+    """
+    kwargs: Dict[str, Any] = {}
+    if response_format is not None:
+        kwargs["response_format"] = response_format
+
+    async def attempt():
+        start = time.perf_counter()
+        try:
+            raw = await get_client().chat.completions.with_raw_response.create(
+                messages=messages,
+                model=model,
+                max_tokens=max_tokens,
+                temperature=temperature,
+                timeout=timeout if timeout is not None else LLM_TIMEOUT,
+                **kwargs,
+            )
+        except Exception as e:
+            LLM_ERRORS.inc(model=model, type=type(e).__name__)
+            raise
+        LLM_DURATION.observe(time.perf_counter() - start, endpoint=current_endpoint.get(), model=model)
+        response = await raw.parse()
+        record_usage(model, getattr(response, "usage", None))
+        return response, raw.headers
+
+    with track_call(), stage("llm"):
+        return await get_gateway().call(model, attempt)
+
+
+async def stream_completion(
+    messages: List[Dict[str, str]],
+    model: str,
+    max_tokens: int,
+    temperature: float,
+    timeout: Optional[float] = None,
+) -> AsyncIterator[str]:
+    """
+    Run a streaming chat completion and yield content deltas as they arrive.
+    Opening the stream goes through the gateway; once content has been sent, errors are not retried.
+
+    Args:
+        messages: Chat messages in OpenAI format
+        model: Model name
+        max_tokens: Completion token limit
+        temperature: Sampling temperature
+        timeout: Per-call timeout in seconds (defaults to LLM_TIMEOUT)
+    """
+    async def attempt():
+        try:
+            raw = await get_client().chat.completions.with_raw_response.create(
+                messages=messages,
+                model=model,
+                max_tokens=max_tokens,
+                temperature=temperature,
+                timeout=timeout if timeout is not None else LLM_TIMEOUT,
+                stream=True,
+            )
+        except Exception as e:
+            LLM_ERRORS.inc(model=model, type=type(e).__name__)
+            raise
+        return await raw.parse(), raw.headers
+
+    with track_call():
+        start = time.perf_counter()
+        stream = await get_gateway().call(model, attempt, hedge=False)
+        try:
+            async with stream:
+                async for chunk in stream:
+                    if chunk.choices and chunk.choices[0].delta.content:
+                        yield chunk.choices[0].delta.content
+                    # Groq reports token usage on the final chunk
+                    record_usage(model, getattr(getattr(chunk, "x_groq", None), "usage", None))
+        except Exception as e:
+            LLM_ERRORS.inc(model=model, type=type(e).__name__)
+            raise
+        LLM_DURATION.observe(time.perf_counter() - start, endpoint=current_endpoint.get(), model=model)
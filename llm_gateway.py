@@ -0,0 +1,326 @@
+import os
+import re
+import time
+import random
+import asyncio
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Mapping, Optional, Tuple
+import groq
+from metrics import LLM_RETRIES, LLM_HEDGES, LLM_RATE_LIMIT_WAIT, LLM_CIRCUIT_OPEN
+
+# Retry settings: attempts after the first, and the full-jitter exponential backoff range
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "3"))
+LLM_RETRY_BASE_DELAY = float(os.getenv("LLM_RETRY_BASE_DELAY", "0.5"))
+LLM_RETRY_MAX_DELAY = float(os.getenv("LLM_RETRY_MAX_DELAY", "8"))
+# Client-side token bucket: sustained calls per second (0 = unlimited) and burst size
+LLM_RATE_LIMIT_RPS = float(os.getenv("LLM_RATE_LIMIT_RPS", "0"))
+LLM_RATE_LIMIT_BURST = int(os.getenv("LLM_RATE_LIMIT_BURST", "10"))
+# Calls that would wait longer than this for the rate limiter fail fast instead
+LLM_RATE_LIMIT_MAX_WAIT = float(os.getenv("LLM_RATE_LIMIT_MAX_WAIT", "30"))
+# Circuit breaker: consecutive failures that open the circuit, and seconds until a probe call
+LLM_BREAKER_FAILURES = int(os.getenv("LLM_BREAKER_FAILURES", "5"))
+LLM_BREAKER_RESET = float(os.getenv("LLM_BREAKER_RESET", "30"))
+# Hedging: send a duplicate call when the first is slower than this latency quantile
+LLM_HEDGE = os.getenv("LLM_HEDGE", "false").lower() in ("1", "true", "yes")
+LLM_HEDGE_QUANTILE = float(os.getenv("LLM_HEDGE_QUANTILE", "0.95"))
+LLM_HEDGE_MIN_SAMPLES = int(os.getenv("LLM_HEDGE_MIN_SAMPLES", "20"))
+LLM_LATENCY_WINDOW = int(os.getenv("LLM_LATENCY_WINDOW", "200"))
+
+# Errors worth another attempt: connection problems and timeouts, 429s and 5xx responses
+RETRYABLE_ERRORS = (groq.APIConnectionError, groq.RateLimitError, groq.InternalServerError)
+
+# Groq reports rate-limit resets as durations like "2m59.56s" or "120ms"
+DURATION_PART = re.compile(r"(\d+(?:\.\d+)?)(ms|h|m|s)")
+DURATION_UNITS = {"ms": 0.001, "s": 1.0, "m": 60.0, "h": 3600.0}
+
+Attempt = Callable[[], Awaitable[Tuple[Any, Mapping[str, str]]]]
+
+
+class LLMUnavailableError(Exception):
+    """
+    Raised when the LLM provider cannot serve a call: the circuit is open, the rate limiter
+    would wait too long, or transient errors persisted through every retry.
+    """
+
+    def __init__(self, message: str, retry_after: float = 1.0):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def parse_duration(value: str) -> float:
+    """Parse a rate-limit reset value in seconds, either a plain number or a Go-style duration."""
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        pass
+    return sum(float(amount) * DURATION_UNITS[unit] for amount, unit in DURATION_PART.findall(value or ""))
+
+
+def rate_limit_delay(headers: Optional[Mapping[str, str]]) -> float:
+    """
+    Seconds to hold off new calls according to the provider's rate-limit headers: the
+    Retry-After of a 429, or the reset time of an exhausted request or token budget.
+    """
+    if not headers:
+        return 0.0
+    delay = parse_duration(headers.get("retry-after", ""))
+    for kind in ("requests", "tokens"):
+        try:
+            exhausted = float(headers.get(f"x-ratelimit-remaining-{kind}", "")) <= 0
+        except ValueError:
+            exhausted = False
+        if exhausted:
+            delay = max(delay, parse_duration(headers.get(f"x-ratelimit-reset-{kind}", "")))
+    return delay
+
+
+class TokenBucket:
+    """
+    Client-side rate limiter shared by all LLM calls: `rate` calls per second on average
+    with bursts of up to `capacity`. A rate of 0 disables the steady limit, but pauses
+    requested by the provider's rate-limit headers still apply.
+    """
+
+    def __init__(self, rate: float = LLM_RATE_LIMIT_RPS, capacity: int = LLM_RATE_LIMIT_BURST):
+        self.rate = rate
+        self.capacity = max(1, capacity)
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+
+    def pause(self, seconds: float) -> None:
+        """Hold off all calls for `seconds`, e.g. until the provider's rate limit resets."""
+        self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+    def _wait_time(self) -> float:
+        now = time.monotonic()
+        if self.rate > 0:
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+        wait = max(0.0, self._paused_until - now)
+        if self.rate > 0 and self._tokens < 1:
+            wait = max(wait, (1 - self._tokens) / self.rate)
+        return wait
+
+    def try_acquire(self) -> bool:
+        """Take a token if one is available right now."""
+        if self._wait_time() > 0:
+            return False
+        if self.rate > 0:
+            self._tokens -= 1
+        return True
+
+    async def acquire(self, max_wait: float = LLM_RATE_LIMIT_MAX_WAIT) -> None:
+        """
+        Wait for a token.
+
+        Raises:
+            LLMUnavailableError: If getting a token would take longer than `max_wait`
+        """
+        waited = 0.0
+        while not self.try_acquire():
+            wait = self._wait_time()
+            if waited + wait > max_wait:
+                raise LLMUnavailableError("LLM rate limit reached, try again later", retry_after=wait)
+            await asyncio.sleep(wait)
+            waited += wait
+            LLM_RATE_LIMIT_WAIT.inc(wait)
+
+
+class CircuitBreaker:
+    """
+    Fails calls fast while the provider is down. After `failure_threshold` consecutive
+    failures the circuit opens; once `reset_timeout` has passed a single probe call is let
+    through (half-open), and its outcome closes the circuit or opens it again.
+    """
+
+    def __init__(self, failure_threshold: int = LLM_BREAKER_FAILURES, reset_timeout: float = LLM_BREAKER_RESET):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = "closed"
+        self._failures = 0
+        self._opened_at = 0.0
+        LLM_CIRCUIT_OPEN.set(0)
+
+    def before_call(self) -> None:
+        """
+        Raises:
+            LLMUnavailableError: If the circuit is open, or half-open with a probe in flight
+        """
+        if self.state == "closed":
+            return
+        now = time.monotonic()
+        remaining = self._opened_at + self.reset_timeout - now
+        if remaining <= 0:
+            # Let one probe through; another only if it has not finished within reset_timeout
+            self.state = "half_open"
+            self._opened_at = now
+            return
+        raise LLMUnavailableError("LLM provider is unavailable, try again later", retry_after=max(remaining, 1.0))
+
+    def record_success(self) -> None:
+        self._failures = 0
+        if self.state != "closed":
+            self.state = "closed"
+            LLM_CIRCUIT_OPEN.set(0)
+
+    def record_failure(self) -> None:
+        self._failures += 1
+        if self.state == "half_open" or self._failures >= self.failure_threshold:
+            self.state = "open"
+            self._opened_at = time.monotonic()
+            LLM_CIRCUIT_OPEN.set(1)
+
+
+class LatencyTracker:
+    """Recent latencies of successful calls per model, for the hedging threshold."""
+
+    def __init__(self, window: int = LLM_LATENCY_WINDOW):
+        self.window = window
+        self._samples: Dict[str, Deque[float]] = {}
+
+    def observe(self, model: str, seconds: float) -> None:
+        self._samples.setdefault(model, deque(maxlen=self.window)).append(seconds)
+
+    def quantile(self, model: str, q: float, min_samples: int) -> Optional[float]:
+        samples = self._samples.get(model)
+        if not samples or len(samples) < min_samples:
+            return None
+        ordered = sorted(samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class LLMGateway:
+    """
+    Single entry point for LLM calls: rate limiting, circuit breaking, retries with
+    jittered backoff and optional hedging around an attempt function that makes one
+    provider call and returns the result with the response headers.
+    """
+
+    def __init__(
+        self,
+        max_retries: int = LLM_MAX_RETRIES,
+        base_delay: float = LLM_RETRY_BASE_DELAY,
+        max_delay: float = LLM_RETRY_MAX_DELAY,
+        rate: float = LLM_RATE_LIMIT_RPS,
+        burst: int = LLM_RATE_LIMIT_BURST,
+        max_wait: float = LLM_RATE_LIMIT_MAX_WAIT,
+        breaker_failures: int = LLM_BREAKER_FAILURES,
+        breaker_reset: float = LLM_BREAKER_RESET,
+        hedge: bool = LLM_HEDGE,
+        hedge_quantile: float = LLM_HEDGE_QUANTILE,
+        hedge_min_samples: int = LLM_HEDGE_MIN_SAMPLES,
+    ):
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.max_wait = max_wait
+        self.hedge = hedge
+        self.hedge_quantile = hedge_quantile
+        self.hedge_min_samples = hedge_min_samples
+        self.bucket = TokenBucket(rate, burst)
+        self.breaker = CircuitBreaker(breaker_failures, breaker_reset)
+        self.latency = LatencyTracker()
+
+    def backoff(self, retry: int) -> float:
+        """Full-jitter exponential backoff before retry number `retry` (0-based)."""
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** retry))
+
+    async def call(self, model: str, attempt: Attempt, hedge: bool = True) -> Any:
+        """
+        Run `attempt` until it succeeds, retrying transient errors up to `max_retries` times.
+        Other errors (e.g. a 400 for a bad request) are raised as they are.
+
+        Raises:
+            LLMUnavailableError: If the circuit is open, the rate limiter would wait too long,
+                or the call still fails after every retry
+        """
+        for retry in range(self.max_retries + 1):
+            self.breaker.before_call()
+            await self.bucket.acquire(self.max_wait)
+            try:
+                result, headers = await self._attempt(model, attempt, hedge)
+            except RETRYABLE_ERRORS as e:
+                delay = rate_limit_delay(getattr(getattr(e, "response", None), "headers", None))
+                if isinstance(e, groq.RateLimitError):
+                    # Throttled, not down: hold off every call until the limit resets
+                    self.breaker.record_success()
+                    self.bucket.pause(delay or self.backoff(retry))
+                else:
+                    self.breaker.record_failure()
+                if retry == self.max_retries:
+                    raise LLMUnavailableError(
+                        f"LLM provider failed after {retry + 1} attempts: {type(e).__name__}",
+                        retry_after=max(delay, 1.0),
+                    ) from e
+                LLM_RETRIES.inc(model=model, reason=type(e).__name__)
+                await asyncio.sleep(self.backoff(retry))
+            except groq.APIStatusError:
+                # The provider answered, so it is up; the request itself is at fault
+                self.breaker.record_success()
+                raise
+            else:
+                self.breaker.record_success()
+                pause = rate_limit_delay(headers)
+                if pause > 0:
+                    self.bucket.pause(pause)
+                return result
+
+    async def _attempt(self, model: str, attempt: Attempt, hedge: bool) -> Tuple[Any, Mapping[str, str]]:
+        """
+        Make one call. With hedging on, a duplicate call is sent once the first has taken
+        longer than the recent latency quantile, if the rate limiter has a token to spare,
+        and the first of the two to succeed wins.
+        """
+        threshold = None
+        if self.hedge and hedge:
+            threshold = self.latency.quantile(model, self.hedge_quantile, self.hedge_min_samples)
+        start = time.perf_counter()
+        if threshold is None:
+            result = await attempt()
+            self.latency.observe(model, time.perf_counter() - start)
+            return result
+
+        primary = asyncio.ensure_future(attempt())
+        done, _ = await asyncio.wait({primary}, timeout=threshold)
+        if done or not self.bucket.try_acquire():
+            result = await primary
+            self.latency.observe(model, time.perf_counter() - start)
+            return result
+
+        LLM_HEDGES.inc(model=model, outcome="fired")
+        hedge_start = time.perf_counter()
+        backup = asyncio.ensure_future(attempt())
+        pending = {primary, backup}
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is backup:
+                            LLM_HEDGES.inc(model=model, outcome="won")
+                        self.latency.observe(model, time.perf_counter() - (hedge_start if task is backup else start))
+                        return task.result()
+            # Both calls failed: report the first call's error
+            raise primary.exception()
+        finally:
+            for task in (primary, backup):
+                if not task.done():
+                    task.cancel()
+
+
+_gateway: Optional[LLMGateway] = None
+
+
+def get_gateway() -> LLMGateway:
+    global _gateway
+    if _gateway is None:
+        _gateway = LLMGateway()
+    return _gateway
+
+
+def configure_gateway(**kwargs) -> LLMGateway:
+    """Replace the shared gateway, e.g. to change retry or hedging settings in benchmarks."""
+    global _gateway
+    _gateway = LLMGateway(**kwargs)
+    return _gateway
@@ -1,104 +1,199 @@
 import os
-import re
+import math
 import json
+import signal
 import logging
+import asyncio
+import threading
+from pathlib import Path
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, HTTPException, UploadFile, File,Form
-from pydantic import BaseModel
-from groq import Groq
+from fastapi import Request
+from fastapi.exceptions import RequestValidationError
+from fastapi.exception_handlers import http_exception_handler, request_validation_exception_handler
+from fastapi.responses import StreamingResponse, PlainTextResponse
+from starlette.exceptions import HTTPException as StarletteHTTPException
+from pydantic import BaseModel, BeforeValidator, Field
 import time
 import random
-import pdfplumber
-from typing import Dict, Any, Optional
-from tempfile import NamedTemporaryFile
+from typing import Annotated, Callable, Dict, Any, Literal, Optional
 from dotenv import load_dotenv
-app = FastAPI()
 
 load_dotenv()
 
-# Initialize Groq client
-client = Groq(api_key=os.getenv("GROQ_API_KEY"))  # Ensure GROQ_API_KEY is set in your environment
-
-CV_STRUCTURE_SCHEMA = {
-    "title": "CVStructure",
-    "description": "Structured representation of a curriculum vitae (CV) extracted from text.",
-    "type": "object",
-    "properties": {
-        "personal_info": {
-            "type": "object",
-            "properties": {
-                "full_name": {"type": "string"},
-                "email": {"type": "array", "items": {"type": "string"}},
-                "phone": {"type": "array", "items": {"type": "string"}},
-                "linkedin": {"type": ["string", "null"]},
-                "address": {"type": "string"},
-                "city": {"type": "string"},
-                "country": {"type": "string"}
-            },
-            "required": ["full_name", "email", "phone", "linkedin", "address", "city", "country"]
-        },
-        "education": {
-            "type": "array",
-            "items": {
-                "type": "object",
-                "properties": {
-                    "degree": {"type": "string"},
-                    "institution": {"type": "string"},
-                    "start_date": {"type": "string"},
-                    "end_date": {"type": "string"},
-                    "result": {"type": "array", "items": {"type": "string"}}
-                },
-                "required": ["degree", "institution", "start_date", "end_date", "result"]
-            }
-        },
-        "work_experience": {
-            "type": "array",
-            "items": {
-                "type": "object",
-                "properties": {
-                    "job_title": {"type": "string"},
-                    "company": {"type": "string"},
-                    "dates": {"type": "string"},
-                    "responsibilities": {"type": "array", "items": {"type": "string"}},
-                    "achievements": {"type": "array", "items": {"type": "string"}}
-                },
-                "required": ["job_title", "company", "dates", "responsibilities", "achievements"]
-            }
-        },
-        "skills": {
-            "type": "object",
-            "properties": {
-                "technical": {"type": "array", "items": {"type": "string"}},
-                "professional": {"type": "array", "items": {"type": "string"}}
-            },
-            "required": ["technical", "professional"]
-        },
-        "projects": {
-            "type": "array",
-            "items": {"type": "object"}
-        },
-        "publications": {
-            "type": "array",
-            "items": {"type": "object"}
-        },
-        "certifications": {
-            "type": "array",
-            "items": {"type": "object"}
-        },
-        "awards": {
-            "type": "array",
-            "items": {"type": "object"}
-        },
-        "references": {
-            "type": "array",
-            "items": {"type": "object"}
-        },
-        "hobbies": {
-            "type": "array",
-            "items": {"type": "string"}
-        }
-    },
-    "required": ["personal_info", "education", "work_experience", "skills", "projects", "publications", "certifications", "awards", "references", "hobbies"]
-}
+from llm import create_completion, stream_completion, get_client, close_client, drain_calls, in_flight_calls
+from llm_gateway import get_gateway
+from llm_gateway import LLMUnavailableError
+from model_routing import get_route, route_completion
+from pdf_extraction import extract_pdf_text, shutdown_extractor, get_extractor, PDFQueueFullError, PDFWorkerCrashedError
+from cv_cache import cv_cache, make_cv_key
+from shared_store import shared_store
+from pdf_ingestion import PDFUpload, read_pdf_upload, UploadTooLargeError, UploadSizeLimitMiddleware, PDF_SPILL_THRESHOLD
+from starlette.formparsers import MultiPartParser
+from keyword_matcher import keyword_coverage, extract_keywords, KeywordMatch
+from cv_ranking import ranking_index, RankedCV
+from output_cleaner import clean_output, clean_batch, IncrementalCleaner
+from generation_cache import generation_cache, normalize_key
+from similarity_cache import title_index, description_index
+from batch_generation import (
+    BatchItem, BATCH_ENTRY_TOKENS, GENERATION_BATCH_CONCURRENCY, GENERATION_BATCH_MAX_ITEMS,
+    batch_prompt_items, pack_items, parse_batch_entries,
+)
+from prompts import CV_STRUCTURE_SCHEMA, compact_json, get_prompt, estimate_tokens, section_schema_json
+from cv_model import CVParseError, parse_cv_json, as_list
+from cv_chunking import chunk_cv_text, merge_cv_parts, ALL_SECTIONS, LONG_CV_THRESHOLD_TOKENS
+from cv_rules import extract_cv_fields
+from cv_preprocessing import prepare_cv_text
+from ats_sections import SECTION_TITLES, relevant_sections, clamp_score, overall_score, overall_feedback, merge_recommendations
+from ats_jobs import ATSJob, ATSJobRunner, ATS_JOB_DRAIN_TIMEOUT, resolve_webhook_address
+from metrics import REGISTRY, ERRORS, BATCH_GENERATION_ENTRIES, CV_PARSE_REPAIRS, CV_TEXT_TOKENS, MODEL_ROUTING, MetricsMiddleware, Gauge, current_endpoint, root_cause, stage
+from app_logging import setup_logging, shutdown_logging, log_payload, RequestIDMiddleware
+
+setup_logging()
+logger = logging.getLogger(__name__)
+
+# Per-call LLM timeouts (seconds)
+TEXT_LLM_TIMEOUT = float(os.getenv("TEXT_LLM_TIMEOUT", "30"))
+CV_LLM_TIMEOUT = float(os.getenv("CV_LLM_TIMEOUT", "90"))
+
+# Generation cache pre-warm settings
+PREWARM_TITLES_FILE = os.getenv("PREWARM_TITLES_FILE", "")
+PREWARM_CONCURRENCY = int(os.getenv("PREWARM_CONCURRENCY", "4"))
+# Limits of one POST /cache/prewarm request; inputs are titles x (1 + industries)
+PREWARM_MAX_TITLES = int(os.getenv("PREWARM_MAX_TITLES", "100"))
+PREWARM_MAX_INDUSTRIES = int(os.getenv("PREWARM_MAX_INDUSTRIES", "10"))
+PREWARM_MAX_INPUTS = int(os.getenv("PREWARM_MAX_INPUTS", "300"))
+
+# Strong references to fire-and-forget tasks so they are not garbage collected
+background_tasks: set[asyncio.Task] = set()
+
+def install_drain_handler(app: FastAPI) -> None:
+    """
+    Mark the app as draining on SIGTERM, so /health/ready fails while the server finishes
+    in-flight requests, then hand the signal on to the server's own handler.
+    """
+    if threading.current_thread() is not threading.main_thread():
+        return
+    previous = signal.getsignal(signal.SIGTERM)
+
+    def handle_sigterm(signum, frame):
+        app.state.draining = True
+        if callable(previous):
+            previous(signum, frame)
+
+    signal.signal(signal.SIGTERM, handle_sigterm)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    app.state.ready = False
+    app.state.draining = False
+    # Each worker process creates its own LLM client and connection pool
+    get_client()
+    # Drop expired parsed CV entries and shared cache entries left from previous runs
+    await asyncio.to_thread(cv_cache.evict_expired)
+    if shared_store is not None:
+        await asyncio.to_thread(shared_store.evict_expired)
+    if PREWARM_TITLES_FILE:
+        titles = load_prewarm_titles(PREWARM_TITLES_FILE)
+        task = asyncio.create_task(prewarm_generation_cache(titles))
+        background_tasks.add(task)
+        task.add_done_callback(background_tasks.discard)
+    await ats_job_runner.start()
+    install_drain_handler(app)
+    app.state.ready = True
+    yield
+    app.state.draining = True
+    # Let running ATS jobs and LLM calls finish, hand unfinished jobs back to the queue,
+    # then release pooled LLM connections and PDF workers
+    await ats_job_runner.stop(ATS_JOB_DRAIN_TIMEOUT)
+    # Cache pre-warming is not worth waiting for
+    for task in list(background_tasks):
+        task.cancel()
+    remaining = await drain_calls()
+    if remaining:
+        logger.warning("Closing the LLM client with calls still in flight", extra={"calls": remaining})
+    await close_client()
+    if shared_store is not None:
+        await shared_store.close()
+    shutdown_extractor()
+    shutdown_logging()
+
+async def extract_text_or_503(path: str) -> str:
+    """Extract PDF text in the worker pool, turning a full queue or crashed workers into a 503."""
+    try:
+        return await extract_pdf_text(path)
+    except PDFQueueFullError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
+    except PDFWorkerCrashedError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+
+async def create_completion_or_503(**kwargs) -> Any:
+    """Run an LLM completion, turning an unavailable or rate-limited provider into a 503."""
+    try:
+        return await create_completion(**kwargs)
+    except LLMUnavailableError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": str(math.ceil(e.retry_after))})
+
+async def read_upload_or_413(file: UploadFile) -> PDFUpload:
+    """Read an uploaded PDF in chunks, turning an oversized upload into a 413."""
+    try:
+        with stage("upload_read"):
+            return await read_pdf_upload(file)
+    except UploadTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+
+# Keep uploads below the spill threshold in memory while the multipart form is parsed
+MultiPartParser.spool_max_size = PDF_SPILL_THRESHOLD
+
+app = FastAPI(lifespan=lifespan)
+app.add_middleware(UploadSizeLimitMiddleware)
+app.add_middleware(MetricsMiddleware)
+app.add_middleware(RequestIDMiddleware)
+
+CACHE_STATS = REGISTRY.register(Gauge(
+    "cache_stat", "Cache counters and sizes, by cache and statistic.", ("cache", "stat")))
+PDF_QUEUE = REGISTRY.register(Gauge(
+    "pdf_extraction_pending", "PDFs being extracted or waiting for a worker."))
+ATS_JOBS = REGISTRY.register(Gauge(
+    "ats_jobs", "ATS scoring jobs in the job store, by status.", ("status",)))
+
+def collect_cache_stats() -> None:
+    for cache_name, stats in (("parsed_cv", cv_cache.stats()), ("generation", generation_cache.stats()),
+                              ("similar_titles", title_index.stats()), ("similar_descriptions", description_index.stats())):
+        for stat_name, value in stats.items():
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                CACHE_STATS.set(value, cache=cache_name, stat=stat_name)
+    PDF_QUEUE.set(get_extractor().pending)
+
+REGISTRY.add_collector(collect_cache_stats)
+
+@app.exception_handler(StarletteHTTPException)
+async def record_http_error(request: Request, exc: StarletteHTTPException):
+    """Count failed requests by their root cause before returning the usual error response."""
+    cause = root_cause(exc)
+    error_type = type(cause).__name__ if cause is not exc else f"http_{exc.status_code}"
+    ERRORS.inc(endpoint=current_endpoint.get(), type=error_type)
+    if exc.status_code >= 500:
+        logger.error(
+            "Request failed",
+            exc_info=cause if cause is not exc else None,
+            extra={"endpoint": current_endpoint.get(), "status": exc.status_code, "error_type": error_type},
+        )
+    return await http_exception_handler(request, exc)
+
+@app.exception_handler(RequestValidationError)
+async def record_validation_error(request: Request, exc: RequestValidationError):
+    ERRORS.inc(endpoint=current_endpoint.get(), type="RequestValidationError")
+    return await request_validation_exception_handler(request, exc)
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Prometheus text exposition of request, stage, LLM and cache metrics."""
+    # The job store is SQLite, so it is counted off the event loop rather than in a collector
+    job_counts = await asyncio.to_thread(ats_job_runner.store.counts)
+    for status in ("queued", "running", "done", "failed"):
+        ATS_JOBS.set(job_counts.get(status, 0), status=status)
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
 
 # Pydantic model for CV structure response
 class CVStructureResponse(BaseModel):
@@ -131,141 +226,106 @@ class APIResponse(BaseModel):
     execution_time: float
     temperature: float
 
-def clean_output(text: str, output_type: str) -> str:
+def accepts_cleaned(output_type: str) -> Callable[[str], bool]:
+    """Routing validation of a text generation: it must not clean to nothing."""
+    return lambda text: bool(clean_output(text, output_type=output_type))
+
+def is_json_object(text: str) -> bool:
+    """Routing validation of a JSON generation."""
+    try:
+        return isinstance(json.loads(text), dict)
+    except ValueError:
+        return False
+
+def sse_event(event: str, data: Dict[str, Any]) -> str:
+    """Format one Server-Sent Event."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+def stream_generation(messages: list[Dict[str, str]], model: str, max_tokens: int, temperature: float,
+                      output_type: str, error_message: str) -> StreamingResponse:
     """
-    Clean the generated output based on the output type (summary, responsibilities, skills).
-    Removes harmful special characters, normalizes whitespace, and formats appropriately.
-    
-    Args:
-        text: Raw output from the Groq API
-        output_type: One of 'summary', 'responsibilities', or 'skills'
-    
-    Returns:
-        Cleaned and formatted text
-    # """
-    # # Define harmful special characters to remove (allow %, ,, ' for valid use)
-    # harmful_chars = r'[\*\\/#<>]'
-    
-    # # Remove harmful characters and normalize whitespace
-    # cleaned_text = re.sub(harmful_chars, '', text)
-    # cleaned_text = re.sub(r'\s+', ' ', cleaned_text).strip()
-    
-    if output_type == 'summary':
-        # Define harmful special characters to remove (allow %, ,, ' for valid use)
-        harmful_chars = r'[\*\\/#<>]'
-        
-        # Remove harmful characters and normalize whitespace
-        cleaned_text = re.sub(harmful_chars, '', text)
-        cleaned_text = re.sub(r'\s+', ' ', cleaned_text).strip()
-        # For summary: Ensure proper sentence structure, handle single or multiple sentences
-        sentences = [s.strip() for s in cleaned_text.split('.') if s.strip()]
-        if not sentences:  # Handle empty or malformed input
-            return ""
-        cleaned_sentences = [s + '.' for s in sentences if not s.endswith('.')]
-        cleaned_sentences = [s[:-1] if s.endswith('..') else s for s in cleaned_sentences]
-        return ' '.join(cleaned_sentences) if cleaned_sentences else cleaned_text + '.'
-    
-    elif output_type == 'responsibilities':
-        # Define harmful special characters to remove (allow %, ,, ' for valid use)
-        harmful_chars = r'[\*\\/#<>]'
-        
-        # Remove harmful characters and normalize whitespace
-        cleaned_text = re.sub(harmful_chars, '', text)
-        cleaned_text = re.sub(r'\s+', ' ', cleaned_text).strip()
-        # For responsibilities: Separate sentences with \n, ensure proper formatting
-        sentences = [s.strip() for s in cleaned_text.split('.') if s.strip()]
-        if not sentences:
-            return ""
-        cleaned_sentences = [s + '.' for s in sentences if not s.endswith('.')]
-        cleaned_sentences = [s[:-1] if s.endswith('..') else s for s in cleaned_sentences]
-        return '\n'.join(cleaned_sentences)
-    
-    elif output_type == 'skills':
-        # Define harmful special characters to remove (allow %, ,, ' for valid use)
-        harmful_chars = r'[\*\\/#<>]'
-        
-        # Remove harmful characters and normalize whitespace
-        cleaned_text = re.sub(harmful_chars, '', text)
-        cleaned_text = re.sub(r'\s+', ' ', cleaned_text).strip()
-        skills = []
-        for s in re.split(r'[,\.\n]\s*', cleaned_text):
-            # Clean each potential skill
-            skill = re.sub(r'[^\w\s-]', '', s).strip()
-            if skill:
-                skills.append(skill)
-        if not skills:
-            print(f"Debug: No valid skills found. Raw: {cleaned_text}")
-            return ""
-        # Format as 'skill1', 'skill2', ...
-        formatted_skills = [f"'{s}'" for s in skills]
-        result = ', '.join(formatted_skills)
-        print(f"Debug: Cleaned skills: {result}")
-        return result
-    
-    elif output_type == 'cv_structure':
+    Stream a text generation as Server-Sent Events.
+    Streams are not escalated to another model, so they run on the primary model of the route.
+    Cleaned text is sent in "token" events as soon as a full sentence (or skill) is available;
+    the final "done" event carries the full cleaned text with word_count and execution_time.
+    Failures after the stream has started are reported in an "error" event.
+    """
+    async def events():
+        start_time = time.time()
+        cleaner = IncrementalCleaner(output_type)
         try:
-            json_data = json.loads(text) if isinstance(text, str) else text
-            def clean_text_fields(data):
-                if isinstance(data, str):
-                    # Preserve / in GPA formats, remove other harmful characters
-                    cleaned = re.sub(r'[\*\><]', '', data)
-                    return re.sub(r'\s+', ' ', cleaned).strip()
-                elif isinstance(data, list):
-                    return [clean_text_fields(item) for item in data]
-                elif isinstance(data, dict):
-                    return {k: clean_text_fields(v) for k, v in data.items()}
-                return data
-            result = json.dumps(clean_text_fields(json_data))
-            return result
-        except json.JSONDecodeError:
-            return text
-        
+            async for delta in stream_completion(
+                messages=messages,
+                model=model,
+                max_tokens=max_tokens,
+                temperature=temperature,
+                timeout=TEXT_LLM_TIMEOUT,
+            ):
+                cleaned = cleaner.feed(delta)
+                if cleaned:
+                    yield sse_event("token", {"text": cleaned})
+            cleaned = cleaner.finish()
+            if cleaned:
+                yield sse_event("token", {"text": cleaned})
 
+            # End timing
+            execution_time = time.time() - start_time
 
-    else:
-        raise ValueError(f"Invalid output_type: {output_type}")
+            generated_summary = clean_output(cleaner.raw_text, output_type=output_type)
+            yield sse_event("done", {
+                "generated_summary": generated_summary,
+                "word_count": len(generated_summary.split()),
+                "execution_time": execution_time,
+                "temperature": temperature,
+            })
+        except Exception as e:
+            yield sse_event("error", {"detail": f"{error_message}: {str(e)}"})
 
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 @app.post("/generate/cv_summary", response_model=APIResponse)
-async def generate_cv_summary(request: CVSummaryRequest):
+async def generate_cv_summary(request: CVSummaryRequest, stream: bool = False):
     try:
         # Extract request data
         word_length = request.word_length
         range_a = word_length - random.randint(5, 6)# max(50, word_length - random.randint(5, 10))
         range_b = word_length + random.randint(5, 6)#min(100, word_length + random.randint(5, 10))
-        max_tokens = 1024
+        prompt = get_prompt("cv_summary")
+        max_tokens = prompt.max_tokens
         temperature = round(random.uniform(0.2, 0.5), 2)
 
-        # Create user prompt
-        user_message = (
-            f"Professional Background: '{request.professional_background}', "
-            f"Quantifiable Achievements: '{request.quantifiable_achievements}', "
-            f"Skills and Certifications: '{request.skills_and_certifications}', "
-            f"Education: '{request.education}', "
-            f"Target Role/Company: '{request.target_role_company}', "
-            f"Career Goals: '{request.career_goals if request.career_goals else 'Not specified'}'. "
-            f"Ensure the summary is persuasive, tailored to the target role, and suitable for a professional CV. "
-            f"Provide only the summary using multiple sentences, without any additional text."
+        # Create prompt
+        messages = prompt.render(
+            range_a=range_a,
+            range_b=range_b,
+            professional_background=request.professional_background,
+            quantifiable_achievements=request.quantifiable_achievements,
+            skills_and_certifications=request.skills_and_certifications,
+            education=request.education,
+            target_role_company=request.target_role_company,
+            career_goals=request.career_goals if request.career_goals else 'Not specified',
         )
 
+        if stream:
+            return stream_generation(messages, get_route("cv_summary").primary, max_tokens, temperature,
+                                     "summary", "Error generating summary")
+
         # Start timing
         start_time = time.time()
 
-        # Generate summary using Groq API
-        response = client.chat.completions.create(
-            messages=[
-                {
-                    "role": "system",
-                    "content": (
-                        f"You are a professional resume summary writer. Your task is to generate a detailed, engaging, and professional resume summary "
-                        f"within {range_a} to {range_b} words based on provided details."
-                    )
-                },
-                {"role": "user", "content": user_message}
-            ],
-            model="llama-3.3-70b-versatile",
+        # Generate summary using Groq API, on the model(s) routed for summaries
+        response = await route_completion(
+            "cv_summary",
+            create_completion_or_503,
+            accepts_cleaned("summary"),
+            messages=messages,
             max_tokens=max_tokens,
             temperature=temperature,
+            timeout=TEXT_LLM_TIMEOUT,
         )
 
         # End timing
@@ -273,8 +333,9 @@ async def generate_cv_summary(request: CVSummaryRequest):
 
         # Extract generated summary
         generated_summary = response.choices[0].message.content
-        print(generated_summary)
-        generated_summary = clean_output(generated_summary, output_type="summary")
+        log_payload("summary", generated_summary)
+        with stage("clean_output"):
+            generated_summary = clean_output(generated_summary, output_type="summary")
         word_count = len(generated_summary.split())
 
 
@@ -285,208 +346,674 @@ async def generate_cv_summary(request: CVSummaryRequest):
             temperature=temperature
         )
 
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error generating summary: {str(e)}")
 
+def format_responsibilities(cleaned: str) -> str:
+    """Put each sentence of cleaned responsibilities on its own line."""
+    sentences = cleaned.split('. ')
+    return '\n'.join(sentence.strip() + ('.' if not sentence.endswith('.') else '') for sentence in sentences if sentence.strip())
+
+def generation_key(kind: str, job_title: str, company_industry: Optional[str] = None) -> str:
+    """
+    Generation cache key of a job title. A title similar to one seen before (e.g. "Sr. SWE"
+    after "Senior Software Engineer") gets that title's key, so they share cached results.
+    """
+    scope = () if company_industry is None else (company_industry,)
+    return title_index.canonical_key(job_title, normalize_key(kind, job_title, *scope), scope=normalize_key(kind, *scope))
+
 @app.post("/generate/job-responsibilities", response_model=APIResponse)
-async def generate_responsibilities(request: ResponsibilityRequest):
+async def generate_responsibilities(request: ResponsibilityRequest, stream: bool = False):
     try:
         # Model generation parameters
-        max_tokens = 1024
+        prompt = get_prompt("job_responsibilities")
+        max_tokens = prompt.max_tokens
         temperature = round(random.uniform(0.2, 0.5), 2)
 
-        # Create user prompt
-        user_message = (
-            f"You are a professional job responsibility writer. Generate concise and professional job responsibilities based on: "
-            f"Job Title: '{request.job_title}', "
-            f"Company Industry: '{request.company_industry}'. "
-            f"Ensure the Job Responsibilities are persuasive, tailored to the target Job Title and Company and suitable for a professional CV. "
-            f"Provide 3-5 sentences of Job Responsibilities only, without any additional text."
-        )
+        # Create prompt
+        messages = prompt.render(job_title=request.job_title, company_industry=request.company_industry)
 
-        # Start timing
-        start_time = time.time()
+        if stream:
+            return stream_generation(messages, get_route("job_responsibilities").primary, max_tokens, temperature,
+                                     "responsibilities", "Error generating responsibilities")
 
-        # Generate responsibilities using Groq API
-        response = client.chat.completions.create(
-            messages=[
-                {
-                    "role": "system",
-                    "content": (
-                        f"You are a professional job responsibilities writer. Your task is to generate detailed, engaging, and professional job responsibilities "
-                        f"based on provided details."
-                    )
-                },
-                {"role": "user", "content": user_message}
-            ],
-            model="llama-3.3-70b-versatile",
-            max_tokens=max_tokens,
-            temperature=temperature,
-        )
+        async def generate() -> APIResponse:
+            # Start timing
+            start_time = time.time()
 
-        # End timing
-        execution_time = time.time() - start_time
+            # Generate responsibilities using Groq API, escalating to a larger model if needed
+            response = await route_completion(
+                "job_responsibilities",
+                create_completion_or_503,
+                accepts_cleaned("responsibilities"),
+                messages=messages,
+                max_tokens=max_tokens,
+                temperature=temperature,
+                timeout=TEXT_LLM_TIMEOUT,
+            )
 
-        # Extract generated responsibilities
-        generated_summary = response.choices[0].message.content
-        print(generated_summary)
-        generated_summary = clean_output(generated_summary, output_type="responsibilities")
-        word_count = len(generated_summary.split())
+            # End timing
+            execution_time = time.time() - start_time
 
-        # Post-process to format as list
-        sentences = generated_summary.split('. ')
-        formatted_summary = '\n'.join(sentence.strip() + ('.' if not sentence.endswith('.') else '') for sentence in sentences if sentence.strip())
+            # Extract generated responsibilities
+            generated_summary = response.choices[0].message.content
+            log_payload("responsibilities", generated_summary)
+            with stage("clean_output"):
+                generated_summary = clean_output(generated_summary, output_type="responsibilities")
+            word_count = len(generated_summary.split())
+
+            return APIResponse(
+                generated_summary=format_responsibilities(generated_summary),
+                word_count=word_count,
+                execution_time=execution_time,
+                temperature=temperature
+            )
 
-        return APIResponse(
-            generated_summary=formatted_summary,
-            word_count=word_count,
-            execution_time=execution_time,
-            temperature=temperature
+        # Serve from the generation cache; only cache non-empty results
+        cache_key = generation_key("responsibilities", request.job_title, request.company_industry)
+        lookup_start = time.time()
+        result, cached = await generation_cache.get_or_generate(
+            cache_key, generate, should_cache=lambda r: bool(r.generated_summary), decode=APIResponse.model_validate
         )
+        if cached:
+            result = result.model_copy(update={"execution_time": time.time() - lookup_start})
+        return result
 
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error generating responsibilities: {str(e)}")
 
 @app.post("/generate/skills", response_model=APIResponse)
-async def suggest_skills(request: SkillsRequest):
+async def suggest_skills(request: SkillsRequest, stream: bool = False):
     try:
         # Model generation parameters
-        max_tokens = 1024
+        prompt = get_prompt("skills")
+        max_tokens = prompt.max_tokens
         temperature = round(random.uniform(0.2, 0.5), 2)
 
-        # Create user prompt
-        user_message = (
-            f"You are a professional job skills writer. Generate concise and professional job skills for the job title '{request.job_title}'. "
-            f"Provide maximum 6-8 skills as a comma-separated list of single words or short phrases (e.g., 'html, css, scrum master'). "
-            f"Ensure the skills are persuasive, tailored to the job title, and suitable for a professional CV. "
-            f"Provide only the skills list, without any additional text or formatting."
+        # Create prompt
+        messages = prompt.render(job_title=request.job_title)
+
+        if stream:
+            return stream_generation(messages, get_route("skills").primary, max_tokens, temperature,
+                                     "skills", "Error generating skills")
+
+        async def generate() -> APIResponse:
+            # Start timing
+            start_time = time.time()
+
+            # Generate skills using Groq API, escalating to a larger model if needed
+            response = await route_completion(
+                "skills",
+                create_completion_or_503,
+                accepts_cleaned("skills"),
+                messages=messages,
+                max_tokens=max_tokens,
+                temperature=temperature,
+                timeout=TEXT_LLM_TIMEOUT,
+            )
+
+            # End timing
+            execution_time = time.time() - start_time
+
+            # Extract and clean generated skills
+            generated_summary = response.choices[0].message.content
+            log_payload("skills", generated_summary)
+            with stage("clean_output"):
+                cleaned_summary = clean_output(generated_summary, output_type="skills")
+            word_count = len(cleaned_summary.split())
+
+            # Flag outputs that are only commas or clean to nothing
+            if generated_summary.strip() in [",", ",,,", ",,,..."]:
+                logger.warning("Comma-heavy skills output", extra={"job_title": request.job_title})
+            if not cleaned_summary:
+                logger.warning(
+                    "Empty cleaned skills output",
+                    extra={"job_title": request.job_title, "raw_chars": len(generated_summary)},
+                )
+
+            return APIResponse(
+                generated_summary=cleaned_summary,
+                word_count=word_count,
+                execution_time=execution_time,
+                temperature=temperature
+            )
+
+        # Serve from the generation cache; only cache non-empty results
+        cache_key = generation_key("skills", request.job_title)
+        lookup_start = time.time()
+        result, cached = await generation_cache.get_or_generate(
+            cache_key, generate, should_cache=lambda r: bool(r.generated_summary), decode=APIResponse.model_validate
         )
+        if cached:
+            result = result.model_copy(update={"execution_time": time.time() - lookup_start})
+        return result
 
-        # Start timing
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error generating skills: {str(e)}")
+
+# Pydantic models for batch generation requests
+class SkillsBatchRequest(BaseModel):
+    job_titles: list[str]
+
+class ResponsibilityBatchRequest(BaseModel):
+    jobs: list[ResponsibilityRequest]
+
+# Output type and single-title prompt of each batch prompt
+BATCH_TASKS = {
+    "skills_batch": ("skills", "skills"),
+    "job_responsibilities_batch": ("responsibilities", "job_responsibilities"),
+}
+
+def batch_items(kind: str, inputs: list[tuple[str, Optional[str]]]) -> list[BatchItem]:
+    """Validate the (job title, industry) inputs of a batch request and group repeats and similar titles under one item."""
+    if not inputs:
+        raise HTTPException(status_code=400, detail="The batch must not be empty")
+    if len(inputs) > GENERATION_BATCH_MAX_ITEMS:
+        raise HTTPException(status_code=400, detail=f"At most {GENERATION_BATCH_MAX_ITEMS} job titles are allowed per batch")
+    items: Dict[str, BatchItem] = {}
+    for index, (job_title, company_industry) in enumerate(inputs):
+        if not job_title.strip():
+            raise HTTPException(status_code=400, detail=f"Job title {index} is empty")
+        key = generation_key(kind, job_title, company_industry)
+        if key in items:
+            items[key].indexes.append(index)
+            items[key].requested_titles.append(job_title)
+        else:
+            items[key] = BatchItem(key=key, job_title=job_title, company_industry=company_industry,
+                                   indexes=[index], requested_titles=[job_title])
+    return list(items.values())
+
+def generation_response(output_type: str, cleaned: str, execution_time: float, temperature: float) -> APIResponse:
+    """Build the response for cleaned text as the single-title endpoints do."""
+    word_count = len(cleaned.split())
+    if output_type == "responsibilities":
+        cleaned = format_responsibilities(cleaned)
+    return APIResponse(generated_summary=cleaned, word_count=word_count, execution_time=execution_time, temperature=temperature)
+
+def stream_generation_batch(task: str, items: list[BatchItem]) -> StreamingResponse:
+    """
+    Generate many job titles in as few completions as the completion budget allows, and
+    stream each result back as an NDJSON line as soon as it is ready.
+
+    Cached titles are sent first. The rest are packed into batch completions (at most
+    GENERATION_BATCH_CONCURRENCY at a time) whose JSON output maps entry IDs to texts, and
+    each entry is cleaned with clean_output. Entries that are missing or clean to nothing
+    are retried as a smaller batch, and a batch that fails as a whole is split in half;
+    single entries go to the single-title prompt.
+    """
+    output_type, single_task = BATCH_TASKS[task]
+    prompt = get_prompt(task)
+    semaphore = asyncio.Semaphore(GENERATION_BATCH_CONCURRENCY)
+    results: asyncio.Queue = asyncio.Queue()
+
+    async def finish(item: BatchItem, outcome: str, result: Optional[APIResponse] = None, error: str = "") -> None:
+        BATCH_GENERATION_ENTRIES.inc(task=task, outcome=outcome)
+        if result is not None and outcome != "cache":
+            await generation_cache.add(item.key, result)
+        for index, job_title in zip(item.indexes, item.requested_titles):
+            line = {"index": index, "job_title": job_title}
+            if item.company_industry is not None:
+                line["company_industry"] = item.company_industry
+            if result is not None:
+                line["result"] = result.model_dump()
+            else:
+                line["error"] = error
+            await results.put(line)
+
+    async def generate_single(item: BatchItem) -> None:
+        temperature = round(random.uniform(0.2, 0.5), 2)
+        single_prompt = get_prompt(single_task)
+        fields = {"job_title": item.job_title}
+        if item.company_industry is not None:
+            fields["company_industry"] = item.company_industry
+        start_time = time.time()
+        try:
+            async with semaphore:
+                response = await route_completion(
+                    single_task,
+                    create_completion_or_503,
+                    accepts_cleaned(output_type),
+                    messages=single_prompt.render(**fields),
+                    max_tokens=single_prompt.max_tokens,
+                    temperature=temperature,
+                    timeout=TEXT_LLM_TIMEOUT,
+                )
+            with stage("clean_output"):
+                cleaned = clean_output(response.choices[0].message.content or "", output_type=output_type)
+            result = generation_response(output_type, cleaned, time.time() - start_time, temperature)
+        except Exception as e:
+            detail = e.detail if isinstance(e, HTTPException) else str(e)
+            await finish(item, "failed", error=f"Error generating {output_type}: {detail}")
+            return
+        if result.generated_summary:
+            await finish(item, "single", result)
+        else:
+            await finish(item, "failed", error=f"Error generating {output_type}: empty output")
+
+    async def generate_pack(pack: list[BatchItem], outcome: str = "batched") -> None:
+        if len(pack) == 1:
+            await generate_single(pack[0])
+            return
+        temperature = round(random.uniform(0.2, 0.5), 2)
+        with stage("prompt_build"):
+            messages = prompt.render(items_json=compact_json(batch_prompt_items(pack)))
         start_time = time.time()
+        try:
+            async with semaphore:
+                response = await route_completion(
+                    task,
+                    create_completion_or_503,
+                    is_json_object,
+                    messages=messages,
+                    max_tokens=prompt.max_tokens,
+                    temperature=temperature,
+                    response_format={"type": "json_object"},
+                    timeout=TEXT_LLM_TIMEOUT,
+                )
+            log_payload(task, response.choices[0].message.content)
+            entries = parse_batch_entries(response.choices[0].message.content or "")
+        except Exception as e:
+            logger.warning("Batch generation call failed", extra={"task": task, "entries": len(pack), "error": str(e)})
+            entries = {}
+        execution_time = time.time() - start_time
 
-        # Generate skills using Groq API
-        response = client.chat.completions.create(
-            messages=[
-                {
-                    "role": "system",
-                    "content": (
-                        f"You are a professional job skills writer. Generate 5-10 concise, professional skills as a comma-separated list of single words or short phrases "
-                        f"(e.g., 'html, css, scrum master, critical thinking') based on the provided job title."
-                    )
-                },
-                {"role": "user", "content": user_message}
-            ],
-            model="llama-3.3-70b-versatile",
+        with stage("clean_output"):
+            cleaned = clean_batch((entries.get(str(number), "") for number in range(1, len(pack) + 1)), output_type)
+        failed = []
+        for item, text in zip(pack, cleaned):
+            if text:
+                await finish(item, outcome, generation_response(output_type, text, execution_time, temperature))
+            else:
+                failed.append(item)
+
+        if len(failed) == len(pack):
+            # Nothing came back; smaller batches are less likely to be cut off or malformed
+            middle = len(pack) // 2
+            await asyncio.gather(generate_pack(pack[:middle], "retried"), generate_pack(pack[middle:], "retried"))
+        elif failed:
+            await generate_pack(failed, "retried")
+
+    async def produce() -> None:
+        try:
+            pending = []
+            for item in items:
+                lookup_start = time.time()
+                cached = await generation_cache.lookup(item.key, decode=APIResponse.model_validate)
+                if cached is not None:
+                    await finish(item, "cache", cached.model_copy(update={"execution_time": time.time() - lookup_start}))
+                else:
+                    pending.append(item)
+            packs = pack_items(pending, BATCH_ENTRY_TOKENS[task], prompt.max_tokens)
+            await asyncio.gather(*(generate_pack(pack) for pack in packs))
+        except Exception:
+            logger.exception("Batch generation failed", extra={"task": task})
+        finally:
+            await results.put(None)
+
+    async def stream_results():
+        producer = asyncio.create_task(produce())
+        try:
+            while (line := await results.get()) is not None:
+                yield json.dumps(line) + "\n"
+        finally:
+            # Stop outstanding generations if the client disconnects
+            producer.cancel()
+
+    return StreamingResponse(stream_results(), media_type="application/x-ndjson")
+
+@app.post("/generate/skills/batch")
+async def suggest_skills_batch(request: SkillsBatchRequest):
+    """Skills for many job titles, streamed back as NDJSON lines as they are ready."""
+    items = batch_items("skills", [(job_title, None) for job_title in request.job_titles])
+    return stream_generation_batch("skills_batch", items)
+
+@app.post("/generate/job-responsibilities/batch")
+async def generate_responsibilities_batch(request: ResponsibilityBatchRequest):
+    """Responsibilities for many job title/industry pairs, streamed back as NDJSON lines as they are ready."""
+    items = batch_items("responsibilities", [(job.job_title, job.company_industry) for job in request.jobs])
+    return stream_generation_batch("job_responsibilities_batch", items)
+
+# Extra LLM attempts when the parse output is truncated or invalid, and the completion budget cap for them
+CV_PARSE_RETRIES = int(os.getenv("CV_PARSE_RETRIES", "1"))
+CV_PARSE_MAX_TOKENS = int(os.getenv("CV_PARSE_MAX_TOKENS", "8192"))
+# Concurrent chunk parses per long CV
+LONG_CV_CONCURRENCY = int(os.getenv("LONG_CV_CONCURRENCY", "8"))
+
+def cv_cache_key(upload: PDFUpload) -> str:
+    """Cache key of an uploaded CV; a new parse prompt version or model route gets fresh cache entries."""
+    route_keys = f"{get_route('cv_parse').key},{get_route('cv_section_parse').key}"
+    prompt_keys = f"{get_prompt('cv_parse').key},{get_prompt('cv_section_parse').key}"
+    return make_cv_key(upload.digest, CV_STRUCTURE_SCHEMA, f"{route_keys}/{prompt_keys}")
+
+async def extract_cv_text(upload: PDFUpload, cache_key: str, cached: Optional[Dict[str, Any]] = None) -> str:
+    """
+    Extract the text of a CV PDF and prepare it for prompts (cv_preprocessing.py),
+    reusing the cached text for identical uploads. `cached` is the cache entry of
+    `cache_key` when the caller has already looked it up.
+    """
+    if cached is None:
+        cached = await cv_cache.get(cache_key) or {}
+    if "text" in cached:
+        return cached["text"]
+
+    # Extract text straight from the uploaded bytes (or the spill file for large uploads)
+    with stage("pdf_extraction"):
+        raw_text = await extract_text_or_503(upload.source)
+
+    if not raw_text.strip():
+        raise ValueError("No text extracted from PDF")
+
+    # Drop repeated headers/footers and layout noise, and fit the text to the token budget
+    with stage("text_preprocess"):
+        prepared = prepare_cv_text(raw_text)
+    CV_TEXT_TOKENS.inc(prepared.tokens_before, kind="raw")
+    CV_TEXT_TOKENS.inc(prepared.tokens_after, kind="prepared")
+    logger.info("Prepared CV text", extra={
+        "tokens_before": prepared.tokens_before,
+        "tokens_after": prepared.tokens_after,
+        "repeated_lines_removed": prepared.repeated_lines_removed,
+        "truncated_sections": prepared.truncated_sections,
+    })
+
+    await cv_cache.update(cache_key, text=prepared.text)
+    return prepared.text
+
+async def generate_cv_json_on(model: str, messages: list[Dict[str, str]], max_tokens: int) -> Dict[str, Any]:
+    """
+    Run a CV parsing LLM call on one model and return the validated CV JSON.
+    Truncated output is retried with a larger completion budget and invalid output is retried
+    with the validation error, up to CV_PARSE_RETRIES times.
+
+    Raises:
+        CVParseError: If the output is still invalid after the retries
+    """
+    for attempt in range(CV_PARSE_RETRIES + 1):
+        # Generate structured CV using Groq API
+        response = await create_completion_or_503(
+            messages=messages,
+            model=model,
             max_tokens=max_tokens,
-            temperature=temperature,
+            temperature=0.5,
+            response_format={"type": "json_object"},  # Enforce JSON output
+            timeout=CV_LLM_TIMEOUT,
         )
+        choice = response.choices[0]
+        generated_json = choice.message.content or ""
+        truncated = choice.finish_reason == "length"
+        can_grow = attempt < CV_PARSE_RETRIES and max_tokens < CV_PARSE_MAX_TOKENS
 
-        # End timing
-        execution_time = time.time() - start_time
+        # Parse, validate against the CV model and clean the strings in one pass.
+        # Repairing cut-off output drops the rest of the CV, so first try a larger budget.
+        try:
+            with stage("json_parse"):
+                return parse_cv_json(generated_json, repair=not (truncated and can_grow))
+        except CVParseError as e:
+            if truncated and can_grow:
+                # Output was cut off: ask again with a larger completion budget
+                CV_PARSE_REPAIRS.inc(outcome="retry_truncated")
+                max_tokens = min(max_tokens * 2, CV_PARSE_MAX_TOKENS)
+            elif attempt < CV_PARSE_RETRIES and not truncated:
+                # Targeted repair: show the model its output and what is wrong with it
+                CV_PARSE_REPAIRS.inc(outcome="retry_invalid")
+                messages = messages[:2] + [
+                    {"role": "assistant", "content": generated_json},
+                    {"role": "user", "content": f"That JSON is invalid: {str(e)}. Return the complete, corrected JSON object only."},
+                ]
+            else:
+                CV_PARSE_REPAIRS.inc(outcome="failed")
+                raise
+
+async def generate_cv_json(task: str, messages: list[Dict[str, str]], max_tokens: int) -> Dict[str, Any]:
+    """
+    Parse a CV on the models of the task's route, escalating to the next model when one
+    still returns an invalid structure after its retries. If the last model fails as well,
+    the request fails with a 502.
+    """
+    route = get_route(task)
+    for index, model in enumerate(route.models):
+        try:
+            parsed_cv = await generate_cv_json_on(model, messages, max_tokens)
+        except CVParseError as e:
+            if index == len(route.models) - 1:
+                MODEL_ROUTING.inc(task=task, model=model, outcome="rejected")
+                raise HTTPException(status_code=502, detail=f"Model returned an invalid CV structure: {str(e)}")
+            MODEL_ROUTING.inc(task=task, model=model, outcome="escalated")
+            continue
+        MODEL_ROUTING.inc(task=task, model=model, outcome="accepted")
+        return parsed_cv
+
+async def parse_long_cv(input_text: str) -> Dict[str, Any]:
+    """
+    Long-document mode: split the CV text into section-aware chunks, parse them concurrently
+    against the schemas of their sections and merge the results in document order.
+    """
+    prompt = get_prompt("cv_section_parse")
+    with stage("prompt_build"):
+        chunks = chunk_cv_text(input_text)
+        chunk_messages = [
+            prompt.render(
+                sections=", ".join(chunk.sections),
+                section_schema=section_schema_json(chunk.sections),
+                cv_text=chunk.text,
+            )
+            for chunk in chunks
+        ]
+    semaphore = asyncio.Semaphore(LONG_CV_CONCURRENCY)
 
-        # Extract and clean generated skills
-        generated_summary = response.choices[0].message.content
-        print(f"Debug: Raw skills output: {generated_summary}")
-        cleaned_summary = clean_output(generated_summary, output_type="skills")
-        word_count = len(cleaned_summary.split())
+    async def parse_chunk(messages: list[Dict[str, str]]) -> Dict[str, Any]:
+        async with semaphore:
+            return await generate_cv_json("cv_section_parse", messages, prompt.max_tokens)
 
-        # Debug if output is commas or empty
-        if generated_summary.strip() in [",", ",,,", ",,,..."]:
-            print(f"Debug: Comma-heavy output detected in skills: {generated_summary}")
-            print("Debug: Check model response for unexpected behavior.")
-        if not cleaned_summary:
-            print(f"Debug: Empty cleaned summary for skills. Raw output: {generated_summary}")
+    parts = await asyncio.gather(*(parse_chunk(messages) for messages in chunk_messages))
+    return merge_cv_parts(list(parts))
 
-        return APIResponse(
-            generated_summary=cleaned_summary,
-            word_count=word_count,
-            execution_time=execution_time,
-            temperature=temperature
-        )
+async def parse_cv_pdf(upload: PDFUpload, mode: str = "full") -> Dict[str, Any]:
+    """
+    Extract text from a CV PDF and parse it into CV_STRUCTURE_SCHEMA.
+    Extracted text and parsed JSON are cached by content hash, so re-uploading
+    the same PDF skips both pdfplumber and the parsing LLM call.
 
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error generating skills: {str(e)}")
+    Contact details and skill lists are extracted locally (cv_rules.py) first. In "fast" mode
+    that is the whole result; otherwise the LLM parses the rest of the CV, in chunks for CVs
+    longer than LONG_CV_THRESHOLD_TOKENS.
+    """
+    cache_key = cv_cache_key(upload)
+    cached = await cv_cache.get(cache_key) or {}
+    if mode == "full" and "parsed_cv" in cached:
+        return cached["parsed_cv"]
+
+    input_text = await extract_cv_text(upload, cache_key, cached)
+    return await parse_cv_text(input_text, cache_key, mode)
+
+async def parse_cv_text(input_text: str, cache_key: str, mode: str = "full") -> Dict[str, Any]:
+    """Parse extracted CV text (see parse_cv_pdf) and cache the full-mode result under `cache_key`."""
+    with stage("rule_extraction"):
+        extracted = extract_cv_fields(input_text)
+    if mode == "fast":
+        return extracted.merge_into({})
+
+    if estimate_tokens(extracted.remaining_text) > LONG_CV_THRESHOLD_TOKENS:
+        parsed_cv = await parse_long_cv(extracted.remaining_text)
+    else:
+        # Build prompt from what is left to infer (schemas are serialized once per section set)
+        prompt = get_prompt("cv_parse")
+        remaining_sections = tuple(section for section in ALL_SECTIONS if section not in extracted.complete_sections)
+        with stage("prompt_build"):
+            messages = prompt.render(
+                cv_text=extracted.remaining_text,
+                extracted=compact_json(extracted.fields),
+                section_schema=section_schema_json(remaining_sections),
+            )
+        parsed_cv = await generate_cv_json("cv_parse", messages, prompt.max_tokens)
+
+    parsed_cv = extracted.merge_into(parsed_cv)
+    await cv_cache.update(cache_key, parsed_cv=parsed_cv)
+    return parsed_cv
 
 @app.post("/generate/cv_structure", response_model=CVStructureResponse)
-async def generate_cv_structure(file: UploadFile = File(...)):
+async def generate_cv_structure(file: UploadFile = File(...), mode: Literal["full", "fast"] = "full"):
     try:
         # Validate file type
         if not file.filename.endswith('.pdf'):
             raise HTTPException(status_code=400, detail="Only PDF files are supported")
 
-        # Save uploaded PDF to temporary file
-        with NamedTemporaryFile(delete=False, suffix=".pdf") as temp_file:
-            temp_file.write(await file.read())
-            temp_file_path = temp_file.name
+        upload = await read_upload_or_413(file)
 
         try:
-            # Extract text from PDF
-            with pdfplumber.open(temp_file_path) as pdf:
-                input_text = "\n".join(page.extract_text() or "" for page in pdf.pages)
-            if not input_text.strip():
-                raise ValueError("No text extracted from PDF")
-
-            # System prompt for CV parsing
-            system_prompt = (
-                "You are a professional CV parsing assistant. Extract key information from the provided CV text and structure it according to the provided JSON schema. "
-                "Ensure all required fields are populated, inferring reasonable defaults for missing data where possible (e.g., empty arrays for optional fields like projects, publications)."
-            )
-
-            # User prompt
-            user_message = (
-                f"CV Text:\n{input_text}\n\n"
-                f"Extract and structure the CV data into the following JSON schema:\n{json.dumps(CV_STRUCTURE_SCHEMA, indent=2)}\n\n"
-                f"Return the parsed CV data as a JSON object."
-            )
-
             # Start timing
             start_time = time.time()
 
-            # Generate structured CV using Groq API
-            response = client.chat.completions.create(
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_message}
-                ],
-                model="llama-3.3-70b-versatile",
-                max_tokens=4096,  # Increased to handle complex CVs
-                temperature=0.5,
-                response_format={"type": "json_object"}  # Enforce JSON output
-            )
+            parsed_cv = await parse_cv_pdf(upload, mode)
 
             # End timing
             execution_time = time.time() - start_time
 
-            # Extract and clean generated JSON
-            generated_json = response.choices[0].message.content
-            cleaned_json = clean_output(generated_json, output_type="cv_structure")
-            parsed_cv = json.loads(cleaned_json)
-
-            # Clean up temporary file
-            os.unlink(temp_file_path)
-
             return CVStructureResponse(
                 parsed_cv=parsed_cv,
                 execution_time=execution_time
             )
 
+        except HTTPException:
+            raise
         except Exception as e:
-            # Clean up temporary file on error
-            if os.path.exists(temp_file_path):
-                os.unlink(temp_file_path)
             raise ValueError(f"Failed to process PDF: {str(e)}")
+        finally:
+            upload.close()
 
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error generating CV structure: {str(e)}")
 
 
+@app.get("/health/live")
+async def liveness():
+    """The process is up and its event loop is responding."""
+    return {"status": "alive"}
+
+@app.get("/health/ready")
+async def readiness():
+    """Whether this worker should get traffic: started, not draining, and its shared store reachable."""
+    checks = {
+        "started": getattr(app.state, "ready", False),
+        "draining": getattr(app.state, "draining", False),
+        "llm_circuit": get_gateway().breaker.state,
+        "llm_calls_in_flight": in_flight_calls(),
+    }
+    ready = checks["started"] and not checks["draining"]
+    if shared_store is not None:
+        try:
+            await asyncio.wait_for(shared_store.ping(), 2)
+            checks["shared_store"] = "ok"
+        except Exception as e:
+            checks["shared_store"] = f"error: {type(e).__name__}"
+            ready = False
+    if not ready:
+        raise HTTPException(status_code=503, detail={"status": "not_ready", **checks})
+    return {"status": "ready", **checks}
+
+@app.get("/cache/stats")
+async def cache_stats():
+    """Hit/miss counters of the parsed CV, generation and approximate-match caches."""
+    return {
+        "parsed_cv": cv_cache.stats(),
+        "generation": generation_cache.stats(),
+        "similar_titles": title_index.stats(),
+        "similar_descriptions": description_index.stats(),
+    }
+
+# Prompts used by each LLM-backed endpoint
+ENDPOINT_PROMPTS = {
+    "/generate/cv_summary": ["cv_summary"],
+    "/generate/job-responsibilities": ["job_responsibilities"],
+    "/generate/skills": ["skills"],
+    "/generate/job-responsibilities/batch": ["job_responsibilities_batch", "job_responsibilities"],
+    "/generate/skills/batch": ["skills_batch", "skills"],
+    "/generate/cv_structure": ["cv_parse", "cv_section_parse"],
+    "/generate/ats_score": ["cv_parse", "cv_section_parse", "ats_analysis", "ats_section_analysis"],
+    "/generate/ats_score/batch": ["cv_parse", "cv_section_parse", "ats_analysis", "ats_section_analysis"],
+    "/generate/ats_score/jobs": ["cv_parse", "cv_section_parse", "ats_analysis", "ats_section_analysis"],
+}
+
+@app.get("/prompts/budgets")
+async def prompt_token_budgets():
+    """Active prompt versions per endpoint with their fixed prompt tokens, completion limits and model routes."""
+    return {
+        endpoint: [{**get_prompt(name).budget(), "models": list(get_route(name).models)} for name in names]
+        for endpoint, names in ENDPOINT_PROMPTS.items()
+    }
+
+# Pydantic model for generation cache pre-warm request
+class PrewarmRequest(BaseModel):
+    job_titles: list[str] = Field(max_length=PREWARM_MAX_TITLES)
+    company_industries: Optional[list[str]] = Field(default=None, max_length=PREWARM_MAX_INDUSTRIES)
+
+async def prewarm_generation_cache(job_titles: list[str], company_industries: Optional[list[str]] = None) -> None:
+    """
+    Fill the generation cache with a full pool of variants for each job title:
+    skills for every title, and responsibilities for every title/industry pair.
+    """
+    semaphore = asyncio.Semaphore(PREWARM_CONCURRENCY)
+
+    async def warm(handler, request) -> None:
+        async with semaphore:
+            for _ in range(generation_cache.variants):
+                try:
+                    await handler(request)
+                except HTTPException:
+                    return
+
+    tasks = [warm(suggest_skills, SkillsRequest(job_title=title)) for title in job_titles]
+    for industry in company_industries or []:
+        tasks.extend(
+            warm(generate_responsibilities, ResponsibilityRequest(job_title=title, company_industry=industry))
+            for title in job_titles
+        )
+    await asyncio.gather(*tasks)
+
+def load_prewarm_titles(path: str) -> list[str]:
+    """Read one job title per line, skipping blank lines and # comments."""
+    with open(path, "r", encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip() and not line.startswith("#")]
+
+# The pre-warm started through the API, if one is running; only one runs at a time
+prewarm_task: Optional[asyncio.Task] = None
+
+@app.post("/cache/prewarm", status_code=202)
+async def prewarm_cache(request: PrewarmRequest):
+    """Start pre-warming the generation cache in the background."""
+    global prewarm_task
+    inputs = len(request.job_titles) * (1 + len(request.company_industries or []))
+    if inputs > PREWARM_MAX_INPUTS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {PREWARM_MAX_INPUTS} titles and title/industry pairs are allowed per pre-warm ({inputs} requested)",
+        )
+    if prewarm_task is not None and not prewarm_task.done():
+        raise HTTPException(status_code=409, detail="A cache pre-warm is already running")
+    task = asyncio.create_task(prewarm_generation_cache(request.job_titles, request.company_industries))
+    prewarm_task = task
+    background_tasks.add(task)
+    task.add_done_callback(background_tasks.discard)
+    return {"job_titles": len(request.job_titles), "company_industries": len(request.company_industries or [])}
+
+
+# ATS analysis settings: "sections" runs one concurrent LLM call per CV section, "single" one call for the whole CV
+ATS_ANALYSIS_MODE = os.getenv("ATS_ANALYSIS_MODE", "sections")
+
 class SectionFeedback(BaseModel):
     section_name: str
     score: float  # 0-100
-    feedback: str
-    strengths: list[str]
-    improvements: list[str]
+    feedback: Annotated[str, BeforeValidator(lambda value: value or "")]
+    # The model sometimes answers null or a single string instead of a list
+    strengths: Annotated[list[str], BeforeValidator(as_list)]
+    improvements: Annotated[list[str], BeforeValidator(as_list)]
 
 class ATSScoreResponse(BaseModel):
     overall_score: float  # 0-100
@@ -495,16 +1022,157 @@ class ATSScoreResponse(BaseModel):
     keyword_match_percentage: float
     recommendations: list[str]
 
-# Add this helper function before the endpoint
+def match_job_keywords(cv: Any, job_title: str, job_description: str) -> KeywordMatch:
+    """
+    Keyword coverage of a CV, reusing the keywords of the same job description. Near-duplicates
+    are not reused: two postings can share most of their boilerplate but not their skills.
+    """
+    job_text = f"{job_title}\n{job_description}"
+    keywords = description_index.get_or_compute(job_text, extract_keywords, similar=False)
+    return keyword_coverage(cv, job_text, keywords=keywords)
+
+async def analyze_cv_section(section: str, section_data: Any, job_title: str, job_description: str) -> Dict[str, Any]:
+    """Run the ATS analysis LLM call for one CV section against the job description."""
+    prompt = get_prompt("ats_section_analysis")
+
+    with stage("prompt_build"):
+        messages = prompt.render(
+            job_title=job_title,
+            job_description=job_description,
+            section_name=SECTION_TITLES[section],
+            section_json=compact_json(section_data),
+        )
+
+    # A section whose output is not a JSON object is asked once more, then scored as failed,
+    # so one bad section does not fail the whole analysis
+    for attempt in range(2):
+        response = await route_completion(
+            "ats_section_analysis",
+            create_completion_or_503,
+            is_json_object,
+            messages=messages,
+            max_tokens=prompt.max_tokens,
+            temperature=0.3,
+            response_format={"type": "json_object"},
+            timeout=CV_LLM_TIMEOUT,
+        )
+        with stage("json_parse"):
+            try:
+                result = json.loads(response.choices[0].message.content)
+            except (TypeError, ValueError):
+                result = None
+        if isinstance(result, dict):
+            return result
+        logger.warning("Invalid section analysis", extra={"section": section, "attempt": attempt + 1})
+
+    return {
+        "score": 0.0,
+        "feedback": f"The {SECTION_TITLES[section]} section could not be analyzed.",
+        "strengths": [],
+        "improvements": [],
+        "recommendations": [],
+    }
+
+async def analyze_cv_by_section(cv_data: Dict[str, Any], job_title: str, job_description: str) -> ATSScoreResponse:
+    """
+    Analyze each CV section against the job description in its own, concurrent LLM call,
+    then compute the overall score, feedback and recommendations locally from the section
+    results. Latency is that of the slowest section rather than one long completion.
+    """
+    sections = relevant_sections(cv_data)
+    results = await asyncio.gather(*(
+        analyze_cv_section(section, section_data, job_title, job_description) for section, section_data in sections
+    ))
+
+    section_feedbacks = []
+    scores = {}
+    recommendations = {}
+    for (section, _), result in zip(sections, results):
+        scores[section] = clamp_score(result.get("score", 0.0))
+        recommendations[section] = result.get("recommendations") or result.get("improvements") or []
+        section_feedbacks.append(SectionFeedback(
+            section_name=SECTION_TITLES[section],
+            score=scores[section],
+            feedback=result.get("feedback", ""),
+            strengths=result.get("strengths", []),
+            improvements=result.get("improvements", [])
+        ))
+
+    # Keyword coverage is computed locally so it is deterministic across runs
+    keyword_match = match_job_keywords(cv_data, job_title, job_description)
+    score = overall_score(scores)
+
+    return ATSScoreResponse(
+        overall_score=score,
+        overall_feedback=overall_feedback(score, scores),
+        section_feedbacks=section_feedbacks,
+        keyword_match_percentage=keyword_match.keyword_match_percentage,
+        recommendations=merge_recommendations(recommendations, scores)
+    )
+
+async def analyze_cv_single_call(cv_data: Dict[str, Any], job_title: str, job_description: str) -> ATSScoreResponse:
+    """Run the ATS analysis as one LLM call for a parsed CV against one job description."""
+    prompt = get_prompt("ats_analysis")
+    max_tokens = prompt.max_tokens
+    temperature = 0.3
+
+    with stage("prompt_build"):
+        messages = prompt.render(job_title=job_title, job_description=job_description, cv_json=compact_json(cv_data))
+
+    response = await route_completion(
+        "ats_analysis",
+        create_completion_or_503,
+        is_json_object,
+        messages=messages,
+        max_tokens=max_tokens,
+        temperature=temperature,
+        response_format={"type": "json_object"},
+        timeout=CV_LLM_TIMEOUT,
+    )
+
+    generated_analysis = response.choices[0].message.content
+    with stage("json_parse"):
+        analysis_data = json.loads(generated_analysis)
+
+    # Ensure all required fields are present
+    if "overall_score" not in analysis_data:
+        analysis_data["overall_score"] = 0.0
+    if "overall_feedback" not in analysis_data:
+        analysis_data["overall_feedback"] = "Unable to generate feedback"
+    if "section_feedbacks" not in analysis_data:
+        analysis_data["section_feedbacks"] = []
+    if "keyword_match_percentage" not in analysis_data:
+        analysis_data["keyword_match_percentage"] = 0.0
+    if "recommendations" not in analysis_data:
+        analysis_data["recommendations"] = []
+
+    section_feedbacks = []
+    for section in analysis_data["section_feedbacks"]:
+        section_feedbacks.append(SectionFeedback(
+            section_name=section.get("section_name", "Unknown"),
+            score=clamp_score(section.get("score", 0.0)),
+            feedback=section.get("feedback", ""),
+            strengths=section.get("strengths", []),
+            improvements=section.get("improvements", [])
+        ))
+
+    # Keyword coverage is computed locally so it is deterministic across runs
+    keyword_match = match_job_keywords(cv_data, job_title, job_description)
+
+    return ATSScoreResponse(
+        overall_score=float(analysis_data["overall_score"]),
+        overall_feedback=analysis_data["overall_feedback"],
+        section_feedbacks=section_feedbacks,
+        keyword_match_percentage=keyword_match.keyword_match_percentage,
+        recommendations=analysis_data["recommendations"]
+    )
+
+async def analyze_cv_for_job(cv_data: Dict[str, Any], job_title: str, job_description: str) -> ATSScoreResponse:
+    """Run the ATS analysis for a parsed CV against one job description, in the configured mode."""
+    if ATS_ANALYSIS_MODE == "single":
+        return await analyze_cv_single_call(cv_data, job_title, job_description)
+    return await analyze_cv_by_section(cv_data, job_title, job_description)
 
-def extract_keywords_from_job(job_description: str) -> list[str]:
-    """Extract important keywords from job description."""
-    # Remove common words and extract meaningful terms
-    common_words = {'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 
-                    'of', 'with', 'is', 'are', 'was', 'were', 'be', 'been', 'being'}
-    words = re.findall(r'\b[a-zA-Z]{3,}\b', job_description.lower())
-    keywords = [w for w in words if w not in common_words]
-    return list(set(keywords))[:50]  # Return top 50 unique keywords
 
 # Add this new endpoint after your existing endpoints
 
@@ -525,150 +1193,321 @@ async def generate_ats_score(
         if not cv_file.filename.endswith('.pdf'):
             raise HTTPException(status_code=400, detail="Only PDF files are supported")
 
-        # Save uploaded PDF to temporary file
-        with NamedTemporaryFile(delete=False, suffix=".pdf") as temp_file:
-            temp_file.write(await cv_file.read())
-            temp_file_path = temp_file.name
+        upload = await read_upload_or_413(cv_file)
 
         try:
-            # Extract text from PDF
-            with pdfplumber.open(temp_file_path) as pdf:
-                input_text = "\n".join(page.extract_text() or "" for page in pdf.pages)
-            if not input_text.strip():
-                raise ValueError("No text extracted from PDF")
-
-            # Generate CV structure
-            system_prompt = (
-                "You are a professional CV parsing assistant. Extract key information from the provided CV text and structure it according to the provided JSON schema. "
-                "Ensure all required fields are populated, inferring reasonable defaults for missing data where possible (e.g., empty arrays for optional fields like projects, publications)."
-            )
+            # Generate CV structure (cached by PDF content)
+            cv_data = await parse_cv_pdf(upload)
 
-            user_message = (
-                f"CV Text:\n{input_text}\n\n"
-                f"Extract and structure the CV data into the following JSON schema:\n{json.dumps(CV_STRUCTURE_SCHEMA, indent=2)}\n\n"
-                f"Return the parsed CV data as a JSON object."
-            )
+            # Proceed with ATS analysis
+            return await analyze_cv_for_job(cv_data, job_title, job_description)
 
-            start_time = time.time()
+        except HTTPException:
+            raise
+        except Exception as e:
+            raise ValueError(f"Failed to process PDF: {str(e)}")
+        finally:
+            upload.close()
 
-            response = client.chat.completions.create(
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_message}
-                ],
-                model="llama-3.3-70b-versatile",
-                max_tokens=4096,
-                temperature=0.5,
-                response_format={"type": "json_object"}
-            )
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error generating ATS score: {str(e)}")
 
-            generated_json = response.choices[0].message.content
-            cleaned_json = clean_output(generated_json, output_type="cv_structure")
-            cv_data = json.loads(cleaned_json)
+# Job-based ATS scoring: the pipeline runs in background workers (ats_jobs.py) and each
+# stage's output is stored, so a job resumes after a restart from its last finished stage
+async def ats_job_extract(job: ATSJob) -> Dict[str, Any]:
+    upload = PDFUpload(bytes.fromhex(job.inputs["cv_digest"]), len(job.pdf), data=job.pdf)
+    return {"cv_text": await extract_cv_text(upload, job.inputs["cache_key"])}
+
+async def ats_job_parse(job: ATSJob) -> Dict[str, Any]:
+    cached = await cv_cache.get(job.inputs["cache_key"]) or {}
+    if "parsed_cv" in cached:
+        return {"parsed_cv": cached["parsed_cv"]}
+    return {"parsed_cv": await parse_cv_text(job.outputs["cv_text"], job.inputs["cache_key"])}
+
+async def ats_job_analyze(job: ATSJob) -> Dict[str, Any]:
+    result = await analyze_cv_for_job(job.outputs["parsed_cv"], job.inputs["job_title"], job.inputs["job_description"])
+    return {"result": result.model_dump()}
+
+def ats_job_retryable(exc: Exception) -> bool:
+    """Provider outages, full PDF queues and invalid model output are worth another attempt."""
+    if isinstance(exc, HTTPException):
+        return exc.status_code in (502, 503)
+    return isinstance(exc, json.JSONDecodeError)
+
+# Pydantic model for the status of an ATS scoring job
+class ATSJobStatusResponse(BaseModel):
+    job_id: str
+    status: str  # queued, running, done or failed
+    stage: str  # Last finished stage: extract, parse or analyze
+    attempts: int
+    result: Optional[ATSScoreResponse] = None
+    error: Optional[str] = None
+    webhook_status: Optional[str] = None
+    created_at: float
+    updated_at: float
+
+def ats_job_status(job: ATSJob) -> Dict[str, Any]:
+    return ATSJobStatusResponse(
+        job_id=job.job_id,
+        status=job.status,
+        stage=job.stage,
+        attempts=job.attempts,
+        result=job.outputs.get("result") if job.status == "done" else None,
+        error=job.error if job.status == "failed" else None,
+        webhook_status=job.webhook_status,
+        created_at=job.created_at,
+        updated_at=job.updated_at,
+    ).model_dump()
+
+ats_job_runner = ATSJobRunner(
+    stages=[("extract", ats_job_extract), ("parse", ats_job_parse), ("analyze", ats_job_analyze)],
+    render=ats_job_status,
+    retryable=ats_job_retryable,
+    endpoint="/generate/ats_score/jobs",
+)
+
+@app.post("/generate/ats_score/jobs", status_code=202)
+async def submit_ats_score_job(
+    request: Request,
+    cv_file: UploadFile = File(...),
+    job_title: str = Form(default=""),
+    job_description: str = Form(default=""),
+    webhook_url: str = Form(default="")
+):
+    """
+    Queue an ATS scoring job and return its ID straight away. Poll the returned status_url,
+    or pass a webhook_url to have the final job status POSTed to it.
+    """
+    try:
+        # Validate job_title and job_description
+        if not job_title or not job_title.strip():
+            raise HTTPException(status_code=400, detail="Job title cannot be empty")
+        if not job_description or not job_description.strip():
+            raise HTTPException(status_code=400, detail="Job description cannot be empty")
 
-            # Proceed with ATS analysis
-            cv_text = json.dumps(cv_data, indent=2)
-            max_tokens = 4096
-            temperature = 0.3
-
-            system_prompt = (
-                "You are an expert ATS (Applicant Tracking System) analyzer and professional recruiter. "
-                "Your task is to analyze a candidate's CV against a job description and provide:\n"
-                "1. An overall ATS score (0-100)\n"
-                "2. Section-by-section analysis with scores and feedback\n"
-                "3. Keyword match analysis\n"
-                "4. Actionable recommendations\n\n"
-                "Scoring criteria:\n"
-                "- 90-100: Excellent match, highly qualified\n"
-                "- 75-89: Good match, qualified with minor gaps\n"
-                "- 60-74: Moderate match, some relevant experience\n"
-                "- 40-59: Weak match, significant gaps\n"
-                "- 0-39: Poor match, not qualified\n\n"
-                "Analyze these CV sections: personal_info, education, work_experience, skills, projects, certifications, awards.\n"
-                "Provide specific, actionable feedback for each section."
-            )
+        # Validate file type
+        if not cv_file.filename.endswith('.pdf'):
+            raise HTTPException(status_code=400, detail="Only PDF files are supported")
 
-            user_message = (
-                f"Job Title: {job_title}\n\n"
-                f"Job Description:\n{job_description}\n\n"
-                f"Candidate CV Data:\n{cv_text}\n\n"
-                f"Please analyze this CV against the job requirements and provide a comprehensive ATS score analysis. "
-                f"Return your response as a JSON object with the following structure:\n"
-                f"{{\n"
-                f'  "overall_score": <float 0-100>,\n'
-                f'  "overall_feedback": "<string>",\n'
-                f'  "section_feedbacks": [\n'
-                f'    {{\n'
-                f'      "section_name": "<string>",\n'
-                f'      "score": <float 0-100>,\n'
-                f'      "feedback": "<string>",\n'
-                f'      "strengths": ["<string>", ...],\n'
-                f'      "improvements": ["<string>", ...]\n'
-                f'    }}\n'
-                f'  ],\n'
-                f'  "keyword_match_percentage": <float 0-100>,\n'
-                f'  "recommendations": ["<string>", ...]\n'
-                f'}}\n\n'
-                f"Ensure all scores are realistic and based on actual matches between the CV and job requirements."
-            )
+        if webhook_url:
+            try:
+                await resolve_webhook_address(webhook_url)
+            except ValueError as e:
+                raise HTTPException(status_code=400, detail=str(e))
+
+        with await read_upload_or_413(cv_file) as upload:
+            if upload.data is not None:
+                pdf = upload.data
+            else:
+                pdf = await asyncio.to_thread(Path(upload.path).read_bytes)
+            inputs = {
+                "job_title": job_title,
+                "job_description": job_description,
+                "cv_digest": upload.digest.hex(),
+                "cache_key": cv_cache_key(upload),
+            }
 
-            response = client.chat.completions.create(
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_message}
-                ],
-                model="llama-3.3-70b-versatile",
-                max_tokens=max_tokens,
-                temperature=temperature,
-                response_format={"type": "json_object"}
-            )
+        job = await ats_job_runner.submit(inputs, pdf, webhook_url or None)
+        return {
+            "job_id": job.job_id,
+            "status": job.status,
+            "status_url": str(request.url_for("get_ats_score_job", job_id=job.job_id)),
+        }
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error queueing ATS score job: {str(e)}")
+
+@app.get("/generate/ats_score/jobs/{job_id}", response_model=ATSJobStatusResponse)
+async def get_ats_score_job(job_id: str):
+    job = await ats_job_runner.store.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="ATS score job not found")
+    return ats_job_status(job)
+
+# Pydantic model for quick (LLM-free) ATS response
+class ATSQuickScoreResponse(KeywordMatch):
+    execution_time: float
+
+@app.post("/generate/ats_score/quick", response_model=ATSQuickScoreResponse)
+async def generate_ats_score_quick(
+    cv_file: UploadFile = File(...),
+    job_title: str = Form(default=""),
+    job_description: str = Form(default="")
+):
+    """Keyword coverage of a CV against a job description, computed locally without any LLM call."""
+    try:
+        # Validate job_title and job_description
+        if not job_title or not job_title.strip():
+            raise HTTPException(status_code=400, detail="Job title cannot be empty")
+        if not job_description or not job_description.strip():
+            raise HTTPException(status_code=400, detail="Job description cannot be empty")
+
+        # Validate file type
+        if not cv_file.filename.endswith('.pdf'):
+            raise HTTPException(status_code=400, detail="Only PDF files are supported")
+
+        upload = await read_upload_or_413(cv_file)
+
+        try:
+            start_time = time.time()
+
+            cache_key = cv_cache_key(upload)
+            cv_text = await extract_cv_text(upload, cache_key)
+            keyword_match = match_job_keywords(cv_text, job_title, job_description)
 
             execution_time = time.time() - start_time
 
-            generated_analysis = response.choices[0].message.content
-            analysis_data = json.loads(generated_analysis)
-
-            # Ensure all required fields are present
-            if "overall_score" not in analysis_data:
-                analysis_data["overall_score"] = 0.0
-            if "overall_feedback" not in analysis_data:
-                analysis_data["overall_feedback"] = "Unable to generate feedback"
-            if "section_feedbacks" not in analysis_data:
-                analysis_data["section_feedbacks"] = []
-            if "keyword_match_percentage" not in analysis_data:
-                analysis_data["keyword_match_percentage"] = 0.0
-            if "recommendations" not in analysis_data:
-                analysis_data["recommendations"] = []
-
-            section_feedbacks = []
-            for section in analysis_data["section_feedbacks"]:
-                section_feedbacks.append(SectionFeedback(
-                    section_name=section.get("section_name", "Unknown"),
-                    score=float(section.get("score", 0.0)),
-                    feedback=section.get("feedback", ""),
-                    strengths=section.get("strengths", []),
-                    improvements=section.get("improvements", [])
-                ))
-
-            # Clean up temporary file
-            os.unlink(temp_file_path)
-
-            return ATSScoreResponse(
-                overall_score=float(analysis_data["overall_score"]),
-                overall_feedback=analysis_data["overall_feedback"],
-                section_feedbacks=section_feedbacks,
-                keyword_match_percentage=float(analysis_data["keyword_match_percentage"]),
-                recommendations=analysis_data["recommendations"]
-            )
+            return ATSQuickScoreResponse(**keyword_match.model_dump(), execution_time=execution_time)
 
+        except HTTPException:
+            raise
         except Exception as e:
-            if os.path.exists(temp_file_path):
-                os.unlink(temp_file_path)
             raise ValueError(f"Failed to process PDF: {str(e)}")
+        finally:
+            upload.close()
 
+    except HTTPException:
+        raise
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error generating ATS score: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error generating quick ATS score: {str(e)}")
+
+# Batch ATS scoring settings
+ATS_BATCH_CONCURRENCY = int(os.getenv("ATS_BATCH_CONCURRENCY", "8"))
+ATS_BATCH_MAX_JOBS = int(os.getenv("ATS_BATCH_MAX_JOBS", "100"))
+
+# Pydantic model for one job in a batch ATS request
+class ATSBatchJob(BaseModel):
+    job_title: str
+    job_description: str
+
+def parse_batch_jobs(jobs: str) -> list[ATSBatchJob]:
+    """Parse and validate the JSON list of jobs sent with a batch ATS request."""
+    try:
+        raw_jobs = json.loads(jobs)
+    except json.JSONDecodeError:
+        raise HTTPException(status_code=400, detail="jobs must be a JSON list of {job_title, job_description} objects")
+    if not isinstance(raw_jobs, list) or not raw_jobs:
+        raise HTTPException(status_code=400, detail="jobs must be a non-empty JSON list")
+    if len(raw_jobs) > ATS_BATCH_MAX_JOBS:
+        raise HTTPException(status_code=400, detail=f"At most {ATS_BATCH_MAX_JOBS} jobs are allowed per batch")
+
+    parsed_jobs = []
+    for index, raw_job in enumerate(raw_jobs):
+        try:
+            job = ATSBatchJob(**raw_job)
+        except Exception:
+            raise HTTPException(status_code=400, detail=f"Job {index} must have job_title and job_description")
+        if not job.job_title.strip() or not job.job_description.strip():
+            raise HTTPException(status_code=400, detail=f"Job {index} has an empty job title or description")
+        parsed_jobs.append(job)
+    return parsed_jobs
+
+@app.post("/generate/ats_score/batch")
+async def generate_ats_score_batch(
+    cv_file: UploadFile = File(...),
+    jobs: str = Form(default="")
+):
+    """
+    Score one CV against many job descriptions.
+    The CV is parsed once, the analyses run concurrently (at most ATS_BATCH_CONCURRENCY at a time),
+    and each result is streamed back as an NDJSON line as soon as it finishes.
+    """
+    try:
+        job_list = parse_batch_jobs(jobs)
+
+        # Validate file type
+        if not cv_file.filename.endswith('.pdf'):
+            raise HTTPException(status_code=400, detail="Only PDF files are supported")
+
+        # Generate CV structure once for the whole batch (cached by PDF content)
+        with await read_upload_or_413(cv_file) as upload:
+            cv_data = await parse_cv_pdf(upload)
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error generating ATS score: Failed to process PDF: {str(e)}")
+
+    semaphore = asyncio.Semaphore(ATS_BATCH_CONCURRENCY)
+
+    async def score_job(index: int, job: ATSBatchJob) -> Dict[str, Any]:
+        async with semaphore:
+            try:
+                result = await analyze_cv_for_job(cv_data, job.job_title, job.job_description)
+                return {"index": index, "job_title": job.job_title, "result": result.model_dump()}
+            except Exception as e:
+                return {"index": index, "job_title": job.job_title, "error": f"Error generating ATS score: {str(e)}"}
+
+    async def stream_results():
+        tasks = [asyncio.create_task(score_job(index, job)) for index, job in enumerate(job_list)]
+        try:
+            for finished in asyncio.as_completed(tasks):
+                yield json.dumps(await finished) + "\n"
+        finally:
+            # Stop outstanding analyses if the client disconnects
+            for task in tasks:
+                task.cancel()
+
+    return StreamingResponse(stream_results(), media_type="application/x-ndjson")
     
+# Pydantic models for CV ranking
+class RankingCV(BaseModel):
+    cv_id: str
+    parsed_cv: Dict[str, Any]
+
+class RankingIndexRequest(BaseModel):
+    cvs: list[RankingCV]
+
+class RankingSearchRequest(BaseModel):
+    job_title: str
+    job_description: str
+    top_k: Optional[int] = 10
+
+class RankingSearchResponse(BaseModel):
+    results: list[RankedCV]
+    total_cvs: int
+    execution_time: float
+
+@app.post("/ranking/cvs")
+async def index_cvs(request: RankingIndexRequest):
+    """Add parsed CVs (as returned by /generate/cv_structure) to the ranking index."""
+    try:
+        ranking_index.add_many([(cv.cv_id, cv.parsed_cv) for cv in request.cvs])
+        return {"indexed": len(request.cvs), "total_cvs": len(ranking_index)}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error indexing CVs: {str(e)}")
+
+@app.delete("/ranking/cvs/{cv_id}")
+async def remove_cv(cv_id: str):
+    if not ranking_index.remove(cv_id):
+        raise HTTPException(status_code=404, detail=f"CV {cv_id} is not indexed")
+    return {"removed": cv_id, "total_cvs": len(ranking_index)}
+
+@app.post("/ranking/search", response_model=RankingSearchResponse)
+async def rank_cvs(request: RankingSearchRequest):
+    """Rank every indexed CV against a job description without any LLM call."""
+    try:
+        if not request.job_description.strip():
+            raise HTTPException(status_code=400, detail="Job description cannot be empty")
+        top_k = request.top_k or 10
+        if top_k < 1:
+            raise HTTPException(status_code=400, detail="top_k must be at least 1")
+
+        start_time = time.time()
+        results = ranking_index.rank(f"{request.job_title}\n{request.job_description}", top_k=top_k)
+        execution_time = time.time() - start_time
+
+        return RankingSearchResponse(results=results, total_cvs=len(ranking_index), execution_time=execution_time)
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error ranking CVs: {str(e)}")
+
 import uvicorn
 if __name__ == "__main__":
     uvicorn.run(app, host="0.0.0.0", port=9090)
@@ -0,0 +1,274 @@
+import time
+import threading
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+from starlette.routing import Match
+
+# Endpoint (route path) of the request being handled, set by MetricsMiddleware
+current_endpoint: ContextVar[str] = ContextVar("current_endpoint", default="none")
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0)
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def render(self) -> List[str]:
+        lines = self.header()
+        for key, value in sorted(self._values.items()):
+            lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {value}")
+        return lines
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels: str) -> None:
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels: str) -> None:
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def render(self) -> List[str]:
+        lines = self.header()
+        for key, value in sorted(self._values.items()):
+            lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {value}")
+        return lines
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Per label set: bucket counts (last slot is +Inf), sum
+        self._values: Dict[LabelValues, Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            counts, total = self._values.setdefault(key, ([0] * (len(self.buckets) + 1), [0.0]))
+            counts[bisect_left(self.buckets, value)] += 1
+            total[0] += value
+
+    @contextmanager
+    def time(self, **labels: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def render(self) -> List[str]:
+        lines = self.header()
+        for key, (counts, total) in sorted(self._values.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                bucket_labels = _format_labels(self.labelnames, key, 'le="%s"' % bound)
+                lines.append(f"{self.name}_bucket{bucket_labels} {cumulative}")
+            cumulative += counts[-1]
+            bucket_labels = _format_labels(self.labelnames, key, 'le="+Inf"')
+            lines.append(f"{self.name}_bucket{bucket_labels} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {total[0]}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {cumulative}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+        self._collectors: List[Callable[[], None]] = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def add_collector(self, collector: Callable[[], None]) -> None:
+        """Register a callback run before each scrape, e.g. to copy cache stats into gauges."""
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        for collector in self._collectors:
+            collector()
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+REQUESTS = REGISTRY.register(Counter(
+    "http_requests_total", "HTTP requests by endpoint and status code.", ("endpoint", "method", "status")))
+REQUEST_DURATION = REGISTRY.register(Histogram(
+    "http_request_duration_seconds", "Time until the response headers are sent, by endpoint.", ("endpoint", "method")))
+IN_FLIGHT = REGISTRY.register(Gauge(
+    "http_requests_in_flight", "Requests currently being handled, by endpoint.", ("endpoint",)))
+ERRORS = REGISTRY.register(Counter(
+    "errors_total", "Failed requests by endpoint and root cause type.", ("endpoint", "type")))
+STAGE_DURATION = REGISTRY.register(Histogram(
+    "stage_duration_seconds", "Duration of pipeline stages, by endpoint and stage.", ("endpoint", "stage")))
+LLM_DURATION = REGISTRY.register(Histogram(
+    "llm_request_duration_seconds", "LLM completion latency by endpoint and model.", ("endpoint", "model")))
+LLM_TOKENS = REGISTRY.register(Counter(
+    "llm_tokens_total", "LLM tokens used, by endpoint, model and kind (prompt or completion).",
+    ("endpoint", "model", "kind")))
+LLM_ERRORS = REGISTRY.register(Counter(
+    "llm_errors_total", "Failed LLM calls by model and error type.", ("model", "type")))
+LLM_RETRIES = REGISTRY.register(Counter(
+    "llm_retries_total", "Retried LLM calls by model and the error that caused the retry.", ("model", "reason")))
+LLM_HEDGES = REGISTRY.register(Counter(
+    "llm_hedged_requests_total", "Hedged LLM calls by model and outcome (fired, or won by the hedge).",
+    ("model", "outcome")))
+LLM_RATE_LIMIT_WAIT = REGISTRY.register(Counter(
+    "llm_rate_limit_wait_seconds_total", "Time LLM calls spent waiting for the rate limiter."))
+LLM_CIRCUIT_OPEN = REGISTRY.register(Gauge(
+    "llm_circuit_open", "1 while the LLM circuit breaker is open or probing, 0 while it is closed."))
+MODEL_ROUTING = REGISTRY.register(Counter(
+    "llm_routing_decisions_total", "Routed LLM calls by task, model and outcome (accepted, escalated to the "
+    "next model of the route, or rejected by the last one).", ("task", "model", "outcome")))
+BATCH_GENERATION_ENTRIES = REGISTRY.register(Counter(
+    "generation_batch_entries_total", "Entries of batch generation requests by task and how they were served "
+    "(cache, batched call, retried in a smaller batch, single call, failed).", ("task", "outcome")))
+SIMILARITY_LOOKUPS = REGISTRY.register(Counter(
+    "similarity_lookups_total", "Approximate-match cache lookups by index and outcome (exact match, "
+    "similar match above the threshold, or miss).", ("index", "outcome")))
+SIMILARITY_LOOKUP_DURATION = REGISTRY.register(Histogram(
+    "similarity_lookup_duration_seconds", "Approximate-match cache lookup latency by index.", ("index",),
+    buckets=(0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05)))
+CV_TEXT_TOKENS = REGISTRY.register(Counter(
+    "cv_text_tokens_total", "Estimated tokens of extracted CV text, raw and after preprocessing.", ("kind",)))
+CV_PARSE_REPAIRS = REGISTRY.register(Counter(
+    "cv_parse_repairs_total", "Invalid CV parse outputs by how they were handled "
+    "(local repair, retry after truncation or invalid output, failed).", ("outcome",)))
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    """Time a pipeline stage of the current request."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        STAGE_DURATION.observe(time.perf_counter() - start, endpoint=current_endpoint.get(), stage=name)
+
+
+def record_usage(model: str, usage: Optional[object]) -> None:
+    """Add prompt/completion token counts from a completion's usage object."""
+    if usage is None:
+        return
+    endpoint = current_endpoint.get()
+    prompt_tokens = getattr(usage, "prompt_tokens", None)
+    completion_tokens = getattr(usage, "completion_tokens", None)
+    if prompt_tokens:
+        LLM_TOKENS.inc(prompt_tokens, endpoint=endpoint, model=model, kind="prompt")
+    if completion_tokens:
+        LLM_TOKENS.inc(completion_tokens, endpoint=endpoint, model=model, kind="completion")
+
+
+def root_cause(exc: BaseException) -> BaseException:
+    """Follow the implicit exception chain back to the original error."""
+    seen = set()
+    while exc.__context__ is not None and id(exc) not in seen:
+        seen.add(id(exc))
+        exc = exc.__context__
+    return exc
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware recording request counts, latency and in-flight requests per route.
+    The route path (e.g. /ranking/cvs/{cv_id}) is used as the endpoint label.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    def _endpoint(self, scope) -> str:
+        router = scope["app"].router if "app" in scope else None
+        for route in getattr(router, "routes", []):
+            match, _ = route.matches(scope)
+            if match == Match.FULL:
+                return route.path
+        return "unmatched"
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        endpoint = self._endpoint(scope)
+        method = scope.get("method", "")
+        token = current_endpoint.set(endpoint)
+        status = {"code": 500}
+        start = time.perf_counter()
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+                REQUEST_DURATION.observe(time.perf_counter() - start, endpoint=endpoint, method=method)
+            await send(message)
+
+        IN_FLIGHT.inc(endpoint=endpoint)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        except Exception as e:
+            ERRORS.inc(endpoint=endpoint, type=type(root_cause(e)).__name__)
+            raise
+        finally:
+            IN_FLIGHT.dec(endpoint=endpoint)
+            REQUESTS.inc(endpoint=endpoint, method=method, status=str(status["code"]))
+            current_endpoint.reset(token)
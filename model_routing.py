@@ -0,0 +1,96 @@
+import os
+from typing import Any, Awaitable, Callable, Dict, Tuple
+from pydantic import BaseModel
+from metrics import MODEL_ROUTING
+
+# Model tiers that routes can refer to by name
+MODEL_TIERS = {
+    "small": os.getenv("LLM_SMALL_MODEL", "llama-3.1-8b-instant"),
+    "large": os.getenv("LLM_LARGE_MODEL", "llama-3.3-70b-versatile"),
+}
+
+# Models per task (prompt name), as tiers or model IDs. "small>large" means: try the small
+# model and escalate to the large one when its output fails validation.
+DEFAULT_ROUTES = {
+    "cv_summary": "large",
+    "job_responsibilities": "small>large",
+    "skills": "small>large",
+    "job_responsibilities_batch": "small>large",
+    "skills_batch": "small>large",
+    "cv_parse": "large",
+    "cv_section_parse": "large",
+    "ats_analysis": "large",
+    "ats_section_analysis": "large",
+}
+# Override routes without a code change, e.g. MODEL_ROUTES="skills=large,cv_summary=small>large"
+MODEL_ROUTES = dict(
+    item.split("=", 1) for item in os.getenv("MODEL_ROUTES", "").split(",") if "=" in item
+)
+
+
+class ModelRoute(BaseModel):
+    task: str
+    models: Tuple[str, ...]  # Primary model first, then the models to escalate to
+
+    @property
+    def primary(self) -> str:
+        return self.models[0]
+
+    @property
+    def key(self) -> str:
+        """Identifies the route in cache keys, so a routing change gets fresh cache entries."""
+        return ">".join(self.models)
+
+
+def parse_route(task: str, spec: str) -> ModelRoute:
+    models = tuple(MODEL_TIERS.get(name.strip(), name.strip()) for name in spec.split(">") if name.strip())
+    if not models:
+        raise ValueError(f"Model route for {task} is empty")
+    return ModelRoute(task=task, models=models)
+
+
+_routes: Dict[str, ModelRoute] = {
+    task: parse_route(task, MODEL_ROUTES.get(task, spec)) for task, spec in DEFAULT_ROUTES.items()
+}
+
+
+def get_route(task: str) -> ModelRoute:
+    return _routes[task]
+
+
+def set_route(task: str, spec: str) -> ModelRoute:
+    """Change the route of a task at runtime, e.g. to compare routes in benchmarks."""
+    _routes[task] = parse_route(task, spec)
+    return _routes[task]
+
+
+def model_routes() -> Dict[str, Tuple[str, ...]]:
+    return {task: route.models for task, route in sorted(_routes.items())}
+
+
+async def route_completion(
+    task: str,
+    create: Callable[..., Awaitable[Any]],
+    accept: Callable[[str], bool],
+    **kwargs: Any,
+) -> Any:
+    """
+    Run a completion on the task's primary model and escalate to the next model of its
+    route while `accept` rejects the output. The last model's response is returned even if
+    it is rejected, so the caller handles it as it would without routing.
+
+    Args:
+        task: Route name (the prompt name)
+        create: Completion function taking the model and `kwargs`
+        accept: Validation of the completion text
+    """
+    route = get_route(task)
+    for index, model in enumerate(route.models):
+        response = await create(model=model, **kwargs)
+        if accept(response.choices[0].message.content or ""):
+            MODEL_ROUTING.inc(task=task, model=model, outcome="accepted")
+            return response
+        if index == len(route.models) - 1:
+            MODEL_ROUTING.inc(task=task, model=model, outcome="rejected")
+            return response
+        MODEL_ROUTING.inc(task=task, model=model, outcome="escalated")
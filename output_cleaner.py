@@ -0,0 +1,211 @@
+import re
+import json
+import logging
+from typing import Any, Callable, Dict, Iterable, List
+
+logger = logging.getLogger(__name__)
+
+
+class CharFilter:
+    """
+    Removes a fixed set of characters. ASCII text, which is nearly all model output, is
+    filtered as bytes, which is about ten times faster than str.translate.
+    """
+
+    def __init__(self, chars: str):
+        self._bytes = chars.encode("ascii")
+        self._table = str.maketrans("", "", chars)
+
+    def __call__(self, text: str) -> str:
+        if text.isascii():
+            return text.encode("ascii").translate(None, self._bytes).decode("ascii")
+        return text.translate(self._table)
+
+
+# Harmful special characters removed from generated text (%, , and ' are kept for valid use)
+HARMFUL_CHARS = CharFilter("*\\/#<>")
+# Harmful characters removed from CV strings; / is kept for GPA formats
+CV_HARMFUL_CHARS = CharFilter("*><")
+# Characters that are not part of a skill, apart from the separators; the filter covers ASCII text
+NON_SKILL_CHARS = re.compile(r"[^\w\s,.-]")
+ASCII_NON_SKILL_CHARS = CharFilter("".join(
+    char for char in map(chr, range(128)) if not (char.isalnum() or char.isspace() or char in "_,.-")
+))
+
+
+def _normalize(text: str, harmful: CharFilter) -> str:
+    """Remove harmful characters and collapse whitespace runs to single spaces."""
+    return " ".join(harmful(text).split())
+
+
+def clean_summary(text: str) -> str:
+    """Sentences of the text, each ending in a full stop, joined by spaces."""
+    sentences = (sentence.strip() for sentence in _normalize(text, HARMFUL_CHARS).split("."))
+    return " ".join(sentence + "." for sentence in sentences if sentence)
+
+
+def clean_responsibilities(text: str) -> str:
+    """Sentences of the text, each ending in a full stop, one per line."""
+    sentences = (sentence.strip() for sentence in _normalize(text, HARMFUL_CHARS).split("."))
+    return "\n".join(sentence + "." for sentence in sentences if sentence)
+
+
+def clean_skills(text: str) -> str:
+    """Skills of a list separated by commas, full stops or newlines, formatted as 'skill1', 'skill2', ..."""
+    # Newlines separate skills, so they must not be collapsed into spaces with other whitespace
+    normalized = _normalize(text.replace("\n", ","), HARMFUL_CHARS)
+    if normalized.isascii():
+        normalized = ASCII_NON_SKILL_CHARS(normalized)
+    else:
+        normalized = NON_SKILL_CHARS.sub("", normalized)
+    skills = [f"'{skill}'" for skill in map(str.strip, normalized.replace(".", ",").split(",")) if skill]
+    if logger.isEnabledFor(logging.DEBUG):
+        if skills:
+            logger.debug("Cleaned skills", extra={"skill_count": len(skills)})
+        else:
+            logger.debug("No valid skills found", extra={"raw_chars": len(text)})
+    return ", ".join(skills)
+
+
+def clean_cv_text(text: str) -> str:
+    return _normalize(text, CV_HARMFUL_CHARS)
+
+
+def clean_cv_json(data: Any) -> Any:
+    """
+    Clean every string of parsed CV JSON in place (dicts and lists are modified, not
+    copied) and return it. A bare string is returned cleaned.
+    """
+    if isinstance(data, str):
+        return clean_cv_text(data)
+    stack = [data]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, dict):
+            items = node.items()
+        elif isinstance(node, list):
+            items = enumerate(node)
+        else:
+            continue
+        for key, value in items:
+            if isinstance(value, str):
+                node[key] = clean_cv_text(value)
+            elif isinstance(value, (dict, list)):
+                stack.append(value)
+    return data
+
+
+def _clean_cv_structure(text: str) -> str:
+    try:
+        json_data = json.loads(text) if isinstance(text, str) else text
+    except json.JSONDecodeError:
+        return text
+    return json.dumps(clean_cv_json(json_data))
+
+
+# Cleaner of each output type
+CLEANERS: Dict[str, Callable[[str], str]] = {
+    'summary': clean_summary,
+    'responsibilities': clean_responsibilities,
+    'skills': clean_skills,
+    'cv_structure': _clean_cv_structure,
+}
+
+
+def get_cleaner(output_type: str) -> Callable[[str], str]:
+    try:
+        return CLEANERS[output_type]
+    except KeyError:
+        raise ValueError(f"Invalid output_type: {output_type}") from None
+
+
+def clean_output(text: str, output_type: str) -> str:
+    """
+    Clean the generated output based on the output type (summary, responsibilities, skills).
+    Removes harmful special characters, normalizes whitespace, and formats appropriately.
+
+    Args:
+        text: Raw output from the Groq API
+        output_type: One of 'summary', 'responsibilities', 'skills' or 'cv_structure'
+
+    Returns:
+        Cleaned and formatted text
+    """
+    return get_cleaner(output_type)(text)
+
+
+def clean_batch(texts: Iterable[str], output_type: str) -> List[str]:
+    """Clean many outputs of one type, e.g. the entries of a batch generation."""
+    cleaner = get_cleaner(output_type)
+    return [cleaner(text) for text in texts]
+
+
+# Separators clean_output puts between cleaned units for each streamed output type
+STREAM_SEPARATORS: Dict[str, str] = {
+    'summary': ' ',
+    'responsibilities': '\n',
+    'skills': ', ',
+}
+
+# Match raw text up to its last unit boundary, after which the text before it can be cleaned for good
+STREAM_BOUNDARIES: Dict[str, re.Pattern] = {
+    'summary': re.compile(r'.*\.', re.DOTALL),
+    'responsibilities': re.compile(r'.*\.', re.DOTALL),
+    'skills': re.compile(r'.*[,\.\n]', re.DOTALL),
+}
+
+
+class IncrementalCleaner:
+    """
+    Cleans streamed model output as it arrives.
+
+    Raw text is buffered until a unit boundary (a sentence end, or a skill separator),
+    then everything up to the boundary is cleaned with clean_output and emitted joined
+    to earlier output with the separator clean_output itself uses. The concatenation of
+    everything returned by feed() and finish() therefore matches clean_output on the full text.
+    """
+
+    def __init__(self, output_type: str):
+        if output_type not in STREAM_SEPARATORS:
+            raise ValueError(f"Invalid output_type for streaming: {output_type}")
+        self.output_type = output_type
+        self.separator = STREAM_SEPARATORS[output_type]
+        self.boundary = STREAM_BOUNDARIES[output_type]
+        self._clean = CLEANERS[output_type]
+        self.raw = []
+        self._pending = ""
+        self._emitted_any = False
+
+    @property
+    def raw_text(self) -> str:
+        return "".join(self.raw)
+
+    def _emit(self, segment: str) -> str:
+        cleaned = self._clean(segment)
+        if not cleaned:
+            return ""
+        if self._emitted_any:
+            cleaned = self.separator + cleaned
+        self._emitted_any = True
+        return cleaned
+
+    def feed(self, delta: str) -> str:
+        """Add a raw delta and return newly cleaned text (possibly empty)."""
+        if not delta:
+            return ""
+        self.raw.append(delta)
+        # The pending text holds no boundary, so only the delta needs to be searched
+        match = self.boundary.match(delta)
+        if match is None:
+            self._pending += delta
+            return ""
+        end = match.end()
+        segment, self._pending = self._pending + delta[:end], delta[end:]
+        return self._emit(segment)
+
+    def finish(self) -> str:
+        """Clean and return whatever is left once the stream has ended."""
+        segment, self._pending = self._pending, ""
+        if not segment.strip():
+            return ""
+        return self._emit(segment)
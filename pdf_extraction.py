@@ -0,0 +1,180 @@
+import os
+import io
+import asyncio
+import multiprocessing
+import pdfplumber
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import List, Optional, Tuple, Union
+
+# Process pool settings for PDF text extraction; by default the cores are divided between
+# the WEB_CONCURRENCY web workers, as each of them starts its own pool
+PDF_WORKERS = int(os.getenv("PDF_WORKERS", str(max(1, (os.cpu_count() or 1) // max(1, int(os.getenv("WEB_CONCURRENCY", "1")))))))
+PDF_QUEUE_SIZE = int(os.getenv("PDF_QUEUE_SIZE", "32"))
+# Documents with more pages than this are split across workers page range by page range
+PDF_PARALLEL_PAGE_THRESHOLD = int(os.getenv("PDF_PARALLEL_PAGE_THRESHOLD", "6"))
+PDF_PAGES_PER_TASK = int(os.getenv("PDF_PAGES_PER_TASK", "3"))
+
+PDFSource = Union[str, bytes]
+
+# Separates the pages of extracted text, so page headers and footers can be told apart
+PAGE_BREAK = "\f"
+
+
+class PDFQueueFullError(Exception):
+    """Raised when the extraction queue is full and a new PDF cannot be admitted."""
+
+
+class PDFWorkerCrashedError(Exception):
+    """Raised when extraction workers died on a PDF twice, e.g. out of memory on a hostile PDF."""
+
+
+def _open(source: PDFSource):
+    if isinstance(source, (bytes, bytearray)):
+        return pdfplumber.open(io.BytesIO(source))
+    return pdfplumber.open(source)
+
+
+def _extract_range(source: PDFSource, start: int, end: Optional[int]) -> List[str]:
+    """Extract the text of pages [start, end) in a worker process."""
+    with _open(source) as pdf:
+        return [page.extract_text() or "" for page in pdf.pages[start:end]]
+
+
+def _extract_or_count(source: PDFSource, threshold: int) -> Tuple[Optional[List[str]], int]:
+    """
+    Extract all pages when the document is short, otherwise only return its page count
+    so the caller can fan the pages out over several workers.
+    """
+    with _open(source) as pdf:
+        page_count = len(pdf.pages)
+        if threshold > 0 and page_count > threshold:
+            return None, page_count
+        return [page.extract_text() or "" for page in pdf.pages], page_count
+
+
+class PDFExtractor:
+    """
+    Runs pdfplumber text extraction in a process pool so the event loop is never blocked.
+
+    At most `workers` documents are extracted at once and at most `queue_size` more wait
+    for a slot; anything beyond that is rejected with PDFQueueFullError.
+    When a worker process dies (e.g. out of memory), the pool is broken for good, so it is
+    replaced and the document retried once with the new pool.
+    With workers=0 extraction runs inline, which is only meant for debugging and benchmarks.
+    """
+
+    def __init__(self, workers: int = PDF_WORKERS, queue_size: int = PDF_QUEUE_SIZE,
+                 page_threshold: int = PDF_PARALLEL_PAGE_THRESHOLD,
+                 pages_per_task: int = PDF_PAGES_PER_TASK):
+        self.workers = workers
+        self.queue_size = queue_size
+        self.page_threshold = page_threshold
+        self.pages_per_task = max(1, pages_per_task)
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._admitted = 0
+
+    @property
+    def pending(self) -> int:
+        """Number of documents currently being extracted or waiting for a worker."""
+        return self._admitted
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return self._pool
+
+    def _discard_pool(self, pool: ProcessPoolExecutor) -> None:
+        """Shut down a broken pool, unless a concurrent extraction has already replaced it."""
+        pool.shutdown(wait=False, cancel_futures=True)
+        if self._pool is pool:
+            self._pool = None
+
+    async def _extract_in_pool(self, source: PDFSource) -> List[str]:
+        loop = asyncio.get_running_loop()
+        pool = self._get_pool()
+        try:
+            pages, page_count = await loop.run_in_executor(
+                pool, _extract_or_count, source, self.page_threshold
+            )
+            if pages is None:
+                # Long document: extract page ranges in parallel and keep page order
+                ranges = [
+                    loop.run_in_executor(pool, _extract_range, source, start, start + self.pages_per_task)
+                    for start in range(0, page_count, self.pages_per_task)
+                ]
+                pages = [text for chunk in await asyncio.gather(*ranges) for text in chunk]
+            return pages
+        except BrokenProcessPool:
+            self._discard_pool(pool)
+            raise
+
+    async def extract_text(self, source: PDFSource) -> str:
+        """
+        Extract the text of a PDF given as a file path or raw bytes, with pages separated by PAGE_BREAK.
+
+        Raises:
+            PDFQueueFullError: If the admission queue is full
+            PDFWorkerCrashedError: If the workers died on the document twice
+        """
+        if self.workers <= 0:
+            return PAGE_BREAK.join(_extract_range(source, 0, None))
+
+        if self._admitted >= self.workers + self.queue_size:
+            raise PDFQueueFullError(
+                f"PDF extraction queue is full ({self._admitted} documents pending)"
+            )
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.workers)
+
+        self._admitted += 1
+        try:
+            async with self._slots:
+                try:
+                    pages = await self._extract_in_pool(source)
+                except BrokenProcessPool:
+                    # The crash may have been caused by another document; retry once in a fresh pool
+                    try:
+                        pages = await self._extract_in_pool(source)
+                    except BrokenProcessPool:
+                        raise PDFWorkerCrashedError("PDF extraction workers crashed on this document") from None
+                return PAGE_BREAK.join(pages)
+        finally:
+            self._admitted -= 1
+
+    def shutdown(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+
+_extractor: Optional[PDFExtractor] = None
+
+
+def get_extractor() -> PDFExtractor:
+    global _extractor
+    if _extractor is None:
+        _extractor = PDFExtractor()
+    return _extractor
+
+
+def configure_extractor(**kwargs) -> PDFExtractor:
+    """Replace the shared extractor, e.g. to change the pool size in benchmarks."""
+    global _extractor
+    shutdown_extractor()
+    _extractor = PDFExtractor(**kwargs)
+    return _extractor
+
+
+def shutdown_extractor() -> None:
+    if _extractor is not None:
+        _extractor.shutdown()
+
+
+async def extract_pdf_text(source: PDFSource) -> str:
+    """Extract PDF text with the shared extractor."""
+    return await get_extractor().extract_text(source)
@@ -0,0 +1,151 @@
+import os
+import asyncio
+import hashlib
+import json
+from tempfile import NamedTemporaryFile
+from typing import Optional
+from fastapi import UploadFile
+from pdf_extraction import PDFSource
+
+# Upload ingestion settings
+PDF_MAX_UPLOAD_BYTES = int(os.getenv("PDF_MAX_UPLOAD_BYTES", str(10 * 1024 * 1024)))
+# Uploads larger than this are spilled to a temporary file instead of being kept in memory
+PDF_SPILL_THRESHOLD = int(os.getenv("PDF_SPILL_THRESHOLD", str(8 * 1024 * 1024)))
+PDF_READ_CHUNK_SIZE = int(os.getenv("PDF_READ_CHUNK_SIZE", str(256 * 1024)))
+# Room for the other form fields (job title, descriptions) of a multipart request
+FORM_FIELDS_ALLOWANCE = 1024 * 1024
+
+
+class UploadTooLargeError(Exception):
+    """Raised when an upload exceeds PDF_MAX_UPLOAD_BYTES."""
+
+
+class PDFUpload:
+    """
+    A fully read PDF upload: its SHA-256 digest and size, and the bytes themselves,
+    or the path of a temporary file for uploads above the spill threshold.
+    Use as a context manager so spilled files are always removed.
+    """
+
+    def __init__(self, digest: bytes, size: int, data: Optional[bytes] = None, path: Optional[str] = None):
+        self.digest = digest
+        self.size = size
+        self.data = data
+        self.path = path
+
+    @property
+    def source(self) -> PDFSource:
+        """What to hand to the PDF extractor: the in-memory bytes or the spill file path."""
+        return self.data if self.data is not None else self.path
+
+    def close(self) -> None:
+        if self.path is not None:
+            try:
+                os.unlink(self.path)
+            except FileNotFoundError:
+                pass
+            self.path = None
+        self.data = None
+
+    def __enter__(self) -> "PDFUpload":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+async def read_pdf_upload(
+    file: UploadFile,
+    max_bytes: int = PDF_MAX_UPLOAD_BYTES,
+    spill_threshold: int = PDF_SPILL_THRESHOLD,
+    chunk_size: int = PDF_READ_CHUNK_SIZE,
+) -> PDFUpload:
+    """
+    Read an uploaded PDF and hash it, without writing it to disk unless it is large.
+
+    The size limit is checked before reading when the size is known. Uploads of known size
+    up to `spill_threshold` are already buffered in memory by the form parser; they are read
+    in one call, which hands back that buffer without copying it. Other uploads are read in
+    chunks, checking the limit and hashing as they go, and are spilled to a temporary file
+    once they grow past `spill_threshold`. The UploadFile is closed afterwards.
+
+    Raises:
+        UploadTooLargeError: If the upload is larger than `max_bytes`
+    """
+    too_large = f"PDF exceeds the maximum upload size of {max_bytes} bytes"
+    if file.size is not None and file.size > max_bytes:
+        await file.close()
+        raise UploadTooLargeError(too_large)
+
+    if file.size is not None and file.size <= spill_threshold:
+        try:
+            data = await file.read()
+        finally:
+            await file.close()
+        if len(data) > max_bytes:
+            raise UploadTooLargeError(too_large)
+        return PDFUpload(hashlib.sha256(data).digest(), len(data), data=data)
+
+    hasher = hashlib.sha256()
+    data = bytearray()
+    size = 0
+    spill = None
+    try:
+        while True:
+            chunk = await file.read(chunk_size)
+            if not chunk:
+                break
+            size += len(chunk)
+            if size > max_bytes:
+                raise UploadTooLargeError(too_large)
+            hasher.update(chunk)
+            if spill is None and size > spill_threshold:
+                spill = NamedTemporaryFile(delete=False, suffix=".pdf")
+                await asyncio.to_thread(spill.write, data)
+                data = bytearray()
+            if spill is not None:
+                await asyncio.to_thread(spill.write, chunk)
+            else:
+                data += chunk
+    except BaseException:
+        if spill is not None:
+            spill.close()
+            os.unlink(spill.name)
+        raise
+    finally:
+        await file.close()
+
+    if spill is not None:
+        spill.close()
+        return PDFUpload(hasher.digest(), size, path=spill.name)
+    return PDFUpload(hasher.digest(), size, data=bytes(data))
+
+
+class UploadSizeLimitMiddleware:
+    """
+    ASGI middleware that rejects multipart requests whose Content-Length already exceeds
+    the upload limit with a 413, before the body is received and parsed.
+    """
+
+    def __init__(self, app, max_bytes: int = PDF_MAX_UPLOAD_BYTES + FORM_FIELDS_ALLOWANCE):
+        self.app = app
+        self.max_bytes = max_bytes
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http":
+            headers = dict(scope.get("headers") or [])
+            content_type = headers.get(b"content-type", b"")
+            content_length = headers.get(b"content-length", b"")
+            if (content_type.startswith(b"multipart/form-data") and content_length.isdigit()
+                    and int(content_length) > self.max_bytes):
+                body = json.dumps(
+                    {"detail": f"Request exceeds the maximum upload size of {self.max_bytes} bytes"}
+                ).encode()
+                await send({
+                    "type": "http.response.start",
+                    "status": 413,
+                    "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())],
+                })
+                await send({"type": "http.response.body", "body": body})
+                return
+        await self.app(scope, receive, send)
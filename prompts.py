@@ -0,0 +1,431 @@
+import os
+import re
+import json
+import string
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
+
+# Rough BPE token estimate: words, numbers, punctuation marks, line breaks with their
+# indentation and runs of spaces each count as one token
+TOKEN_ESTIMATE_PATTERN = re.compile(r"\w+|[^\w\s]|\n[ \t]*| {2,}")
+
+# Pin prompt versions without a code change, e.g. PROMPT_VERSIONS="cv_parse=1,ats_analysis=2"
+PROMPT_VERSIONS = dict(
+    item.split("=", 1) for item in os.getenv("PROMPT_VERSIONS", "").split(",") if "=" in item
+)
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimate the LLM token count of a text without a model-specific tokenizer."""
+    return len(TOKEN_ESTIMATE_PATTERN.findall(text))
+
+
+def compact_json(data: Any) -> str:
+    """Serialize JSON without indentation or spaces, which costs far fewer prompt tokens."""
+    return json.dumps(data, separators=(",", ":"), ensure_ascii=False)
+
+
+CV_STRUCTURE_SCHEMA = {
+    "title": "CVStructure",
+    "description": "Structured representation of a curriculum vitae (CV) extracted from text.",
+    "type": "object",
+    "properties": {
+        "personal_info": {
+            "type": "object",
+            "properties": {
+                "full_name": {"type": "string"},
+                "email": {"type": "array", "items": {"type": "string"}},
+                "phone": {"type": "array", "items": {"type": "string"}},
+                "linkedin": {"type": ["string", "null"]},
+                "address": {"type": "string"},
+                "city": {"type": "string"},
+                "country": {"type": "string"}
+            },
+            "required": ["full_name", "email", "phone", "linkedin", "address", "city", "country"]
+        },
+        "education": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "degree": {"type": "string"},
+                    "institution": {"type": "string"},
+                    "start_date": {"type": "string"},
+                    "end_date": {"type": "string"},
+                    "result": {"type": "array", "items": {"type": "string"}}
+                },
+                "required": ["degree", "institution", "start_date", "end_date", "result"]
+            }
+        },
+        "work_experience": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "job_title": {"type": "string"},
+                    "company": {"type": "string"},
+                    "dates": {"type": "string"},
+                    "responsibilities": {"type": "array", "items": {"type": "string"}},
+                    "achievements": {"type": "array", "items": {"type": "string"}}
+                },
+                "required": ["job_title", "company", "dates", "responsibilities", "achievements"]
+            }
+        },
+        "skills": {
+            "type": "object",
+            "properties": {
+                "technical": {"type": "array", "items": {"type": "string"}},
+                "professional": {"type": "array", "items": {"type": "string"}}
+            },
+            "required": ["technical", "professional"]
+        },
+        "projects": {
+            "type": "array",
+            "items": {"type": "object"}
+        },
+        "publications": {
+            "type": "array",
+            "items": {"type": "object"}
+        },
+        "certifications": {
+            "type": "array",
+            "items": {"type": "object"}
+        },
+        "awards": {
+            "type": "array",
+            "items": {"type": "object"}
+        },
+        "references": {
+            "type": "array",
+            "items": {"type": "object"}
+        },
+        "hobbies": {
+            "type": "array",
+            "items": {"type": "string"}
+        }
+    },
+    "required": ["personal_info", "education", "work_experience", "skills", "projects", "publications", "certifications", "awards", "references", "hobbies"]
+}
+
+# The schema is sent with every CV parse, so it is serialized once
+CV_STRUCTURE_SCHEMA_JSON = compact_json(CV_STRUCTURE_SCHEMA)
+
+
+@lru_cache(maxsize=None)
+def section_schema_json(sections: Tuple[str, ...]) -> str:
+    """Compact JSON schema of a subset of the CV sections, serialized once per subset."""
+    properties = CV_STRUCTURE_SCHEMA["properties"]
+    return compact_json({
+        "type": "object",
+        "properties": {name: properties[name] for name in sections},
+        "required": list(sections),
+    })
+
+# Shape of the ATS analysis response, sent with every ATS request
+ATS_RESPONSE_SKELETON = compact_json({
+    "overall_score": "<float 0-100>",
+    "overall_feedback": "<string>",
+    "section_feedbacks": [{
+        "section_name": "<string>",
+        "score": "<float 0-100>",
+        "feedback": "<string>",
+        "strengths": ["<string>"],
+        "improvements": ["<string>"],
+    }],
+    "keyword_match_percentage": "<float 0-100>",
+    "recommendations": ["<string>"],
+})
+
+# Shape of the response for one CV section, sent with every per-section ATS request
+ATS_SECTION_RESPONSE_SKELETON = compact_json({
+    "score": "<float 0-100>",
+    "feedback": "<string>",
+    "strengths": ["<string>"],
+    "improvements": ["<string>"],
+    "recommendations": ["<string>"],
+})
+
+
+def _compile(template: str, constants: Dict[str, str]) -> List[Tuple[str, Optional[str]]]:
+    """
+    Split a str.format template into (literal, field) segments, substituting constants
+    and merging adjacent literals so rendering is a single join.
+    """
+    segments: List[Tuple[str, Optional[str]]] = []
+    literal = ""
+    for text, field, _, _ in string.Formatter().parse(template):
+        literal += text
+        if field is None:
+            continue
+        if field in constants:
+            literal += constants[field]
+        else:
+            segments.append((literal, field))
+            literal = ""
+    segments.append((literal, None))
+    return segments
+
+
+class PromptTemplate:
+    """
+    A versioned system + user prompt pair, compiled once at import.
+
+    Templates use str.format field syntax. Fields listed in `constants` are substituted at
+    compile time; the remaining fields are filled per request by `render`. The token count
+    of the fixed text is estimated up front, so the prompt budget of an endpoint is known
+    before any request is made.
+    """
+
+    def __init__(self, name: str, version: int, system: str, user: str, max_tokens: int,
+                 constants: Optional[Dict[str, str]] = None):
+        self.name = name
+        self.version = version
+        self.max_tokens = max_tokens
+        self._system = _compile(system, constants or {})
+        self._user = _compile(user, constants or {})
+        self.fields = sorted({field for _, field in self._system + self._user if field is not None})
+        self.static_tokens = sum(estimate_tokens(text) for text, _ in self._system + self._user)
+
+    @property
+    def key(self) -> str:
+        return f"{self.name}@{self.version}"
+
+    @staticmethod
+    def _fill(segments: List[Tuple[str, Optional[str]]], fields: Dict[str, Any]) -> str:
+        return "".join(text + (str(fields[field]) if field is not None else "") for text, field in segments)
+
+    def render(self, **fields: Any) -> List[Dict[str, str]]:
+        """Fill in the template fields and return the chat messages."""
+        return [
+            {"role": "system", "content": self._fill(self._system, fields)},
+            {"role": "user", "content": self._fill(self._user, fields)},
+        ]
+
+    def budget(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "version": self.version,
+            "fields": self.fields,
+            "static_prompt_tokens": self.static_tokens,
+            "max_completion_tokens": self.max_tokens,
+        }
+
+
+_templates: Dict[str, Dict[int, PromptTemplate]] = {}
+
+
+def register(template: PromptTemplate) -> PromptTemplate:
+    _templates.setdefault(template.name, {})[template.version] = template
+    return template
+
+
+def get_prompt(name: str) -> PromptTemplate:
+    """Return the active version of a prompt: the one pinned in PROMPT_VERSIONS, else the latest."""
+    versions = _templates[name]
+    pinned = PROMPT_VERSIONS.get(name)
+    if pinned is not None and int(pinned) in versions:
+        return versions[int(pinned)]
+    return versions[max(versions)]
+
+
+def prompt_budgets() -> List[Dict[str, Any]]:
+    """Token budgets of the active version of every prompt."""
+    return [get_prompt(name).budget() for name in sorted(_templates)]
+
+
+register(PromptTemplate(
+    name="cv_summary",
+    version=1,
+    max_tokens=1024,
+    system=(
+        "You are a professional resume summary writer. Your task is to generate a detailed, engaging, and professional resume summary "
+        "within {range_a} to {range_b} words based on provided details."
+    ),
+    user=(
+        "Professional Background: '{professional_background}', "
+        "Quantifiable Achievements: '{quantifiable_achievements}', "
+        "Skills and Certifications: '{skills_and_certifications}', "
+        "Education: '{education}', "
+        "Target Role/Company: '{target_role_company}', "
+        "Career Goals: '{career_goals}'. "
+        "Ensure the summary is persuasive, tailored to the target role, and suitable for a professional CV. "
+        "Provide only the summary using multiple sentences, without any additional text."
+    ),
+))
+
+register(PromptTemplate(
+    name="job_responsibilities",
+    version=1,
+    max_tokens=1024,
+    system=(
+        "You are a professional job responsibilities writer. Your task is to generate detailed, engaging, and professional job responsibilities "
+        "based on provided details."
+    ),
+    user=(
+        "You are a professional job responsibility writer. Generate concise and professional job responsibilities based on: "
+        "Job Title: '{job_title}', "
+        "Company Industry: '{company_industry}'. "
+        "Ensure the Job Responsibilities are persuasive, tailored to the target Job Title and Company and suitable for a professional CV. "
+        "Provide 3-5 sentences of Job Responsibilities only, without any additional text."
+    ),
+))
+
+register(PromptTemplate(
+    name="skills",
+    version=1,
+    max_tokens=1024,
+    system=(
+        "You are a professional job skills writer. Generate 5-10 concise, professional skills as a comma-separated list of single words or short phrases "
+        "(e.g., 'html, css, scrum master, critical thinking') based on the provided job title."
+    ),
+    user=(
+        "You are a professional job skills writer. Generate concise and professional job skills for the job title '{job_title}'. "
+        "Provide maximum 6-8 skills as a comma-separated list of single words or short phrases (e.g., 'html, css, scrum master'). "
+        "Ensure the skills are persuasive, tailored to the job title, and suitable for a professional CV. "
+        "Provide only the skills list, without any additional text or formatting."
+    ),
+))
+
+# Batch versions of job_responsibilities and skills: many job titles per completion, answered as
+# a JSON object keyed by the entry IDs of the input
+register(PromptTemplate(
+    name="job_responsibilities_batch",
+    version=1,
+    max_tokens=4096,
+    system=(
+        "You are a professional job responsibilities writer. For each entry you are given, generate detailed, engaging, and professional job responsibilities "
+        "based on its job title and company industry."
+    ),
+    user=(
+        "Entries by ID:\n{items_json}\n\n"
+        "For each entry, write 3-5 sentences of concise and professional job responsibilities, tailored to its job title and company industry "
+        "and suitable for a professional CV. "
+        "Return a JSON object that maps every entry ID to its responsibilities as one string, e.g. {example}, without any additional text."
+    ),
+    constants={"example": compact_json({"1": "Manage ... Coordinate ... Ensure ..."})},
+))
+
+register(PromptTemplate(
+    name="skills_batch",
+    version=1,
+    max_tokens=4096,
+    system=(
+        "You are a professional job skills writer. For each job title you are given, generate concise, professional skills as a comma-separated list "
+        "of single words or short phrases (e.g., 'html, css, scrum master, critical thinking')."
+    ),
+    user=(
+        "Job titles by ID:\n{items_json}\n\n"
+        "Provide maximum 6-8 skills per job title, tailored to the job title and suitable for a professional CV. "
+        "Return a JSON object that maps every ID to its skills as one comma-separated string, e.g. {example}, without any additional text."
+    ),
+    constants={"example": compact_json({"1": "html, css, scrum master"})},
+))
+
+register(PromptTemplate(
+    name="cv_parse",
+    version=1,
+    max_tokens=4096,
+    system=(
+        "You are a professional CV parsing assistant. Extract key information from the provided CV text and structure it according to the provided JSON schema. "
+        "Ensure all required fields are populated, inferring reasonable defaults for missing data where possible (e.g., empty arrays for optional fields like projects, publications)."
+    ),
+    user=(
+        "CV Text:\n{cv_text}\n\n"
+        "Extract and structure the CV data into the following JSON schema:\n{schema}\n\n"
+        "Return the parsed CV data as a JSON object."
+    ),
+    constants={"schema": CV_STRUCTURE_SCHEMA_JSON},
+))
+
+# Version 2 is told what cv_rules already extracted and only gets the schema of the other sections
+register(PromptTemplate(
+    name="cv_parse",
+    version=2,
+    max_tokens=4096,
+    system=(
+        "You are a professional CV parsing assistant. Extract key information from the provided CV text and structure it according to the provided JSON schema. "
+        "Ensure all required fields are populated, inferring reasonable defaults for missing data where possible (e.g., empty arrays for optional fields like projects, publications). "
+        "Some fields were already extracted; leave them out of your answer."
+    ),
+    user=(
+        "CV Text:\n{cv_text}\n\n"
+        "Already extracted:\n{extracted}\n\n"
+        "Extract and structure the rest of the CV data into the following JSON schema:\n{section_schema}\n\n"
+        "Return the parsed CV data as a JSON object."
+    ),
+))
+
+register(PromptTemplate(
+    name="cv_section_parse",
+    version=1,
+    max_tokens=4096,
+    system=(
+        "You are a professional CV parsing assistant. You are given one part of a longer CV. Extract the information in it "
+        "and structure it according to the provided JSON schema. Only include what this part of the CV contains; use empty values for the rest."
+    ),
+    user=(
+        "CV Part ({sections}):\n{cv_text}\n\n"
+        "Extract and structure this part of the CV into the following JSON schema:\n{section_schema}\n\n"
+        "Return the parsed data as a JSON object."
+    ),
+))
+
+register(PromptTemplate(
+    name="ats_analysis",
+    version=1,
+    max_tokens=4096,
+    system=(
+        "You are an expert ATS (Applicant Tracking System) analyzer and professional recruiter. "
+        "Your task is to analyze a candidate's CV against a job description and provide:\n"
+        "1. An overall ATS score (0-100)\n"
+        "2. Section-by-section analysis with scores and feedback\n"
+        "3. Keyword match analysis\n"
+        "4. Actionable recommendations\n\n"
+        "Scoring criteria:\n"
+        "- 90-100: Excellent match, highly qualified\n"
+        "- 75-89: Good match, qualified with minor gaps\n"
+        "- 60-74: Moderate match, some relevant experience\n"
+        "- 40-59: Weak match, significant gaps\n"
+        "- 0-39: Poor match, not qualified\n\n"
+        "Analyze these CV sections: personal_info, education, work_experience, skills, projects, certifications, awards.\n"
+        "Provide specific, actionable feedback for each section."
+    ),
+    user=(
+        "Job Title: {job_title}\n\n"
+        "Job Description:\n{job_description}\n\n"
+        "Candidate CV Data:\n{cv_json}\n\n"
+        "Please analyze this CV against the job requirements and provide a comprehensive ATS score analysis. "
+        "Return your response as a JSON object with the following structure:\n{response_skeleton}\n\n"
+        "Ensure all scores are realistic and based on actual matches between the CV and job requirements."
+    ),
+    constants={"response_skeleton": ATS_RESPONSE_SKELETON},
+))
+
+# The system prompt and job description come first, so the prompt prefix is the same for
+# every section of one analysis
+register(PromptTemplate(
+    name="ats_section_analysis",
+    version=1,
+    max_tokens=768,
+    system=(
+        "You are an expert ATS (Applicant Tracking System) analyzer and professional recruiter. "
+        "You are given a job description and one section of a candidate's CV. "
+        "Score how well this section supports the candidate's fit for the job (0-100) and give "
+        "specific, actionable feedback on this section only.\n\n"
+        "Scoring criteria:\n"
+        "- 90-100: Excellent match, highly qualified\n"
+        "- 75-89: Good match, qualified with minor gaps\n"
+        "- 60-74: Moderate match, some relevant experience\n"
+        "- 40-59: Weak match, significant gaps\n"
+        "- 0-39: Poor match, not qualified"
+    ),
+    user=(
+        "Job Title: {job_title}\n\n"
+        "Job Description:\n{job_description}\n\n"
+        "CV Section: {section_name}\n{section_json}\n\n"
+        "Return your response as a JSON object with the following structure:\n{response_skeleton}\n\n"
+        "Ensure the score is realistic and based on actual matches between this section and the job requirements. "
+        "Keep recommendations to the two or three changes to this section that would most improve the match."
+    ),
+    constants={"response_skeleton": ATS_SECTION_RESPONSE_SKELETON},
+))
@@ -0,0 +1,47 @@
+"""
+Production server: one or more uvicorn worker processes on one host.
+
+Every worker runs the app's lifespan, so it opens its own LLM client, PDF worker pool and
+job workers. Caches are shared between the workers through SHARED_STORE_URL, which
+defaults to a local SQLite file when more than one worker runs. On SIGTERM each worker
+stops accepting connections, fails /health/ready, and waits up to SHUTDOWN_TIMEOUT
+seconds for in-flight requests (and their LLM calls) before shutting down.
+
+One worker is the default. The CV ranking index and the metrics registry are kept per
+process, so with several workers a CV indexed by one worker is not found by a search that
+lands on another, and each /metrics scrape only shows the counters of one worker. Set
+WEB_CONCURRENCY above 1 only if neither is needed.
+
+Run with:
+    python serve.py
+"""
+import os
+import uvicorn
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Server settings
+HOST = os.getenv("HOST", "0.0.0.0")
+PORT = int(os.getenv("PORT", "9090"))
+WEB_CONCURRENCY = int(os.getenv("WEB_CONCURRENCY", "1"))
+SHUTDOWN_TIMEOUT = int(os.getenv("SHUTDOWN_TIMEOUT", "30"))
+DEFAULT_SHARED_STORE_URL = "sqlite:///shared_cache.db"
+
+
+def main() -> None:
+    if WEB_CONCURRENCY > 1:
+        # Workers inherit the environment, so they all open the same store
+        os.environ.setdefault("SHARED_STORE_URL", DEFAULT_SHARED_STORE_URL)
+    uvicorn.run(
+        "main:app",
+        host=HOST,
+        port=PORT,
+        workers=WEB_CONCURRENCY,
+        timeout_graceful_shutdown=SHUTDOWN_TIMEOUT,
+        proxy_headers=True,
+    )
+
+
+if __name__ == "__main__":
+    main()
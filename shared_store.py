@@ -0,0 +1,152 @@
+import os
+import json
+import time
+import asyncio
+import sqlite3
+import threading
+from typing import Any, Optional
+from urllib.parse import urlsplit
+
+# Cache backend shared by all worker processes: "" (none, caches stay per process),
+# "sqlite:///path/to/file.db" or "redis://host:6379/0"
+SHARED_STORE_URL = os.getenv("SHARED_STORE_URL", "")
+# Bytes of the SQLite file read through mmap instead of read() calls
+SHARED_STORE_MMAP_BYTES = int(os.getenv("SHARED_STORE_MMAP_BYTES", str(256 * 1024 * 1024)))
+
+
+class SharedStore:
+    """
+    Key-value store with a per-entry TTL that every worker process of the app can reach.
+    Values must be JSON-serializable. Implementations: SQLiteSharedStore for one host,
+    RedisSharedStore for one or more hosts.
+
+    The caches using it (cv_cache.py, generation_cache.py) treat it as an optimization: they
+    count and swallow its errors, so an outage only costs cache hits.
+    """
+
+    async def get(self, key: str) -> Optional[Any]:
+        raise NotImplementedError
+
+    async def set(self, key: str, value: Any, ttl: float) -> None:
+        raise NotImplementedError
+
+    async def ping(self) -> None:
+        """Raise if the store cannot be reached (used by the readiness check)."""
+        raise NotImplementedError
+
+    def evict_expired(self) -> int:
+        """Delete expired entries and return how many were deleted, if the backend does not expire them itself."""
+        return 0
+
+    async def close(self) -> None:
+        pass
+
+
+class SQLiteSharedStore(SharedStore):
+    """
+    Shared store in a local SQLite file in WAL mode, so reads in one process never block on
+    writes in another. Each process opens its own connection on first use, which keeps the
+    store safe to create before uvicorn forks its workers.
+    """
+
+    def __init__(self, path: str, mmap_bytes: int = SHARED_STORE_MMAP_BYTES):
+        self.path = path
+        self.mmap_bytes = mmap_bytes
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._pid: Optional[int] = None
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None or self._pid != os.getpid():
+            conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(f"PRAGMA mmap_size={int(self.mmap_bytes)}")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS shared_store (key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+            self._conn, self._pid = conn, os.getpid()
+        return self._conn
+
+    def _get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            row = self._connection().execute(
+                "SELECT value FROM shared_store WHERE key = ? AND expires_at > ?", (key, time.time())
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def _set(self, key: str, value: Any, ttl: float) -> None:
+        with self._lock:
+            self._connection().execute(
+                "INSERT OR REPLACE INTO shared_store (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, json.dumps(value), time.time() + ttl),
+            )
+
+    async def get(self, key: str) -> Optional[Any]:
+        return await asyncio.to_thread(self._get, key)
+
+    async def set(self, key: str, value: Any, ttl: float) -> None:
+        await asyncio.to_thread(self._set, key, value, ttl)
+
+    async def ping(self) -> None:
+        def ping():
+            with self._lock:
+                self._connection().execute("SELECT 1").fetchone()
+        await asyncio.to_thread(ping)
+
+    def evict_expired(self) -> int:
+        with self._lock:
+            return self._connection().execute(
+                "DELETE FROM shared_store WHERE expires_at <= ?", (time.time(),)
+            ).rowcount
+
+    async def close(self) -> None:
+        with self._lock:
+            if self._conn is not None and self._pid == os.getpid():
+                self._conn.close()
+            self._conn = None
+
+
+class RedisSharedStore(SharedStore):
+    """Shared store in Redis, for workers spread over several hosts. Needs the `redis` package."""
+
+    def __init__(self, url: str):
+        try:
+            import redis.asyncio as redis
+        except ImportError:
+            raise RuntimeError("SHARED_STORE_URL points to Redis but the redis package is not installed")
+        self._redis = redis.from_url(url)
+
+    async def get(self, key: str) -> Optional[Any]:
+        value = await self._redis.get(key)
+        return json.loads(value) if value is not None else None
+
+    async def set(self, key: str, value: Any, ttl: float) -> None:
+        await self._redis.set(key, json.dumps(value), px=max(1, int(ttl * 1000)))
+
+    async def ping(self) -> None:
+        await self._redis.ping()
+
+    async def close(self) -> None:
+        await self._redis.aclose()
+
+
+def open_shared_store(url: str = SHARED_STORE_URL) -> Optional[SharedStore]:
+    """
+    Build the shared store for a SHARED_STORE_URL.
+
+    Raises:
+        ValueError: If the URL scheme is not sqlite, redis or rediss
+    """
+    if not url:
+        return None
+    parts = urlsplit(url)
+    if parts.scheme == "sqlite":
+        # sqlite:///relative.db and sqlite:////absolute/path.db, as in SQLAlchemy URLs
+        return SQLiteSharedStore(url[len("sqlite:///"):])
+    if parts.scheme in ("redis", "rediss"):
+        return RedisSharedStore(url)
+    raise ValueError(f"Unsupported SHARED_STORE_URL scheme: {parts.scheme}")
+
+
+shared_store = open_shared_store()
@@ -0,0 +1,275 @@
+import os
+import re
+import time
+import zlib
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import numpy as np
+from keyword_matcher import tokenize
+from metrics import SIMILARITY_LOOKUPS, SIMILARITY_LOOKUP_DURATION
+
+# Approximate-match cache settings
+SIMILAR_TITLE_THRESHOLD = float(os.getenv("SIMILAR_TITLE_THRESHOLD", "0.85"))  # Cosine similarity
+SIMILAR_DESCRIPTION_THRESHOLD = float(os.getenv("SIMILAR_DESCRIPTION_THRESHOLD", "0.75"))  # Estimated Jaccard
+SIMILARITY_INDEX_SIZE = int(os.getenv("SIMILARITY_INDEX_SIZE", "4096"))  # Entries per index
+NGRAM_FEATURES = int(os.getenv("NGRAM_FEATURES", "1024"))
+NGRAM_SIZE = 3
+# MinHash signature length, split into LSH bands of MINHASH_PERMUTATIONS / MINHASH_BANDS rows
+MINHASH_PERMUTATIONS = 64
+MINHASH_BANDS = 16
+MINHASH_PRIME = (1 << 31) - 1
+# Words per shingle of a job description
+SHINGLE_SIZE = 3
+
+TITLE_WORD_PATTERN = re.compile(r"[a-z0-9+#]+")
+# Job title abbreviations expanded before matching, so "Sr. SWE" meets "Senior Software Engineer"
+TITLE_ABBREVIATIONS = {
+    "sr": "senior", "snr": "senior", "jr": "junior", "assoc": "associate", "asst": "assistant",
+    "swe": "software engineer", "sde": "software development engineer", "sw": "software",
+    "eng": "engineer", "engr": "engineer", "dev": "developer", "mgr": "manager", "mngr": "manager",
+    "dir": "director", "exec": "executive", "admin": "administrator", "vp": "vice president",
+    "qa": "quality assurance", "hr": "human resources", "ml": "machine learning", "rn": "registered nurse",
+}
+# Seniority words; only titles with the same ones are compared, since their trigrams overlap a lot
+TITLE_LEVELS = frozenset({
+    "intern", "trainee", "junior", "associate", "senior", "lead", "staff", "principal", "head", "chief",
+    "i", "ii", "iii", "iv", "v", "1", "2", "3", "4", "5",
+})
+
+
+def normalize_title(title: str) -> str:
+    """Lower-case words of a job title, with abbreviations expanded and punctuation dropped."""
+    return " ".join(TITLE_ABBREVIATIONS.get(word, word) for word in TITLE_WORD_PATTERN.findall(title.casefold()))
+
+
+def ngram_vector(text: str, n_features: int = NGRAM_FEATURES) -> np.ndarray:
+    """
+    L2-normalized counts of the hashed character trigrams of the text (padded with a space
+    at both ends, so word starts and ends count). crc32 keeps vectors stable across processes.
+    """
+    padded = f" {text} "
+    indexes = [zlib.crc32(padded[i:i + NGRAM_SIZE].encode()) % n_features for i in range(len(padded) - NGRAM_SIZE + 1)]
+    vector = np.bincount(indexes, minlength=n_features).astype(np.float32)
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+class _LookupStats:
+    def __init__(self, name: str):
+        self.name = name
+        self.exact = 0
+        self.similar = 0
+        self.misses = 0
+        self.lookup_seconds = 0.0
+
+    def record(self, outcome: str, seconds: float) -> None:
+        setattr(self, outcome, getattr(self, outcome) + 1)
+        self.lookup_seconds += seconds
+        SIMILARITY_LOOKUPS.inc(index=self.name, outcome="miss" if outcome == "misses" else outcome)
+        SIMILARITY_LOOKUP_DURATION.observe(seconds, index=self.name)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.exact + self.similar + self.misses
+        return {
+            "exact": self.exact,
+            "similar": self.similar,
+            "misses": self.misses,
+            "hit_rate": (self.exact + self.similar) / lookups if lookups else 0.0,
+            "avg_lookup_ms": 1000 * self.lookup_seconds / lookups if lookups else 0.0,
+        }
+
+
+class TitleIndex:
+    """
+    Maps job titles to the cache key of the first similar title seen, so near-duplicates
+    ("Sr. Software Engineer", "Senior software engineer", "Senior SWE") share one cache entry.
+
+    Titles are normalized (normalize_title) and embedded as hashed character trigram
+    vectors. A lookup is one matrix-vector product over the stored vectors, and the best
+    match in the same scope (e.g. the company industry) with the same seniority words
+    (TITLE_LEVELS) is used if its cosine similarity is at least `threshold`. The vectors live in a ring buffer of `capacity` rows, so the
+    oldest titles are forgotten first.
+    """
+
+    def __init__(self, name: str = "job_titles", threshold: float = SIMILAR_TITLE_THRESHOLD,
+                 capacity: int = SIMILARITY_INDEX_SIZE, n_features: int = NGRAM_FEATURES):
+        self.threshold = threshold
+        self.capacity = max(1, capacity)
+        self.n_features = n_features
+        # Grown by doubling up to `capacity`, so a small index stays small
+        self._vectors = np.zeros((min(64, self.capacity), n_features), dtype=np.float32)
+        self._scopes = np.zeros(len(self._vectors), dtype=np.int64)
+        self._keys: List[Optional[str]] = [None] * len(self._vectors)
+        self._titles: List[Optional[Tuple[int, str]]] = [None] * len(self._vectors)
+        self._rows: Dict[Tuple[int, str], int] = {}  # (scope, normalized title) -> row
+        self._scope_ids: Dict[Tuple[str, str], int] = {}  # (scope, seniority words) -> ID
+        self._size = 0
+        self._next = 0
+        self._stats = _LookupStats(name)
+
+    def _grow(self) -> None:
+        rows = min(self.capacity, 2 * len(self._vectors))
+        self._vectors = np.vstack([self._vectors, np.zeros((rows - len(self._vectors), self.n_features), np.float32)])
+        self._scopes = np.concatenate([self._scopes, np.zeros(rows - len(self._scopes), np.int64)])
+        self._keys.extend([None] * (rows - len(self._keys)))
+        self._titles.extend([None] * (rows - len(self._titles)))
+
+    def _add(self, scope_id: int, title: str, vector: np.ndarray, key: str) -> None:
+        if self._size == len(self._vectors) and self._size < self.capacity:
+            self._grow()
+        row = self._next % len(self._vectors) if self._size == self.capacity else self._size
+        old = self._titles[row]
+        if old is not None:
+            self._rows.pop(old, None)
+        self._vectors[row] = vector
+        self._scopes[row] = scope_id
+        self._keys[row] = key
+        self._titles[row] = (scope_id, title)
+        self._rows[(scope_id, title)] = row
+        self._size = min(self._size + 1, self.capacity)
+        self._next += 1
+
+    def canonical_key(self, title: str, key: str, scope: str = "") -> str:
+        """
+        Return the cache key of the most similar known title in `scope`, or register the
+        title under `key` and return `key` when none is similar enough.
+        """
+        start = time.perf_counter()
+        normalized = normalize_title(title)
+        if not normalized:
+            return key
+        levels = " ".join(sorted(TITLE_LEVELS.intersection(normalized.split())))
+        scope_id = self._scope_ids.setdefault((scope, levels), len(self._scope_ids))
+        row = self._rows.get((scope_id, normalized))
+        if row is not None:
+            self._stats.record("exact", time.perf_counter() - start)
+            return self._keys[row]
+
+        vector = ngram_vector(normalized, self.n_features)
+        if self._size:
+            similarities = self._vectors[:self._size] @ vector
+            similarities[self._scopes[:self._size] != scope_id] = -1.0
+            best = int(np.argmax(similarities))
+            if similarities[best] >= self.threshold:
+                self._stats.record("similar", time.perf_counter() - start)
+                return self._keys[best]
+        self._add(scope_id, normalized, vector, key)
+        self._stats.record("misses", time.perf_counter() - start)
+        return key
+
+    def stats(self) -> Dict[str, Any]:
+        return {"entries": self._size, "capacity": self.capacity, "threshold": self.threshold, **self._stats.stats()}
+
+
+def normalize_description(text: str) -> str:
+    """The lines of a job description with runs of spaces collapsed, and blank lines dropped."""
+    return "\n".join(" ".join(line.split()) for line in text.splitlines() if line.strip())
+
+
+def shingles(text: str) -> np.ndarray:
+    """Hashes of the SHINGLE_SIZE-word shingles of a text (its words, if it is shorter)."""
+    tokens = tokenize(text)
+    grams = [" ".join(tokens[i:i + SHINGLE_SIZE]) for i in range(max(1, len(tokens) - SHINGLE_SIZE + 1))]
+    return np.unique(np.array([zlib.crc32(gram.encode()) for gram in grams if gram], dtype=np.uint64))
+
+
+class DescriptionIndex:
+    """
+    Cache of values computed from job descriptions (e.g. their keywords) that can also serve
+    near-duplicate descriptions, such as the same posting with different boilerplate.
+
+    Descriptions are identical when they differ only in spacing (normalize_description).
+    For other lookups, each description gets a MinHash signature of its word shingles; the
+    share of equal signature slots estimates the Jaccard similarity of two descriptions.
+    Signatures are split into MINHASH_BANDS bands for locality-sensitive hashing, so a lookup
+    only compares the descriptions that share a band. A value is reused when the estimated
+    similarity is at least `threshold`. At most `capacity` descriptions are kept (LRU).
+    """
+
+    def __init__(self, name: str = "job_descriptions", threshold: float = SIMILAR_DESCRIPTION_THRESHOLD,
+                 capacity: int = SIMILARITY_INDEX_SIZE, permutations: int = MINHASH_PERMUTATIONS,
+                 bands: int = MINHASH_BANDS):
+        self.threshold = threshold
+        self.capacity = max(1, capacity)
+        self.bands = bands
+        self.rows = permutations // bands
+        # Random hash functions (a * x + b) mod p, fixed by the seed so signatures are stable
+        rng = np.random.default_rng(0)
+        self._a = rng.integers(1, MINHASH_PRIME, size=(permutations, 1), dtype=np.uint64)
+        self._b = rng.integers(0, MINHASH_PRIME, size=(permutations, 1), dtype=np.uint64)
+        self._entries: "OrderedDict[int, Tuple[Optional[np.ndarray], Any]]" = OrderedDict()
+        self._exact: Dict[str, int] = {}  # Normalized description -> entry ID
+        self._texts: Dict[int, str] = {}
+        self._buckets: Dict[Tuple[int, bytes], set] = {}
+        self._next_id = 0
+        self._stats = _LookupStats(name)
+
+    def signature(self, text: str) -> np.ndarray:
+        hashes = shingles(text) % MINHASH_PRIME
+        if not len(hashes):
+            return np.full(len(self._a), MINHASH_PRIME, dtype=np.uint64)
+        return ((self._a * hashes[None, :] + self._b) % MINHASH_PRIME).min(axis=1)
+
+    def _band_keys(self, signature: np.ndarray) -> List[Tuple[int, bytes]]:
+        return [(band, signature[band * self.rows:(band + 1) * self.rows].tobytes()) for band in range(self.bands)]
+
+    def _evict(self) -> None:
+        entry_id, (signature, _) = self._entries.popitem(last=False)
+        self._exact.pop(self._texts.pop(entry_id), None)
+        if signature is None:
+            return
+        for band_key in self._band_keys(signature):
+            bucket = self._buckets.get(band_key)
+            if bucket is not None:
+                bucket.discard(entry_id)
+                if not bucket:
+                    del self._buckets[band_key]
+
+    def get_or_compute(self, text: str, compute: Callable[[str], Any], similar: bool = True) -> Any:
+        """
+        Return the value of `text`, else compute and store it. With `similar`, the value of a
+        near-duplicate description is returned too; leave it off when the value depends on
+        the parts where near-duplicates may differ, since the first description seen wins.
+        """
+        start = time.perf_counter()
+        normalized = normalize_description(text)
+        entry_id = self._exact.get(normalized)
+        if entry_id is not None:
+            self._entries.move_to_end(entry_id)
+            self._stats.record("exact", time.perf_counter() - start)
+            return self._entries[entry_id][1]
+
+        signature, band_keys = None, []
+        if similar:
+            signature = self.signature(text)
+            band_keys = self._band_keys(signature)
+            candidates = set().union(*(self._buckets.get(band_key, ()) for band_key in band_keys))
+            best_id, best_similarity = None, 0.0
+            for candidate in candidates:
+                similarity = float(np.mean(self._entries[candidate][0] == signature))
+                if similarity > best_similarity:
+                    best_id, best_similarity = candidate, similarity
+            if best_id is not None and best_similarity >= self.threshold:
+                self._entries.move_to_end(best_id)
+                self._stats.record("similar", time.perf_counter() - start)
+                return self._entries[best_id][1]
+        self._stats.record("misses", time.perf_counter() - start)
+
+        value = compute(text)
+        entry_id = self._next_id
+        self._next_id += 1
+        self._entries[entry_id] = (signature, value)
+        self._exact[normalized] = entry_id
+        self._texts[entry_id] = normalized
+        for band_key in band_keys:
+            self._buckets.setdefault(band_key, set()).add(entry_id)
+        while len(self._entries) > self.capacity:
+            self._evict()
+        return value
+
+    def stats(self) -> Dict[str, Any]:
+        return {"entries": len(self._entries), "capacity": self.capacity, "threshold": self.threshold, **self._stats.stats()}
+
+
+title_index = TitleIndex()
+description_index = DescriptionIndex()
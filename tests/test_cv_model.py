@@ -0,0 +1,27 @@
+import json
+
+from cv_model import parse_cv_json
+
+
+def test_loose_shapes_are_coerced():
+    cv = parse_cv_json(json.dumps({
+        "personal_info": {"full_name": "Jane Doe", "phone": 4915112345678},
+        "skills": ["Python", "SQL"],
+        "certifications": ["AWS Certified Developer", {"name": "CKA"}],
+        "awards": "Employee of the Year",
+        "projects": ["Resume parser"],
+    }))
+    assert cv["personal_info"]["phone"] == ["4915112345678"]
+    assert cv["skills"] == {"technical": ["Python", "SQL"], "professional": []}
+    assert cv["certifications"] == [{"name": "AWS Certified Developer"}, {"name": "CKA"}]
+    assert cv["awards"] == [{"name": "Employee of the Year"}]
+    assert cv["projects"] == [{"name": "Resume parser"}]
+
+
+def test_extra_fields_are_cleaned():
+    cv = parse_cv_json(json.dumps({
+        "languages": ["**English**", {"name": "German*"}],
+        "personal_info": {"website": "  example.com  "},
+    }))
+    assert cv["languages"] == ["English", {"name": "German"}]
+    assert cv["personal_info"]["website"] == "example.com"
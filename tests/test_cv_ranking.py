@@ -0,0 +1,29 @@
+from cv_ranking import CVRankingIndex
+
+PYTHON_CV = {"skills": ["Python", "SQL"], "work_experience": [{"job_title": "Data Engineer"}]}
+NURSE_CV = {"skills": ["Patient care", "Triage"], "work_experience": [{"job_title": "Registered Nurse"}]}
+
+
+def ranked_ids(index, job_description="Data engineer with Python and SQL"):
+    return [ranked.cv_id for ranked in index.rank(job_description, top_k=10)]
+
+
+def test_repeated_ids_in_one_call_keep_the_last_cv():
+    index = CVRankingIndex(n_features=2 ** 12)
+    index.add_many([("a", NURSE_CV), ("a", PYTHON_CV), ("b", NURSE_CV)])
+    assert len(index) == 2
+    assert ranked_ids(index) == ["a", "b"]
+    index.remove("a")
+    assert ranked_ids(index) == ["b"]
+
+
+def test_replaced_and_removed_rows_are_compacted():
+    index = CVRankingIndex(n_features=2 ** 12)
+    for _ in range(50):
+        index.add_many([("a", PYTHON_CV), ("b", NURSE_CV)])
+    index.add("c", PYTHON_CV)
+    index.remove("b")
+    assert len(index) == 2
+    assert len(index.ids) <= 2 * len(index)
+    assert index._matrices["skills"].shape[0] == len(index.ids)
+    assert sorted(ranked_ids(index)) == ["a", "c"]
@@ -0,0 +1,41 @@
+from keyword_matcher import extract_keywords, keyword_coverage
+
+JOB = (
+    "Data Analyst\n"
+    "We are looking for a data analyst with strong Python and SQL skills. "
+    "You will be building Tableau dashboards for the sales team. "
+    "Experience with AWS cloud services and machine learning is a plus."
+)
+
+
+def test_phrases_keep_the_names_they_contain():
+    terms = [keyword.term for keyword in extract_keywords(JOB)]
+    assert "building tableau dashboards" in terms and "tableau" in terms
+    assert "aws cloud services" in terms and "aws" in terms
+    # Ordinary words are still absorbed by their phrase
+    assert "dashboards" not in terms and "cloud" not in terms
+
+
+def test_listed_skills_are_matched():
+    cv = {"skills": ["Python", "SQL", "Tableau", "AWS", "Machine Learning"]}
+    match = keyword_coverage(cv, JOB)
+    assert {"python", "sql", "tableau", "aws", "machine learning"} <= set(match.matched_keywords)
+    assert "tableau" not in match.missing_keywords and "aws" not in match.missing_keywords
+
+
+def test_benefits_and_company_blurb_do_not_rank():
+    job = (
+        "Backend Engineer\n"
+        "Acme is a fast growing company on a mission to deliver world class software.\n"
+        "You will build REST APIs in Python and Django and run PostgreSQL on AWS.\n"
+        "Benefits: competitive salary, generous vacation policy and health insurance.\n"
+        "We are an equal opportunity employer."
+    )
+    terms = {keyword.term for keyword in extract_keywords(job)}
+    assert {"python", "django", "postgresql", "aws"} <= terms
+    assert not terms & {"generous vacation policy", "competitive salary", "health insurance",
+                        "deliver world class", "equal", "employer", "fast growing"}
+    # Benefits text does not change the score at all
+    cv = {"skills": ["Python", "Django", "PostgreSQL", "AWS"]}
+    without_benefits = job.split("\nBenefits")[0]
+    assert keyword_coverage(cv, job) == keyword_coverage(cv, without_benefits)
@@ -0,0 +1,35 @@
+import random
+import pytest
+from output_cleaner import STREAM_SEPARATORS, IncrementalCleaner, clean_output
+
+# Raw text pieces with every separator, whitespace kind and harmful character in the cleaners
+PIECES = list("abcXYZ  ,,..\n\n\r\t*#/<>%'-_é1") + ["Python", "SQL", " C++", "Node.js", "**AWS**", "\n\n", ", ", ". "]
+
+
+def random_text(rng: random.Random) -> str:
+    return "".join(rng.choice(PIECES) for _ in range(rng.randint(0, 60)))
+
+
+def stream(text: str, output_type: str, rng: random.Random) -> str:
+    cleaner = IncrementalCleaner(output_type)
+    parts, i = [], 0
+    while i < len(text):
+        step = rng.randint(1, 8)
+        parts.append(cleaner.feed(text[i:i + step]))
+        i += step
+    parts.append(cleaner.finish())
+    return "".join(parts)
+
+
+@pytest.mark.parametrize("output_type", sorted(STREAM_SEPARATORS))
+def test_stream_matches_clean_output(output_type):
+    rng = random.Random(output_type)
+    for _ in range(3000):
+        text = random_text(rng)
+        assert stream(text, output_type, rng) == clean_output(text, output_type), repr(text)
+
+
+def test_newlines_separate_skills():
+    expected = "'Python', 'SQL', 'Docker'"
+    assert clean_output("Python\nSQL\nDocker", "skills") == expected
+    assert stream("Python\nSQL\nDocker", "skills", random.Random(0)) == expected
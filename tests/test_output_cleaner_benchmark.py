@@ -0,0 +1,25 @@
+import os
+import sys
+import random
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks"))
+from bench_output_cleaner import DEFAULT_FLOORS, make_cases
+
+CASES = make_cases(random.Random(0), items=500)
+
+
+@pytest.mark.parametrize("case", list(CASES))
+def test_output_cleaner_throughput(benchmark, case):
+    """
+    Each case must clean at least its DEFAULT_FLOORS throughput in MB/s (best round). Without
+    --benchmark-enable or --benchmark-only, each case only runs once (see conftest.py).
+    """
+    fn, setup, nbytes = CASES[case]
+    benchmark.group = "output_cleaner"
+    benchmark.pedantic(fn, setup=lambda: ((setup(),), {}), rounds=10, iterations=1)
+    if benchmark.disabled:
+        return
+    mbps = nbytes / benchmark.stats.stats.min / 2 ** 20
+    benchmark.extra_info["mb_per_s"] = round(mbps, 1)
+    assert mbps >= DEFAULT_FLOORS[case], f"{case}: {mbps:.1f} MB/s is below the floor of {DEFAULT_FLOORS[case]} MB/s"
@@ -0,0 +1,34 @@
+import os
+import sys
+import time
+import signal
+import asyncio
+from pdf_extraction import PDFExtractor
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks"))
+from pdf_fixtures import make_cv_pdf
+
+
+def test_extraction_recovers_from_a_dead_worker():
+    pdf = make_cv_pdf(1)
+    extractor = PDFExtractor(workers=1, queue_size=1)
+
+    async def run():
+        first = await extractor.extract_text(pdf)
+        pool = extractor._pool
+        for process in list(pool._processes.values()):
+            os.kill(process.pid, signal.SIGKILL)
+        # Wait until the executor has noticed the dead worker and marked the pool broken
+        deadline = time.monotonic() + 10
+        while not pool._broken and time.monotonic() < deadline:
+            await asyncio.sleep(0.05)
+        assert pool._broken
+        second = await extractor.extract_text(pdf)
+        assert extractor._pool is not pool
+        return first, second
+
+    try:
+        first, second = asyncio.run(run())
+    finally:
+        extractor.shutdown()
+    assert first and second == first
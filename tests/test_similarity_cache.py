@@ -0,0 +1,26 @@
+from keyword_matcher import extract_keywords
+from similarity_cache import DescriptionIndex
+
+BOILERPLATE = (
+    "Acme is a fast growing company with offices in three countries and a friendly culture. "
+    "We offer a competitive salary, health insurance, a generous vacation policy and flexible remote work. "
+    "Acme is an equal opportunity employer and values diversity at every level of the company. "
+    "Apply before the end of the month with your CV and a short cover letter."
+)
+BACKEND = f"Backend Engineer\nBuild APIs with Python, Django and PostgreSQL on AWS. {BOILERPLATE}"
+FRONTEND = f"Frontend Engineer\nBuild interfaces with React, TypeScript and CSS from Figma designs. {BOILERPLATE}"
+
+
+def test_near_duplicates_keep_their_own_keywords():
+    index = DescriptionIndex(threshold=0.5)
+    index.get_or_compute(BACKEND, extract_keywords, similar=False)
+    terms = [keyword.term for keyword in index.get_or_compute(FRONTEND, extract_keywords, similar=False)]
+    assert "react" in terms and "python" not in terms
+    assert index.stats()["misses"] == 2
+
+
+def test_spacing_does_not_miss_the_cache():
+    index = DescriptionIndex()
+    first = index.get_or_compute(BACKEND, extract_keywords, similar=False)
+    assert index.get_or_compute(f"  {BACKEND.replace(' ', '  ')}\n\n", extract_keywords, similar=False) is first
+    assert index.stats()["exact"] == 1